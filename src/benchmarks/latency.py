@@ -0,0 +1,84 @@
+"""
+Accuracy of the per-layer latency lookup table.
+
+Samples architectures from a search space, measures each one's forward latency
+(p50) and compares it with the table's prediction and with FLOPs. Prints the
+Spearman rank correlation of both with the measured latency and the table's
+mean absolute percentage error.
+
+    python src/benchmarks/latency.py --candidates 32 --batch-size 1 --threads 1
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import torch
+
+from nas.latency import LatencyTable, benchmark_latency
+from nas.proxies import _spearman
+from nas.surrogate import sample_candidates
+from search_spaces.registry import get_search_space
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--search-space", default="simple_cnn_default")
+    ap.add_argument("--candidates", type=int, default=32)
+    ap.add_argument("--in-ch", type=int, default=1)
+    ap.add_argument("--size", type=int, default=28)
+    ap.add_argument("--batch-size", type=int, default=1)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--lut-dir", default=None, help="existing table directory (default: a fresh temporary one)")
+    ap.add_argument("--seed", type=int, default=0)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(args.seed)
+    search_space = get_search_space(args.search_space)
+    meta = {"in_ch": args.in_ch, "size": args.size, "num_classes": 10}
+    lut_dir = args.lut_dir or tempfile.mkdtemp(prefix="latency_lut_")
+    table = LatencyTable(lut_dir, batch_size=args.batch_size, threads=args.threads, warmup=args.warmup, iters=args.iters)
+
+    # Distinct shapes only: dropout and lr do not change the forward pass.
+    shapes = {}
+    for params in sample_candidates(search_space, args.candidates, seed=args.seed):
+        cost = search_space.cost_model(params, meta)
+        shapes.setdefault(tuple(layer.op for layer in cost.layers), (params, cost))
+
+    rows = []
+    print(f"{'measured':>10} {'predicted':>10} {'flops':>12}  params")
+    for params, cost in shapes.values():
+        measured = benchmark_latency(
+            search_space.build_model(params, meta),
+            (args.in_ch, args.size, args.size),
+            batch_sizes=[args.batch_size],
+            threads=[args.threads],
+            warmup=args.warmup,
+            iters=args.iters,
+        )[0]["p50_ms"]
+        predicted = table.predict(cost)
+        rows.append((measured, predicted, float(cost.flops)))
+        print(f"{measured:10.3f} {predicted:10.3f} {cost.flops:12d}  {params}")
+
+    if len(rows) < 2:
+        print("need at least two distinct architectures")
+        return
+    arr = np.asarray(rows)
+    print(f"architectures: {len(rows)}, table entries: {len(table.entries)} ({table.path})")
+    print(f"spearman(predicted, measured): {_spearman(arr[:, 1], arr[:, 0]):.3f}")
+    print(f"spearman(flops, measured):     {_spearman(arr[:, 2], arr[:, 0]):.3f}")
+    print(f"predicted MAPE: {100.0 * float(np.mean(np.abs(arr[:, 1] - arr[:, 0]) / arr[:, 0])):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Latency/recall benchmark for the memory store's index types.
+
+Writes a synthetic ``trials.jsonl`` (``--records`` rows over 3 datasets x 2
+search spaces), opens it once per index type and reports build time, single
+query latency (p50/p95) and recall@k against exact ``flat`` search on the same
+partitions. Index types after the first reuse the memory-mapped rows, so only
+the index itself is rebuilt.
+
+    python src/benchmarks/memory_index.py --records 1000000 --types flat hnsw ivf
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from memory import FaissMemoryStore
+
+DATASETS = [("MNIST", 1, 28), ("FASHIONMNIST", 1, 28), ("CIFAR10", 3, 32)]
+SEARCH_SPACES = ["simple_cnn_default", "simple_cnn_wide"]
+
+
+def _random_context(rng: np.random.Generator) -> dict:
+    dataset, in_ch, size = DATASETS[int(rng.integers(len(DATASETS)))]
+    conv = int(rng.choice([16, 32, 48, 64]))
+    return {
+        "dataset": dataset,
+        "search_space": SEARCH_SPACES[int(rng.integers(len(SEARCH_SPACES)))],
+        "in_ch": in_ch,
+        "size": size,
+        "batch_size": int(rng.choice([64, 128, 256])),
+        "epochs": int(rng.integers(1, 6)),
+        "params": {
+            "conv_channels": conv,
+            "kernel_size": int(rng.choice([3, 5])),
+            "dropout": float(rng.uniform(0.0, 0.5)),
+            "lr": float(10 ** rng.uniform(-3, -1)),
+        },
+        "value": float(rng.uniform(0.1, 0.99)),
+        "model_params": int(conv * 13_000),
+        "flops": int(conv * 260_000),
+    }
+
+
+def _write_records(path: Path, n: int, rng: np.random.Generator) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n):
+            ctx = _random_context(rng)
+            record = {
+                "run_id": "bench",
+                "trial_number": i,
+                "dataset": ctx["dataset"],
+                "device": "cpu",
+                "search_space": ctx["search_space"],
+                "params": ctx["params"],
+                "value": ctx["value"],
+                "model_params": ctx["model_params"],
+                "flops": ctx["flops"],
+                "config_hash": "",
+                "context": {k: ctx[k] for k in ("in_ch", "size", "batch_size", "epochs")},
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--records", type=int, default=1_000_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivf"])
+    ap.add_argument("--ef-search", type=int, default=64)
+    ap.add_argument("--nprobe", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=42)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    queries = [_random_context(rng) for _ in range(args.queries)]
+    kwargs = {"ef_search": args.ef_search, "nprobe": args.nprobe}
+
+    with tempfile.TemporaryDirectory(prefix="nas_memory_") as tmp:
+        index_path, records_path = Path(tmp) / "faiss.index", Path(tmp) / "trials.jsonl"
+        start = time.perf_counter()
+        _write_records(records_path, args.records, rng)
+        print(f"wrote {args.records} records in {time.perf_counter() - start:.1f}s")
+
+        exact = None
+        rows = []
+        for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+            start = time.perf_counter()
+            store = FaissMemoryStore(str(index_path), str(records_path), index_type=index_type, index_kwargs=kwargs)
+            build_s = time.perf_counter() - start
+            latencies, results = [], []
+            for q in queries:
+                t0 = time.perf_counter()
+                _, ids = store.search(q, k=args.k)
+                latencies.append(time.perf_counter() - t0)
+                results.append(set(ids.tolist()))
+            store.close()
+            if exact is None:
+                exact = results
+            recall = float(np.mean([len(r & e) / max(1, len(e)) for r, e in zip(results, exact)]))
+            lat_ms = np.asarray(latencies) * 1000.0
+            if index_type in args.types:
+                rows.append((index_type, build_s, np.percentile(lat_ms, 50), np.percentile(lat_ms, 95), recall))
+
+    print(f"records={args.records} partitions={len(DATASETS) * len(SEARCH_SPACES)} k={args.k} queries={args.queries}")
+    print(f"{'index':>6} {'open+build s':>13} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    for index_type, build_s, p50, p95, recall in rows:
+        print(f"{index_type:>6} {build_s:13.2f} {p50:8.3f} {p95:8.3f} {recall:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
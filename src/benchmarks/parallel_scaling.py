@@ -0,0 +1,86 @@
+"""
+Scaling benchmark for parallel Optuna trial workers.
+
+Runs the same search (fixed trial count, no pruning, memory and result cache
+disabled, so every trial trains) with an increasing number of worker processes
+and prints trials/s and the speedup over one worker. Each worker, including the
+in-process ``n_jobs=1`` baseline, gets ``cpu_count // n_jobs`` torch threads
+unless ``--threads-per-worker`` is set, so the sweep shows where memory
+bandwidth rather than core count starts limiting throughput.
+
+    python src/benchmarks/parallel_scaling.py --dataset MNIST --trials 16 --jobs 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config.schema import validate_config
+from nas.latency import num_threads
+from nas.optuna_search import run_optuna_search
+from nas.parallel import resolve_threads_per_worker
+from tracking.io import init_run_context
+from utils.env import get_device, set_seed
+
+
+def _run(args, n_jobs: int, root: Path, device) -> float:
+    raw = {
+        "dataset": args.dataset,
+        "batch_size": args.batch_size,
+        "num_workers": 0,
+        "epochs": args.epochs,
+        "seed": args.seed,
+        "data": {"mode": args.data_mode, "cache_dir": args.cache_dir},
+        "optuna": {"n_trials": args.trials, "n_jobs": n_jobs, "threads_per_worker": args.threads_per_worker},
+        "agents": {"enabled": False},
+        "memory": {"enabled": False},
+        "result_cache": {"enabled": False},
+        "paths": {"results": str(root / "results"), "checkpoints": str(root / "checkpoints")},
+        "tracking": {"run_id": f"scaling_{n_jobs}", "mirror_legacy_results": False},
+    }
+    cfg = init_run_context(validate_config(raw))
+    set_seed(args.seed)
+    # Worker processes set their own thread count; the in-process baseline gets the same share.
+    with num_threads(resolve_threads_per_worker(n_jobs, args.threads_per_worker)):
+        start = time.perf_counter()
+        run_optuna_search(cfg, device)
+    return args.trials / (time.perf_counter() - start)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--device", type=str, default="cpu")
+    ap.add_argument("--dataset", type=str, default="MNIST")
+    ap.add_argument("--data-mode", type=str, default="tensor")
+    ap.add_argument("--cache-dir", type=str, default="data/cache")
+    ap.add_argument("--trials", type=int, default=16)
+    ap.add_argument("--epochs", type=int, default=1)
+    ap.add_argument("--batch-size", type=int, default=128)
+    ap.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--threads-per-worker", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=42)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    device = get_device(args.device)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="nas_scaling_") as tmp:
+        for n_jobs in args.jobs:
+            results.append((n_jobs, _run(args, n_jobs, Path(tmp), device)))
+
+    base = results[0][1]
+    print(f"device={device} dataset={args.dataset} trials={args.trials} epochs={args.epochs}")
+    for n_jobs, rate in results:
+        threads = resolve_threads_per_worker(n_jobs, args.threads_per_worker)
+        print(f"n_jobs={n_jobs:3d} threads/worker={threads:3d}: {rate:7.3f} trials/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
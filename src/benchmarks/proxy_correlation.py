@@ -0,0 +1,52 @@
+"""
+Correlation of zero-cost proxies with final accuracy, per dataset.
+
+Reads trial records (the memory store's ``trials.jsonl`` or a run's
+``metrics.jsonl``) and prints the Spearman rank correlation between every
+proxy in ``proxy_scores`` and the final value of completed trials.
+
+    python src/benchmarks/proxy_correlation.py experiments/artifacts/memory/trials.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from nas.proxies import proxy_correlation
+
+
+def _records(paths):
+    for path in paths:
+        with Path(path).open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--min-records", type=int, default=5)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = proxy_correlation(_records(args.paths), min_records=args.min_records)
+    if not result:
+        print(f"no dataset has {args.min_records}+ completed records with proxy scores")
+        return
+    names = sorted({name for per_proxy in result.values() for name in per_proxy})
+    print(f"{'dataset':>14} " + " ".join(f"{name:>10}" for name in names))
+    for dataset, per_proxy in sorted(result.items()):
+        print(f"{dataset:>14} " + " ".join(f"{per_proxy.get(name, float('nan')):10.3f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for the training loop's host syncs.
+
+Compares the legacy loop (``loss.item()`` + ``accuracy()`` on every batch, i.e.
+two device syncs per step) with the ``MetricAccumulator`` loop (one read-back per
+epoch) on synthetic data, and prints steps/s for both.
+
+    python src/benchmarks/train_loop.py --device cpu --steps 200
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import torch
+import torch.nn as nn
+
+from models.simple_cnn import SimpleCNN
+from utils.env import get_device, set_seed
+from utils.metrics import MetricAccumulator, accuracy
+
+
+def _batches(steps: int, batch_size: int, in_ch: int, size: int, device):
+    x = torch.randn(batch_size, in_ch, size, size, device=device)
+    y = torch.randint(0, 10, (batch_size,), device=device)
+    for _ in range(steps):
+        yield x, y
+
+
+def _legacy_loop(model, batches, optimizer, criterion):
+    total_loss, total_acc, n = 0.0, 0.0, 0
+    for x, y in batches:
+        optimizer.zero_grad()
+        out = model(x)
+        loss = criterion(out, y)
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item() * x.size(0)
+        total_acc += accuracy(out.detach(), y) * x.size(0)
+        n += x.size(0)
+    return total_loss / n, total_acc / n
+
+
+def _accumulator_loop(model, batches, optimizer, criterion, device):
+    meter = MetricAccumulator(device)
+    for x, y in batches:
+        optimizer.zero_grad()
+        out = model(x)
+        loss = criterion(out, y)
+        loss.backward()
+        optimizer.step()
+        meter.update(loss, out, y)
+    return meter.compute()
+
+
+def _steps_per_s(loop, steps: int, args, device) -> float:
+    set_seed(args.seed)
+    model = SimpleCNN(in_ch=args.in_ch, conv_channels=args.conv_channels).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3)
+    criterion = nn.CrossEntropyLoss()
+    # Warmup outside the timed region.
+    loop(model, _batches(args.warmup, args.batch_size, args.in_ch, args.size, device), optimizer, criterion)
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    loop(model, _batches(steps, args.batch_size, args.in_ch, args.size, device), optimizer, criterion)
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return steps / (time.perf_counter() - start)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--device", type=str, default="auto")
+    ap.add_argument("--steps", type=int, default=200)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--batch-size", type=int, default=128)
+    ap.add_argument("--in-ch", type=int, default=1)
+    ap.add_argument("--size", type=int, default=28)
+    ap.add_argument("--conv-channels", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=42)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    device = get_device(args.device)
+    before = _steps_per_s(_legacy_loop, args.steps, args, device)
+    after = _steps_per_s(
+        lambda m, b, o, c: _accumulator_loop(m, b, o, c, device), args.steps, args, device
+    )
+    print(f"device={device} batch_size={args.batch_size} steps={args.steps}")
+    print(f"per-batch sync (before): {before:8.1f} steps/s")
+    print(f"accumulator    (after):  {after:8.1f} steps/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
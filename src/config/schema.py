@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
@@ -13,12 +13,63 @@ class PathsConfig(BaseModel):
     checkpoints: str = "checkpoints"
 
 
+class DataConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # "tensor" decodes + normalizes each split once and serves batches from memory;
+    # "mmap" serves uint8 batches straight from the memory-mapped on-disk cache;
+    # "torchvision" keeps the per-sample transform pipeline.
+    mode: str = "tensor"
+    # Versioned .npy cache of decoded splits, shared across runs and processes (None disables it).
+    cache_dir: Optional[str] = "data/cache"
+    verify_cache: bool = False
+
+
+class TrainingConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Steps between host reads of the running loss/accuracy (0 = once per epoch).
+    log_interval: int = 0
+    # Autocast: bf16 on CPU, fp16 (+ GradScaler) on CUDA.
+    amp: bool = False
+    channels_last: bool = False
+    # AdamW implementation: auto (fused on CUDA, foreach on CPU) | default | foreach | fused
+    optimizer_impl: str = "auto"
+    inference_mode: bool = True
+    # Evaluation batch size (None = same as batch_size); no gradients, so it can be larger.
+    eval_batch_size: Optional[int] = None
+    compile: bool = False
+    # Same-shape candidates trained together as one vmapped population (1 = one model at a time).
+    population_size: int = 1
+
+
 class OptunaConfig(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
     n_trials: int = 10
     timeout: Optional[int] = None
     direction: str = "maximize"
+    # Several objectives (accuracy, loss, params, flops, activation_memory, latency, duration, emissions)
+    # turn the search multi-objective: the summary reports the Pareto front instead of one best trial.
+    objectives: List[str] = Field(default_factory=lambda: ["accuracy"])
+    multi_objective_sampler: str = "nsga2"  # nsga2 | motpe
+    # none | median | percentile | successive_halving | hyperband
+    pruner: str = "none"
+    pruner_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    # Intermediate validation report cadence: every N training batches (0 = once per epoch).
+    report_every_n_batches: int = 0
+    # Trial worker processes sharing one study storage (1 = run trials in-process).
+    n_jobs: int = 1
+    # torch intra-op threads per worker (None = cpu_count // n_jobs).
+    threads_per_worker: Optional[int] = None
+    # Ask/tell execution backend: inline | thread | process | batched.
+    backend: str = "inline"
+    # Trials in flight at once (thread/process: pool size; batched: population size).
+    batch_size: int = 1
+    # Sample new trials as if the pending ones had scored badly (TPE), keeping a batch diverse.
+    constant_liar: bool = True
+    # Where trial params come from: tpe (Optuna's sampler) | evolution (see `evolution`; error with n_jobs > 1).
+    sampler: str = "tpe"
 
 
 class SearchSpaceConfig(BaseModel):
@@ -35,6 +86,102 @@ class MemoryConfig(BaseModel):
     records_path: str = "experiments/artifacts/memory/trials.jsonl"
     top_k: int = 5
     embedding_model: str = "handcrafted-v1"
+    # The index is written to disk after this many adds or seconds (and on close/exit).
+    flush_every: int = 64
+    flush_interval_s: float = 30.0
+    # flat | hnsw | ivf; kwargs: hnsw_m, ef_construction, ef_search, nlist, nprobe, ann_min_rows, retrain_growth
+    index_type: str = "flat"
+    index_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ResultCacheConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Serve re-sampled architectures from earlier results instead of retraining them (opt-in).
+    enabled: bool = False
+    repeats: int = 1  # completed measurements required before a config is served from the cache
+    match_seed: bool = False  # only reuse results measured under the same `seed`
+    float_digits: int = 4  # significant digits kept when hashing float params
+    memory_rows: int = 20000  # most recent memory-store rows used to seed the cache
+
+
+class SurrogateConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Pre-rank random candidates with a surrogate trained on memory records; needs memory.enabled.
+    enabled: bool = False
+    candidates: int = 256  # random candidates scored per ranking
+    top_k: int = 4  # best-ranked candidates trained (Optuna: enqueued per search block)
+    kappa: float = 1.0  # optimism: rank by mean + kappa * std
+    min_records: int = 16  # completed records needed before ranking is used
+    n_members: int = 8
+    n_features: int = 128
+    ridge: float = 1.0
+    lengthscale: float = 1.0
+    refit_growth: float = 2.0
+
+
+class ProxiesConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Zero-cost proxies computed on the untrained model before any epoch is spent on it.
+    enabled: bool = False
+    names: List[str] = Field(default_factory=lambda: ["synflow", "grad_norm", "jacob_cov", "naswot"])
+    batches: int = 1  # mini-batches of the training split scored per candidate
+    action: str = "reject"  # reject | deprioritize (train the round's best-ranked share) | record (scores only)
+    reject_quantile: float = 0.5  # reject candidates ranking below this quantile of earlier candidates
+    min_history: int = 8  # candidates scored before rejection starts
+
+
+class OneShotConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Weight-sharing search: train one supernet, score sampled sub-networks with its weights.
+    enabled: bool = False
+    supernet_epochs: Optional[int] = None  # None = epochs
+    lr: Optional[float] = None  # supernet learning rate (None = lr)
+    candidates: int = 1000  # random candidates scored with the supernet
+    eval_batches: int = 20  # test batches per sub-network score (0 = full split)
+    top_k: int = 3  # best sub-networks fine-tuned
+    finetune_epochs: int = 1  # 0 = report the supernet scores only
+
+
+class InheritanceConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Warm-start refine-round candidates from the nearest recently trained parent (agent orchestrator).
+    enabled: bool = False
+    max_entries: int = 16  # parent state dicts kept in CPU memory (LRU)
+    spill_dir: Optional[str] = None  # evicted parents are saved here (per run) instead of dropped
+    max_distance: float = 2.0  # sum of |log2| ratios of the shape params
+    epoch_scale: float = 0.5  # share of each rung's epochs a warm-started trial trains for
+
+
+class EvolutionConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Regularized (aging) evolution, used by optuna.sampler=evolution and agents.refine_sampler=evolution.
+    population_size: int = 32  # members kept; the oldest is replaced
+    sample_size: int = 8  # members per tournament
+    warmup: int = 8  # random candidates until the population has this many members
+
+
+class LatencyConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # Predict each trial's inference latency (latency_ms) from a per-layer lookup table built on this machine.
+    enabled: bool = False
+    lut_dir: Optional[str] = None  # None = <paths.artifacts>/latency
+    batch_size: int = 1  # inference batch size the table (and max_ms) refers to
+    threads: int = 1  # torch threads the table is timed with
+    warmup: int = 10
+    iters: int = 50
+    prebuild_candidates: int = 256  # sampled candidates whose layers are timed before the search
+    max_ms: Optional[float] = None  # reject candidates predicted slower than this before training
+    # Time the best model (and the Pareto front) after the search at these batch sizes and thread counts.
+    benchmark: bool = True
+    benchmark_batch_sizes: List[int] = Field(default_factory=lambda: [1, 32])
+    benchmark_threads: List[int] = Field(default_factory=lambda: [1])
 
 
 class TrackingConfig(BaseModel):
@@ -54,6 +201,17 @@ class AgentsConfig(BaseModel):
     reflection: bool = False
     enabled: bool = True
     max_initial_suggestions: int = 5
+    # Orchestrator multi-fidelity scheduling: successive_halving | none
+    scheduler: str = "successive_halving"
+    min_fidelity_epochs: float = 0.25
+    max_fidelity_epochs: Optional[float] = None  # defaults to `epochs`
+    eta: int = 3
+    epoch_budget: Optional[float] = None  # total epoch-equivalents per run
+    # Trials of a round trained at the same time (worker threads), and a per-training-call timeout.
+    max_concurrent_trials: int = 1
+    trial_timeout_s: Optional[float] = None
+    # Candidates of refine/balanced rounds beyond memory and surrogate picks: default | evolution.
+    refine_sampler: str = "default"
 
 
 class CrewAIConfig(BaseModel):
@@ -80,10 +238,19 @@ class AppConfig(BaseModel):
     lr: float = 0.01
     device: str = "auto"
     orchestrator: str = "native"
+    data: DataConfig = Field(default_factory=DataConfig)
+    training: TrainingConfig = Field(default_factory=TrainingConfig)
     paths: PathsConfig = Field(default_factory=PathsConfig)
     optuna: OptunaConfig = Field(default_factory=OptunaConfig)
     search_space: SearchSpaceConfig = Field(default_factory=SearchSpaceConfig)
     memory: MemoryConfig = Field(default_factory=MemoryConfig)
+    result_cache: ResultCacheConfig = Field(default_factory=ResultCacheConfig)
+    surrogate: SurrogateConfig = Field(default_factory=SurrogateConfig)
+    proxies: ProxiesConfig = Field(default_factory=ProxiesConfig)
+    oneshot: OneShotConfig = Field(default_factory=OneShotConfig)
+    inheritance: InheritanceConfig = Field(default_factory=InheritanceConfig)
+    evolution: EvolutionConfig = Field(default_factory=EvolutionConfig)
+    latency: LatencyConfig = Field(default_factory=LatencyConfig)
     tracking: TrackingConfig = Field(default_factory=TrackingConfig)
     agents: AgentsConfig = Field(default_factory=AgentsConfig)
     crewai: CrewAIConfig = Field(default_factory=CrewAIConfig)
@@ -27,14 +27,21 @@ class TrialRecord(BaseModel):
     search_space: str
     params: Dict[str, Any]
     value: float
+    status: str = "completed"  # completed | pruned | rejected | supernet
+    epochs_completed: Optional[float] = None
+    train_samples: Optional[int] = None
     train_loss: Optional[float] = None
     train_acc: Optional[float] = None
     eval_loss: Optional[float] = None
     eval_acc: Optional[float] = None
     model_params: Optional[int] = None
     flops: Optional[int] = None
+    latency_ms: Optional[float] = None  # predicted inference latency (latency lookup table)
     emissions_kg: Optional[float] = None
     duration_s: Optional[float] = None
+    train_samples_per_s: Optional[float] = None
+    eval_samples_per_s: Optional[float] = None
+    proxy_scores: Optional[Dict[str, float]] = None  # zero-cost proxies of the untrained model
     config_hash: str
     context: Dict[str, Any] = Field(default_factory=dict)
     tags: List[str] = Field(default_factory=list)
@@ -46,5 +53,11 @@ class MemoryStore(Protocol):
     def add(self, record: TrialRecord) -> None:
         ...
 
+    def add_many(self, records: List[TrialRecord]) -> None:
+        ...
+
     def query(self, context: Dict[str, Any], k: int = 5) -> List[TrialRecord]:
         ...
+
+    def query_many(self, contexts: List[Dict[str, Any]], k: int = 5) -> List[List[TrialRecord]]:
+        ...
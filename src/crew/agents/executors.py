@@ -6,26 +6,55 @@ CriticAgent: Identifies errors, generates feedback, and suggests improvements.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
 import torch
 import torch.nn as nn
 from crew.agents.base import BaseNASAgent
 from crew.shared_state.context import SearchContext, TrialState
 from crew.reasoning.patterns import CriticalReflection
 from models.simple_cnn import SimpleCNN
-from utils.metrics import accuracy, count_params, try_flops
+from datasets.loader import BatchLimitedLoader
+from nas.batched import BatchedTrainer
+from nas.engine import TrainingCancelled, TrainingEngine
+from nas.inheritance import ParentWeightCache
+from nas.proxies import ProxyScreen
+from search_spaces.base import SearchSpaceSpec
+from utils.metrics import count_params, try_flops
 from utils.logger import get_logger
 
 
+async def _run_stoppable(fn, stop_event: threading.Event, *args) -> Any:
+    """
+    Runs ``fn(*args)`` in a worker thread. If the awaiting coroutine is cancelled
+    (e.g. a trial timeout), sets ``stop_event`` and waits until the thread has
+    stopped at its next batch before re-raising, so the loaders it was iterating
+    are free again once the cancellation completes.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        stop_event.set()
+        try:
+            await future
+        except Exception:
+            pass  # the trial is abandoned; its result or error no longer matters
+        raise
+
+
 class BuilderAgent(BaseNASAgent):
     """Constructs and validates PyTorch models."""
     
-    def __init__(self):
+    def __init__(self, proxy_screen: Optional[ProxyScreen] = None, weight_cache: Optional[ParentWeightCache] = None):
         super().__init__(
             name="BuilderAgent",
             role="Model Constructor",
             description="Transforms architecture specifications into trainable PyTorch models"
         )
+        self.proxy_screen = proxy_screen
+        self.weight_cache = weight_cache
     
     async def execute(self, context: SearchContext, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -40,7 +69,9 @@ class BuilderAgent(BaseNASAgent):
                     "kernel_size": 3,
                     "dropout": 0.1
                 },
-                "dataset": "MNIST"
+                "dataset": "MNIST",
+                "proxy_loader": train_loader,  (optional; zero-cost proxy screening)
+                "inherit": True  (optional; warm-start from the nearest cached parent)
             }
         """
         trial_id = task.get("trial_id")
@@ -70,7 +101,7 @@ class BuilderAgent(BaseNASAgent):
             
             self.log_reasoning(f"✅ Model valid and trainable: {param_count:,} params")
             
-            return {
+            result = {
                 "status": "success",
                 "trial_id": trial_id,
                 "model": model,
@@ -78,6 +109,22 @@ class BuilderAgent(BaseNASAgent):
                 "message": model_summary,
                 "react_trace": self.react_trace.to_string()
             }
+            
+            # Zero-cost proxies on a mini-batch, off the event loop
+            if self.proxy_screen is not None and task.get("proxy_loader") is not None:
+                verdict = await asyncio.to_thread(self.proxy_screen.screen, model, task["proxy_loader"], device)
+                result.update(proxy_scores=verdict.scores, proxy_quantile=verdict.quantile, rejected=verdict.rejected)
+                if verdict.rejected:
+                    self.log_reasoning(f"⏭ Rejected by zero-cost proxies (quantile {verdict.quantile:.2f})")
+            
+            # Weight inheritance: start from the nearest trained parent instead of random init
+            if self.weight_cache is not None and task.get("inherit") and not result.get("rejected"):
+                parent = self.weight_cache.warm_start(model, architecture)
+                if parent is not None:
+                    result["inherited_from"] = parent
+                    self.log_reasoning(f"🧬 Warm-started from trial {parent['trial_id']} (distance {parent['distance']:g})")
+            
+            return result
         except Exception as e:
             error_msg = f"Failed to build model: {str(e)}"
             self.log_reasoning(f"❌ {error_msg}")
@@ -116,12 +163,14 @@ class BuilderAgent(BaseNASAgent):
 class TrainerAgent(BaseNASAgent):
     """Trains models and collects metrics."""
     
-    def __init__(self):
+    def __init__(self, engine: Optional[TrainingEngine] = None, default_lr: float = 0.01):
         super().__init__(
             name="TrainerAgent",
             role="Model Trainer",
             description="Trains models and collects training/validation metrics"
         )
+        self.engine = engine
+        self.default_lr = float(default_lr)
     
     async def execute(self, context: SearchContext, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -134,18 +183,44 @@ class TrainerAgent(BaseNASAgent):
                 "model": <nn.Module>,
                 "train_loader": <DataLoader>,
                 "val_loader": <DataLoader>,
-                "epochs": 2,
+                "epochs": 2,  (epoch-equivalents; a fractional part trains on that share of the batches)
+                "lr": 0.003,  (optional, defaults to the configured lr)
+                "optimizer": <Optimizer>,  (optional, resumes a partially trained model)
+                "stop_event": <threading.Event>,  (optional, stops training at the next batch once set)
                 "device": "cuda"
             }
+        
+        Population task (same-shape models trained together, see nas.batched):
+            {
+                "type": "train_population",
+                "trial_ids": [3, 4],
+                "models": [<nn.Module>, <nn.Module>],
+                "lrs": [0.003, 0.01],
+                "optimizer_states": [None, None],  (per-member AdamW state from an earlier population)
+                ...same loaders, epochs, stop_event and device as above
+            }
+        Returns {"status": "success", "results": {trial_id: <single-model result>}}; each result
+        carries "optimizer_state" instead of "optimizer".
         """
+        if task.get("type") == "train_population":
+            return await self._execute_population(context, task)
+        
         trial_id = task.get("trial_id")
         model = task.get("model")
         train_loader = task.get("train_loader")
         val_loader = task.get("val_loader")
-        epochs = task.get("epochs", 2)
+        epochs = float(task.get("epochs", 2))
         device = task.get("device", context.device)
+        lr = float(task.get("lr") or self.default_lr)
+        engine = self.engine or TrainingEngine(device)
+        optimizer = task.get("optimizer")
         
-        observation = f"Training model for trial {trial_id} for {epochs} epochs"
+        # Whole epochs plus an optional partial pass over a subset of the batches.
+        segments = [1.0] * int(epochs)
+        if epochs - int(epochs) > 1e-6:
+            segments.append(epochs - int(epochs))
+        
+        observation = f"Training model for trial {trial_id} for {epochs:g} epochs" + (" (resumed)" if optimizer else "")
         self.add_react_step(
             observation=observation,
             reasoning="Execute standard training loop with validation",
@@ -153,29 +228,136 @@ class TrainerAgent(BaseNASAgent):
             confidence=0.9
         )
         
+        # The loop is blocking CPU/GPU work: run it in a worker thread so concurrent trials
+        # keep the event loop free. Cancelling this coroutine (e.g. a trial timeout) sets the
+        # stop event and returns only once the thread has stopped at its next batch.
+        stop_event = task.get("stop_event") or threading.Event()
+        return await _run_stoppable(
+            self._train, stop_event, trial_id, model, optimizer, train_loader, val_loader, segments, lr, engine, stop_event
+        )
+    
+    async def _execute_population(self, context: SearchContext, task: Dict[str, Any]) -> Dict[str, Any]:
+        trial_ids = list(task.get("trial_ids") or [])
+        epochs = float(task.get("epochs", 2))
+        device = task.get("device", context.device)
+        engine = self.engine or TrainingEngine(device)
+        lrs = [float(lr or self.default_lr) for lr in task.get("lrs") or [None] * len(trial_ids)]
+        segments = [1.0] * int(epochs)
+        if epochs - int(epochs) > 1e-6:
+            segments.append(epochs - int(epochs))
+        
+        self.add_react_step(
+            observation=f"Training trials {trial_ids} as one population for {epochs:g} epochs",
+            reasoning="Same-shape models share every data batch in one vectorized pass",
+            action="Train and validate population",
+            confidence=0.9
+        )
+        
+        stop_event = task.get("stop_event") or threading.Event()
+        return await _run_stoppable(
+            self._train_population, stop_event, trial_ids, task.get("models"), lrs, task.get("optimizer_states"),
+            task.get("train_loader"), task.get("val_loader"), segments, engine, stop_event
+        )
+    
+    def _train_population(
+        self,
+        trial_ids: List[int],
+        models: List[nn.Module],
+        lrs: List[float],
+        optimizer_states: Optional[List[Optional[Dict[str, Any]]]],
+        train_loader,
+        val_loader,
+        segments: List[float],
+        engine: TrainingEngine,
+        stop_event: threading.Event
+    ) -> Dict[str, Any]:
+        try:
+            trainer = BatchedTrainer(models, lrs, engine, states=optimizer_states)
+            metrics = [{"train_losses": [], "train_accs": [], "val_losses": [], "val_accs": [], "train_samples_per_s": []} for _ in trial_ids]
+            for epoch, fraction in enumerate(segments):
+                loader = train_loader if fraction >= 1.0 else BatchLimitedLoader(train_loader, fraction)
+                train_epochs = trainer.train_epoch(loader, stop_event=stop_event)
+                val_epochs = trainer.evaluate(val_loader, stop_event=stop_event)
+                for m, train_epoch, val_epoch in zip(metrics, train_epochs, val_epochs):
+                    m["train_losses"].append(train_epoch.loss)
+                    m["train_accs"].append(train_epoch.acc)
+                    m["train_samples_per_s"].append(train_epoch.samples_per_s)
+                    m["val_losses"].append(val_epoch.loss)
+                    m["val_accs"].append(val_epoch.acc)
+                self.logger.info(f"[Trials {trial_ids}] Epoch {epoch+1}/{len(segments)}: "
+                                 f"val_acc={[round(v.acc, 4) for v in val_epochs]}")
+            trained = trainer.write_back()
+            
+            self.log_reasoning(f"✅ Population of {len(trial_ids)} trained")
+            
+            return {
+                "status": "success",
+                "results": {
+                    trial_id: {
+                        "status": "success",
+                        "trial_id": trial_id,
+                        "model": model,
+                        "optimizer_state": trainer.optimizer_state(i),
+                        "epochs_trained": sum(segments),
+                        "metrics": m,
+                        "final_train_acc": m["train_accs"][-1],
+                        "final_val_acc": m["val_accs"][-1],
+                    }
+                    for i, (trial_id, model, m) in enumerate(zip(trial_ids, trained, metrics))
+                },
+                "react_trace": self.react_trace.to_string()
+            }
+        except TrainingCancelled:
+            self.log_reasoning(f"⏹ Training of trials {trial_ids} cancelled")
+            return {"status": "cancelled", "error": "training cancelled", "react_trace": self.react_trace.to_string()}
+        except Exception as e:
+            error_msg = f"Population training failed: {str(e)}"
+            self.log_reasoning(f"❌ {error_msg}")
+            return {"status": "failed", "error": error_msg, "react_trace": self.react_trace.to_string()}
+    
+    def _train(
+        self,
+        trial_id,
+        model: nn.Module,
+        optimizer: Optional[torch.optim.Optimizer],
+        train_loader,
+        val_loader,
+        segments: List[float],
+        lr: float,
+        engine: TrainingEngine,
+        stop_event: threading.Event
+    ) -> Dict[str, Any]:
+        epochs = sum(segments)
         try:
-            optimizer = torch.optim.AdamW(model.parameters(), lr=0.01)
+            model = engine.prepare(model)
+            if optimizer is None:
+                optimizer = engine.make_optimizer(model, lr=lr)
             criterion = nn.CrossEntropyLoss()
             
             metrics = {
                 "train_losses": [],
                 "train_accs": [],
                 "val_losses": [],
-                "val_accs": []
+                "val_accs": [],
+                "train_samples_per_s": []
             }
             
-            for epoch in range(epochs):
+            for epoch, fraction in enumerate(segments):
                 # Train
-                train_loss, train_acc = self._train_epoch(model, train_loader, device, optimizer, criterion)
-                metrics["train_losses"].append(train_loss)
+                loader = train_loader if fraction >= 1.0 else BatchLimitedLoader(train_loader, fraction)
+                train_epoch = engine.train_epoch(model, loader, optimizer, criterion, on_log=self._log_progress, stop_event=stop_event)
+                train_acc = train_epoch.acc
+                metrics["train_losses"].append(train_epoch.loss)
                 metrics["train_accs"].append(train_acc)
+                metrics["train_samples_per_s"].append(train_epoch.samples_per_s)
                 
                 # Validate
-                val_loss, val_acc = self._validate_epoch(model, val_loader, device, criterion)
-                metrics["val_losses"].append(val_loss)
+                val_epoch = engine.evaluate(model, val_loader, criterion, stop_event=stop_event)
+                val_acc = val_epoch.acc
+                metrics["val_losses"].append(val_epoch.loss)
                 metrics["val_accs"].append(val_acc)
                 
-                self.logger.info(f"[Trial {trial_id}] Epoch {epoch+1}/{epochs}: "
+                self.logger.info(f"[Trial {trial_id}] Epoch {epoch+1}/{len(segments)}: "
                                  f"train_acc={train_acc:.4f}, val_acc={val_acc:.4f}")
             
             final_train_acc = metrics["train_accs"][-1]
@@ -187,11 +369,21 @@ class TrainerAgent(BaseNASAgent):
                 "status": "success",
                 "trial_id": trial_id,
                 "model": model,
+                "optimizer": optimizer,
+                "epochs_trained": epochs,
                 "metrics": metrics,
                 "final_train_acc": final_train_acc,
                 "final_val_acc": final_val_acc,
                 "react_trace": self.react_trace.to_string()
             }
+        except TrainingCancelled:
+            self.log_reasoning(f"⏹ Training of trial {trial_id} cancelled")
+            return {
+                "status": "cancelled",
+                "trial_id": trial_id,
+                "error": "training cancelled",
+                "react_trace": self.react_trace.to_string()
+            }
         except Exception as e:
             error_msg = f"Training failed: {str(e)}"
             self.log_reasoning(f"❌ {error_msg}")
@@ -202,46 +394,20 @@ class TrainerAgent(BaseNASAgent):
                 "react_trace": self.react_trace.to_string()
             }
     
-    def _train_epoch(self, model, loader, device, optimizer, criterion) -> tuple:
-        """Trains one epoch."""
-        model.train()
-        total_loss, total_acc, n = 0.0, 0.0, 0
-        for x, y in loader:
-            x, y = x.to(device), y.to(device)
-            optimizer.zero_grad()
-            out = model(x)
-            loss = criterion(out, y)
-            loss.backward()
-            optimizer.step()
-            total_loss += loss.item() * x.size(0)
-            total_acc += accuracy(out.detach(), y) * x.size(0)
-            n += x.size(0)
-        return total_loss / n, total_acc / n
-    
-    def _validate_epoch(self, model, loader, device, criterion) -> tuple:
-        """Validates one epoch."""
-        model.eval()
-        total_loss, total_acc, n = 0.0, 0.0, 0
-        with torch.no_grad():
-            for x, y in loader:
-                x, y = x.to(device), y.to(device)
-                out = model(x)
-                loss = criterion(out, y)
-                total_loss += loss.item() * x.size(0)
-                total_acc += accuracy(out, y) * x.size(0)
-                n += x.size(0)
-        return total_loss / n, total_acc / n
+    def _log_progress(self, step: int, loss: float, acc: float) -> None:
+        self.logger.info(f"[{self.name}] step {step}: train_loss={loss:.4f}, train_acc={acc:.4f}")
 
 
 class EvaluatorAgent(BaseNASAgent):
     """Evaluates models and calculates final scores."""
     
-    def __init__(self):
+    def __init__(self, search_space: Optional[SearchSpaceSpec] = None):
         super().__init__(
             name="EvaluatorAgent",
             role="Performance Evaluator",
             description="Calculates final scores combining accuracy and efficiency metrics"
         )
+        self.search_space = search_space
     
     async def execute(self, context: SearchContext, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -252,6 +418,7 @@ class EvaluatorAgent(BaseNASAgent):
                 "type": "evaluate",
                 "trial_id": 1,
                 "model": <nn.Module>,
+                "architecture": {...},  (optional, enables the search space's analytical cost model)
                 "val_acc": 0.95,
                 "metrics": {...},
                 "dataset": "MNIST"
@@ -262,13 +429,20 @@ class EvaluatorAgent(BaseNASAgent):
         val_acc = task.get("val_acc", 0.0)
         metrics = task.get("metrics", {})
         dataset = task.get("dataset", "MNIST")
+        architecture = task.get("architecture")
         
         observation = f"Evaluating trial {trial_id}: val_acc={val_acc:.4f}"
         
         try:
-            # Collect efficiency metrics
-            param_count = count_params(model)
-            flops = try_flops(model, input_size=(1, 1 if dataset in ["MNIST", "FASHIONMNIST"] else 3, 28 if dataset == "MNIST" else 32, 28 if dataset == "MNIST" else 32))
+            # Collect efficiency metrics (closed form from the architecture when the search space has a cost model)
+            grayscale = dataset in ["MNIST", "FASHIONMNIST"]
+            dataset_meta = {"in_ch": 1 if grayscale else 3, "size": 28 if grayscale else 32, "num_classes": 10}
+            if self.search_space is not None and architecture is not None:
+                cost = self.search_space.cost_model(architecture, dataset_meta)
+                param_count, flops = cost.params, cost.flops
+            else:
+                param_count = count_params(model)
+                flops = try_flops(model, input_size=(1, dataset_meta["in_ch"], dataset_meta["size"], dataset_meta["size"]))
             
             # Combined score: 70% accuracy, 30% efficiency (parameters)
             efficiency_score = 1.0 / (1.0 + param_count / 100000.0)  # Penalize large models
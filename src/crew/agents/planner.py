@@ -4,10 +4,14 @@ Uses ReAct and Plan-and-Execute reasoning to structure decisions.
 """
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from contracts import MemoryStore, TrialRecord
 from crew.agents.base import BaseNASAgent
 from crew.shared_state.context import SearchContext, RoundState
 from crew.reasoning.patterns import Thought, ThoughtType
+from crew.scheduler import Bracket, max_halvings, plan_bracket
 
 
 class PlannerAgent(BaseNASAgent):
@@ -29,7 +33,10 @@ class PlannerAgent(BaseNASAgent):
                 "type": "plan_round",
                 "current_round": 0,
                 "trials_budget_remaining": 10,
-                "global_best_score": 0.95  (or None)
+                "global_best_score": 0.95  (or None),
+                "scheduler": {"name": "successive_halving", "min_fidelity": 0.25,
+                              "max_fidelity": 2.0, "eta": 3},  (optional)
+                "refine_sampler": "default" or "evolution"  (optional)
             }
         """
         task_type = task.get("type", "plan_round")
@@ -54,9 +61,12 @@ class PlannerAgent(BaseNASAgent):
         # Decide strategy
         strategy = self._select_strategy(current_round, remaining_budget, global_best)
         planned_trials = self._allocate_trials(strategy, remaining_budget, context)
+        bracket = self._plan_bracket(strategy, planned_trials, task.get("scheduler") or {}, context)
+        planned_trials = bracket.n_candidates
+        sampler = self._select_sampler(strategy, task.get("refine_sampler") or "default")
         
         # Create detailed plan
-        plan_steps = self._create_plan_steps(strategy, planned_trials, context)
+        plan_steps = self._create_plan_steps(strategy, planned_trials, context, bracket, sampler)
         plan = self.plan_execution(
             goal=f"Execute {strategy} strategy with {planned_trials} trials in round {current_round}",
             steps=plan_steps,
@@ -67,16 +77,20 @@ class PlannerAgent(BaseNASAgent):
         round_state = RoundState(
             round_id=current_round,
             strategy=strategy,
-            planned_trials=planned_trials
+            planned_trials=planned_trials,
+            bracket=bracket.to_dict()
         )
         context.rounds[current_round] = round_state
         
-        self.log_reasoning(f"Planned {strategy} strategy: {planned_trials} trials")
+        rung_desc = " -> ".join(f"{r.n_candidates}@{r.budget:g}ep" for r in bracket.rungs)
+        self.log_reasoning(f"Planned {strategy} strategy: {planned_trials} trials, bracket {rung_desc}")
         
         return {
             "round_id": current_round,
             "strategy": strategy,
             "planned_trials": planned_trials,
+            "bracket": bracket,
+            "sampler": sampler,
             "plan_steps": plan_steps,
             "react_trace": self.react_trace.to_string()
         }
@@ -109,6 +123,12 @@ class PlannerAgent(BaseNASAgent):
         
         return "balanced"
     
+    def _select_sampler(self, strategy: str, refine_sampler: str) -> str:
+        """Exploration rounds keep the default candidates; refine and balanced rounds may evolve them."""
+        if strategy != "explore" and str(refine_sampler).lower() == "evolution":
+            return "evolution"
+        return "default"
+    
     def _allocate_trials(self, strategy: str, remaining: int, context: SearchContext) -> int:
         """Allocates number of trials based on strategy."""
         if strategy == "explore":
@@ -120,13 +140,43 @@ class PlannerAgent(BaseNASAgent):
         else:  # balanced
             return min(remaining, max(3, remaining // 3))
     
-    def _create_plan_steps(self, strategy: str, num_trials: int, context: SearchContext) -> list:
+    def _plan_bracket(self, strategy: str, num_trials: int, scheduler: Dict[str, Any], context: SearchContext) -> Bracket:
+        """
+        Plans a successive-halving bracket for the round.
+        Explore starts many candidates at the cheapest fidelity, refine trains few candidates
+        close to full fidelity, balanced sits in between (Hyperband's bracket trade-off).
+        """
+        max_fidelity = float(scheduler.get("max_fidelity") or 2.0)
+        if str(scheduler.get("name", "successive_halving")).lower() == "none":
+            return plan_bracket(num_trials, max_fidelity, max_fidelity, halvings=0)
+        
+        min_fidelity = float(scheduler.get("min_fidelity") or max_fidelity)
+        eta = int(scheduler.get("eta") or 3)
+        s_max = max_halvings(min_fidelity, max_fidelity, eta)
+        halvings = {"explore": s_max, "balanced": max(0, s_max - 1)}.get(strategy, min(1, s_max))
+        bracket = plan_bracket(num_trials, min_fidelity, max_fidelity, eta=eta, halvings=halvings)
+        
+        # Shrink the bracket until it fits the remaining epoch budget.
+        if context.epoch_budget is not None:
+            remaining_epochs = max(0.0, context.epoch_budget - context.epochs_used)
+            n = num_trials
+            while n > 1 and bracket.epoch_cost() > remaining_epochs:
+                n -= 1
+                bracket = plan_bracket(n, min_fidelity, max_fidelity, eta=eta, halvings=halvings)
+        return bracket
+    
+    def _create_plan_steps(self, strategy: str, num_trials: int, context: SearchContext, bracket: Bracket | None = None, sampler: str = "default") -> list:
         """Creates detailed plan steps."""
+        if bracket is not None and len(bracket.rungs) > 1:
+            rungs = ", ".join(f"{r.n_candidates} at {r.budget:g} epochs" for r in bracket.rungs)
+            train_step = f"4. Successive halving ({rungs}); promote top 1/{bracket.eta} per rung"
+        else:
+            train_step = f"4. Train each model"
         steps = [
             f"1. Query memory for {strategy} configurations",
             f"2. Generate {num_trials} candidate architectures",
             f"3. Build and validate models",
-            f"4. Train each model",
+            train_step,
             f"5. Evaluate and rank results",
             f"6. Collect critic feedback",
             f"7. Update global best"
@@ -134,23 +184,44 @@ class PlannerAgent(BaseNASAgent):
         if strategy == "refine":
             steps.insert(2, f"   a. Focus on neighborhood of best configuration")
             steps.insert(3, f"   b. Use small hyperparameter variations")
+        if sampler == "evolution":
+            label = "c" if strategy == "refine" else "a"
+            steps.insert(steps.index("3. Build and validate models"), f"   {label}. Fill remaining slots with mutated tournament winners (regularized evolution)")
         
         return steps
 
 
 class MemoryAgent(BaseNASAgent):
-    """Memory agent: searches for similar configurations in FAISS."""
+    """
+    Memory agent: searches for similar configurations in FAISS.
     
-    def __init__(self):
+    Queries run in a worker thread so the event loop keeps serving concurrent trials.
+    Raw query results are cached per (dataset, strategy, best architecture) for the
+    lifetime of the agent, i.e. one run; architectures already tried in the run are
+    filtered out on every read, and finished trials are written back one round at a time.
+    """
+    
+    def __init__(
+        self,
+        memory_store: Optional[MemoryStore] = None,
+        query_context: Optional[Dict[str, Any]] = None,
+        config_hash: str = ""
+    ):
         super().__init__(
             name="MemoryAgent",
             role="Memory & Experience Retrieval",
             description="Retrieves similar past trials from FAISS memory to guide exploration"
         )
+        self.memory_store = memory_store
+        self.query_context = dict(query_context or {})  # in_ch, size, batch_size, epochs of the run
+        self.config_hash = config_hash
+        self._cache: Dict[Tuple[str, str, str], Tuple[int, list]] = {}  # key -> (k fetched, raw records)
+        self.cache_hits = 0
+        self.stored = 0
     
     async def execute(self, context: SearchContext, task: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Searches for similar trials in FAISS.
+        Searches for similar trials in FAISS, or writes a round's trials back.
         
         Expected task:
             {
@@ -158,9 +229,16 @@ class MemoryAgent(BaseNASAgent):
                 "strategy": "explore" or "refine",
                 "num_suggestions": 5
             }
+            or
+            {
+                "type": "store_trials",
+                "round_id": 0
+            }
         """
         task_type = task.get("type", "query_memory")
         
+        if task_type == "store_trials":
+            return await self._store_round(context, int(task.get("round_id", context.current_round)))
         if task_type != "query_memory":
             return {"error": "Unknown task type"}
         
@@ -183,10 +261,10 @@ class MemoryAgent(BaseNASAgent):
             confidence=0.9
         )
         
-        # Simulation: search in FAISS (will be integrated with FaissMemoryStore)
-        hits = self._query_faiss(context, strategy, num_suggestions)
+        hits, from_cache = await self._query_memory(context, strategy, num_suggestions)
+        context.memory_hits = list(hits)
         
-        self.log_reasoning(f"Retrieved {len(hits)} similar configurations from memory")
+        self.log_reasoning(f"Retrieved {len(hits)} similar configurations from memory" + (" (cached)" if from_cache else ""))
         
         return {
             "memory_hits": hits,
@@ -195,10 +273,92 @@ class MemoryAgent(BaseNASAgent):
             "react_trace": self.react_trace.to_string()
         }
     
+    async def _query_memory(self, context: SearchContext, strategy: str, k: int) -> Tuple[list, bool]:
+        """Hits for the round and whether the raw records came from the cache."""
+        if self.memory_store is None:
+            return (context.memory_hits[:k] if context.memory_hits else []), False
+        if k <= 0:
+            return [], False
+        
+        # Over-fetch: neighbours often repeat an architecture with a different seed or budget.
+        fetch = 4 * k
+        key = (context.dataset, strategy, json.dumps(context.global_best_architecture, sort_keys=True, default=str))
+        cached = self._cache.get(key)
+        from_cache = cached is not None and cached[0] >= fetch
+        if from_cache:
+            self.cache_hits += 1
+            records = cached[1]
+        else:
+            records = await asyncio.to_thread(self._query_faiss, context, strategy, fetch)
+            self._cache[key] = (fetch, records)
+        return self._untried_hits(context, records, k), from_cache
+    
     def _query_faiss(self, context: SearchContext, strategy: str, k: int) -> list:
         """
-        Searches in FAISS.
-        Will be integrated with real FaissMemoryStore.
+        Searches the FAISS store around the run's context. Refinement queries around
+        the global best architecture; exploration leaves the architecture open.
         """
-        # For now, simulate empty return or mock
-        return context.memory_hits[:k] if context.memory_hits else []
+        params = dict(context.global_best_architecture or {}) if strategy != "explore" else {}
+        query = dict(self.query_context, dataset=context.dataset, search_space=context.search_space, params=params)
+        return self.memory_store.query(query, k=k)
+    
+    def _untried_hits(self, context: SearchContext, records: list, k: int) -> List[Dict[str, Any]]:
+        """The first ``k`` distinct records whose architecture has not been tried in this run yet."""
+        tried = {
+            json.dumps(trial.architecture, sort_keys=True, default=str)
+            for round_state in context.rounds.values()
+            for trial in round_state.trials.values()
+        }
+        
+        hits: List[Dict[str, Any]] = []
+        for record in records:
+            signature = json.dumps(record.params, sort_keys=True, default=str)
+            if signature in tried:
+                continue
+            tried.add(signature)
+            hits.append({
+                "architecture": dict(record.params),
+                "score": record.value,
+                "run_id": record.run_id,
+                "trial_number": record.trial_number,
+            })
+            if len(hits) >= k:
+                break
+        return hits
+    
+    async def _store_round(self, context: SearchContext, round_id: int) -> Dict[str, Any]:
+        """Writes the round's scored trials to the store in one batch."""
+        round_state = context.rounds.get(round_id)
+        if self.memory_store is None or round_state is None:
+            return {"stored": 0}
+        
+        records = [self._to_record(context, trial) for trial in round_state.trials.values() if trial.status in ("completed", "stopped")]
+        if records:
+            await asyncio.to_thread(self.memory_store.add_many, records)
+            self.stored += len(records)
+        self.log_reasoning(f"Stored {len(records)} round-{round_id} trials in memory")
+        return {"stored": len(records)}
+    
+    def _to_record(self, context: SearchContext, trial) -> TrialRecord:
+        metrics = trial.metrics
+        flops = metrics.get("flops")
+        return TrialRecord(
+            run_id=context.run_id,
+            trial_number=int(trial.trial_id),
+            dataset=str(context.dataset),
+            device=str(context.device),
+            search_space=context.search_space,
+            params=dict(trial.architecture),
+            value=float(metrics.get("val_acc") or 0.0),
+            status="completed" if trial.status == "completed" else "pruned",
+            epochs_completed=float(trial.fidelity_epochs),
+            train_acc=metrics.get("train_acc"),
+            eval_acc=metrics.get("val_acc"),
+            model_params=int(metrics["param_count"]) if metrics.get("param_count") else None,
+            flops=int(flops) if flops and flops > 0 else None,
+            train_samples_per_s=metrics.get("train_samples_per_s"),
+            proxy_scores=trial.proxy_scores,
+            config_hash=self.config_hash,
+            context=dict(self.query_context),
+            tags=["agents", context.search_space, trial.status] + (["inherited"] if trial.inherited_from is not None else []),
+        )
@@ -27,14 +27,24 @@ from crew.shared_state import (
     TrialState,
 )
 from crew.runtime import set_runtime
-from datasets.loader import get_loaders
-from search_spaces import get_search_space
+from crew.scheduler import Rung, select_promotions
+from datasets.loader import fork_loader
+from nas.batched import group_by_shape
+from nas.engine import TrainingEngine
+from nas.evolution import RegularizedEvolution
+from nas.inheritance import ParentWeightCache
+from nas.proxies import ProxyScreen
+from nas.session import SearchSession, search_session
+from nas.surrogate import SurrogateRanker, get_surrogate, sample_candidates
 from tracking.io import append_jsonl, persist_summary, append_emissions_record, summarize_emissions, write_json
 from utils.logger import get_logger
 from utils.env import set_seed, get_device
 
 logger = get_logger(__name__)
 
+# Offspring asked per open slot when the surrogate picks among them (evolution rounds).
+_EVOLUTION_BROOD = 4
+
 # Config the Crew runtime to use the same logger and disable any internal logging if needed
 def _configure_environment(cfg: Dict[str, Any]) -> None:
     artifacts_dir = Path((cfg.get("paths") or {}).get("artifacts", "experiments/artifacts"))
@@ -59,6 +69,27 @@ def _get_int(cfg: Dict[str, Any], *keys: str, default: int) -> int:
                 pass
     return default
 
+# Successive-halving settings for the planner; the top fidelity defaults to the configured epochs
+def _scheduler_cfg(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    agents_cfg = cfg.get("agents") or {}
+    max_fidelity = agents_cfg.get("max_fidelity_epochs") or cfg.get("epochs", 2)
+    return {
+        "name": agents_cfg.get("scheduler", "successive_halving"),
+        "min_fidelity": agents_cfg.get("min_fidelity_epochs", 0.25),
+        "max_fidelity": float(max_fidelity),
+        "eta": agents_cfg.get("eta", 3),
+    }
+
+# Concurrency settings for training trials inside a round
+def _concurrency_cfg(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    agents_cfg = cfg.get("agents") or {}
+    timeout = agents_cfg.get("trial_timeout_s")
+    return {
+        "max_concurrent": max(1, int(agents_cfg.get("max_concurrent_trials", 1))),
+        "timeout": float(timeout) if timeout else None,
+        "population_size": max(1, int((cfg.get("training") or {}).get("population_size", 1) or 1)),
+    }
+
 # Ensures that the results directory exists and returns its Path object
 def _ensure_results_dir(cfg: Dict[str, Any]) -> Path:
     tracking = cfg.get("tracking") or {}
@@ -71,6 +102,123 @@ def _ensure_results_dir(cfg: Dict[str, Any]) -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+# Scores a trained candidate and records it in the context. Only candidates that reach the
+# final rung ("final") are critiqued and can become the global best; the rest are "stopped".
+async def _finalize_trial(
+    context: SearchContext,
+    round_id: int,
+    trial_id: int,
+    cand: Dict[str, Any],
+    evaluator: EvaluatorAgent,
+    critic: CriticAgent,
+    results_dir: Path,
+    final: bool,
+    context_lock: asyncio.Lock
+) -> None:
+    train_result = cand["train_result"] or {}
+    final_val_acc = train_result.get("final_val_acc", 0.0)
+    architecture = cand["architecture"]
+    
+    # EvaluatorAgent
+    eval_result = await evaluator.execute(context, {
+        "type": "evaluate",
+        "trial_id": trial_id,
+        "model": cand["model"],
+        "architecture": architecture,
+        "val_acc": final_val_acc,
+        "metrics": train_result.get("metrics", {}),
+        "dataset": context.dataset
+    })
+    
+    if eval_result.get("status") != "success":
+        logger.warning(f"      Evaluation failed")
+        return
+    
+    combined_score = eval_result.get("combined_score", 0.0)
+    param_count = eval_result.get("param_count", 0)
+    
+    if final:
+        # CriticAgent: analyses and provides feedback
+        critic_result = await critic.execute(context, {
+            "type": "critique",
+            "trial_id": trial_id,
+            "metrics": train_result.get("metrics", {}),
+            "score": combined_score,
+            "param_count": param_count
+        })
+        
+        concerns = critic_result.get("concerns", [])
+        improvements = critic_result.get("improvements", [])
+        
+        # Log resultado
+        logger.info(f"      ✅ Trial {trial_id} Score: {combined_score:.4f} | Params: {param_count:,}")
+        if concerns:
+            for c in concerns[:2]:
+                logger.warning(f"        {c}")
+        if improvements:
+            logger.info(f"        Suggestion: {improvements[0]}")
+    else:
+        logger.info(f"      ⏹ Trial {trial_id} stopped at rung {cand['rung']} ({cand['trained']:g} epochs): score={combined_score:.4f}")
+    
+    # Updates the context (one merge at a time; concurrent trials finish in any order)
+    trial_state = TrialState(
+        trial_id=trial_id,
+        architecture=architecture,
+        metrics={
+            "train_acc": train_result.get("final_train_acc"),
+            "val_acc": final_val_acc,
+            "combined_score": combined_score,
+            "param_count": param_count,
+            "flops": eval_result.get("flops", -1),
+            "train_samples_per_s": (train_result.get("metrics", {}).get("train_samples_per_s") or [None])[-1]
+        },
+        status="completed" if final else "stopped",
+        rung=int(cand["rung"]),
+        fidelity_epochs=float(cand["trained"]),
+        proxy_scores=cand.get("proxy_scores"),
+        inherited_from=cand.get("inherited_from")
+    )
+    
+    async with context_lock:
+        context.add_trial(round_id, trial_state)
+        context.total_trials_done += 1
+        
+        # Save emissions record to run-specific CSV
+        append_emissions_record(
+            run_dir=results_dir,
+            trial_id=f"trial_{trial_id}",
+            emissions_kg=eval_result.get("emissions_kg"),  # Will be None for now
+            accuracy=final_val_acc,
+            params_M=param_count / 1_000_000.0 if param_count else None,
+            flops_B=eval_result.get("flops", -1) / 1_000_000_000.0 if eval_result.get("flops", -1) > 0 else None
+        )
+        
+        # Update global best (full-fidelity results only)
+        if final and combined_score > (context.global_best_score or 0):
+            context.update_best(trial_id, combined_score, architecture)
+            logger.info(f"      🌟 NEW BEST FOUND!")
+
+# Records a trial that timed out or failed mid-training; the rest of the round continues
+async def _record_failed_trial(
+    context: SearchContext,
+    round_id: int,
+    trial_id: int,
+    cand: Dict[str, Any],
+    error: str,
+    context_lock: asyncio.Lock
+) -> None:
+    async with context_lock:
+        context.add_trial(round_id, TrialState(
+            trial_id=trial_id,
+            architecture=cand["architecture"],
+            status="failed",
+            errors=[error],
+            rung=int(cand["rung"]),
+            fidelity_epochs=float(cand["trained"]),
+            inherited_from=cand.get("inherited_from")
+        ))
+        context.total_trials_done += 1
+
 # Main pipeline function that executes all agents for one round
 async def _run_nas_agents_pipeline(
     context: SearchContext,
@@ -78,16 +226,23 @@ async def _run_nas_agents_pipeline(
     test_loader,
     search_space,
     device: str,
-    results_dir: Path
+    results_dir: Path,
+    cfg: Optional[Dict[str, Any]] = None,
+    memory_agent: Optional[MemoryAgent] = None,
+    surrogate: Optional[SurrogateRanker] = None,
+    proxy_screen: Optional[ProxyScreen] = None,
+    weight_cache: Optional[ParentWeightCache] = None,
+    evolution: Optional[RegularizedEvolution] = None
 ) -> Dict[str, Any]:
     """
     Implements: ReAct, Plan-and-Execute, self-reflection.
     """
     planner = PlannerAgent()
-    memory_agent = MemoryAgent()
-    builder = BuilderAgent()
-    trainer = TrainerAgent()
-    evaluator = EvaluatorAgent()
+    memory_agent = memory_agent or MemoryAgent()
+    builder = BuilderAgent(proxy_screen=proxy_screen, weight_cache=weight_cache)
+    cfg = cfg or {}
+    trainer = TrainerAgent(engine=TrainingEngine.from_cfg(cfg, device), default_lr=float(cfg.get("lr", 0.01)))
+    evaluator = EvaluatorAgent(search_space=search_space)
     critic = CriticAgent()
     
     round_id = context.current_round
@@ -103,7 +258,9 @@ async def _run_nas_agents_pipeline(
         "type": "plan_round",
         "current_round": round_id,
         "trials_budget_remaining": remaining_budget,
-        "global_best_score": context.global_best_score
+        "global_best_score": context.global_best_score,
+        "scheduler": _scheduler_cfg(cfg),
+        "refine_sampler": "evolution" if evolution is not None else "default"
     })
     
     strategy = plan_result.get("strategy")
@@ -122,14 +279,48 @@ async def _run_nas_agents_pipeline(
     logger.info(f"  Retrieved {len(memory_hits)} similar configs from memory")
     
     # 3. Build e train trials
-    logger.info(f"\n[Round {round_id}] 🔨 BUILD-TRAIN-EVALUATE-CRITIQUE PHASE ({planned_trials} trials)")
+    bracket = plan_result.get("bracket")
+    rungs = bracket.rungs if bracket else [Rung(index=0, budget=float(cfg.get("epochs", 2)), n_candidates=planned_trials)]
+    logger.info(f"\n[Round {round_id}] 🔨 BUILD-TRAIN-EVALUATE-CRITIQUE PHASE ({planned_trials} trials, {len(rungs)} rungs)")
     
+    # Slots not covered by memory hits: evolution rounds take offspring of the aging population,
+    # other rounds the surrogate's top-ranked random candidates.
+    ranked: List[Dict[str, Any]] = []
+    evolved: List[Dict[str, Any]] = []
+    n_fill = planned_trials - len(memory_hits)
+    surrogate_ready = surrogate is not None and surrogate.ready and n_fill > 0
+    # Configurations already in memory, trained this run or about to come from memory hits are not re-proposed.
+    tried = [t.architecture for r in context.rounds.values() for t in r.trials.values()] + [h.get("architecture", {}) for h in memory_hits]
+    if evolution is not None and plan_result.get("sampler") == "evolution" and n_fill > 0:
+        # A ready surrogate only chooses among the offspring: evolution asks for a larger brood, the best-ranked fill the slots.
+        offspring = evolution.ask(_EVOLUTION_BROOD * n_fill if surrogate_ready else n_fill)
+        if surrogate_ready:
+            for params, mean, std in surrogate.rank(surrogate.untried(offspring, tried), memory_agent.query_context, n_fill):
+                logger.info(f"  Surrogate-ranked offspring {params}: predicted {mean:.4f} ± {std:.4f}")
+                evolved.append(params)
+        else:
+            evolved = offspring
+        logger.info(f"  Evolution proposed {len(offspring)} offspring, {len(evolved)} kept (population {len(evolution)})")
+    elif surrogate_ready:
+        surrogate_cfg = cfg.get("surrogate") or {}
+        pool = sample_candidates(search_space, int(surrogate_cfg.get("candidates", 256)), seed=int(cfg.get("seed", 0)) + round_id)
+        for params, mean, std in surrogate.rank(surrogate.untried(pool, tried), memory_agent.query_context, n_fill):
+            logger.info(f"  Surrogate candidate {params}: predicted {mean:.4f} ± {std:.4f}")
+            ranked.append(params)
+    
+    # Candidate state survives between rungs so promoted trials resume instead of retraining.
+    candidates: Dict[int, Dict[str, Any]] = {}
+    rejected: List[int] = []
     for trial_idx in range(planned_trials):
         trial_id = context.total_trials_done + trial_idx + 1
         
-        # Sample architecture (use memory_hits if available)
+        # Sample architecture (use memory_hits if available, then surrogate picks)
         if memory_hits and trial_idx < len(memory_hits):
             architecture = memory_hits[trial_idx].get("architecture", {})
+        elif trial_idx - len(memory_hits) < len(ranked):
+            architecture = dict(ranked[trial_idx - len(memory_hits)])
+        elif trial_idx - len(memory_hits) - len(ranked) < len(evolved):
+            architecture = evolved[trial_idx - len(memory_hits) - len(ranked)]
         else:
             # Random generates
             architecture = {
@@ -146,100 +337,208 @@ async def _run_nas_agents_pipeline(
             "trial_id": trial_id,
             "architecture": architecture,
             "dataset": context.dataset,
-            "device": device
+            "device": device,
+            "proxy_loader": train_loader,
+            "inherit": strategy != "explore"
         })
         
         if build_result.get("status") != "success":
             logger.warning(f"      Build failed: {build_result.get('error')}")
             continue
         
-        model = build_result.get("model")
-        
-        # TrainerAgent
-        train_result = await trainer.execute(context, {
-            "type": "train_model",
-            "trial_id": trial_id,
-            "model": model,
-            "train_loader": train_loader,
-            "val_loader": test_loader,  # Usar test como val para simplificar
-            "epochs": 2,
-            "device": device
-        })
-        
-        if train_result.get("status") != "success":
-            logger.warning(f"      Training failed: {train_result.get('error')}")
-            continue
-        
-        final_val_acc = train_result.get("final_val_acc", 0.0)
+        if build_result.get("rejected"):
+            logger.info(f"      ⏭ Rejected by zero-cost proxies (quantile {build_result['proxy_quantile']:.2f})")
+            rejected.append(trial_id)
         
-        # EvaluatorAgent
-        eval_result = await evaluator.execute(context, {
-            "type": "evaluate",
-            "trial_id": trial_id,
-            "model": model,
-            "val_acc": final_val_acc,
-            "metrics": train_result.get("metrics", {}),
-            "dataset": context.dataset
-        })
+        # Warm-started children already sit near their parent's accuracy: train them for a fraction of each rung
+        parent = build_result.get("inherited_from")
+        if parent is not None:
+            logger.info(f"      🧬 Inherits weights from trial {parent['trial_id']} (distance {parent['distance']:g}, parent score {parent['parent_score']:.4f})")
         
-        if eval_result.get("status") != "success":
-            logger.warning(f"      Evaluation failed")
-            continue
+        candidates[trial_id] = {
+            "architecture": architecture,
+            "model": build_result.get("model"),
+            "optimizer": None,
+            "optimizer_state": None,
+            "trained": 0.0,
+            "rung": 0,
+            "train_result": None,
+            "proxy_scores": build_result.get("proxy_scores"),
+            "proxy_quantile": build_result.get("proxy_quantile"),
+            "inherited_from": parent["trial_id"] if parent is not None else None,
+            "budget_scale": weight_cache.epoch_scale if parent is not None else 1.0,
+        }
+    
+    # The proxy screen picks the candidates to train (never none of them); the others
+    # count as rejected trials of the round but are never trained.
+    if proxy_screen is not None:
+        screened = len(candidates)
+        kept = proxy_screen.keep({t: cand["proxy_quantile"] for t, cand in candidates.items()}, rejected)
+        for trial_id in [t for t in kept if t in rejected]:
+            logger.info(f"  Trial {trial_id} kept despite its rejection: best-ranked candidate of the round")
+        for trial_id in [t for t in candidates if t not in kept]:
+            cand = candidates.pop(trial_id)
+            context.add_trial(round_id, TrialState(
+                trial_id=trial_id,
+                architecture=cand["architecture"],
+                status="rejected",
+                proxy_scores=cand["proxy_scores"]
+            ))
+            context.total_trials_done += 1
+        if proxy_screen.action == "deprioritize":
+            logger.info(f"  Zero-cost proxies kept {len(candidates)} of {screened} candidates")
+    
+    # Trials of a rung train concurrently, at most `agents.max_concurrent_trials` at a time.
+    # Each slot owns a pair of loaders that can be iterated alongside the others.
+    concurrency = _concurrency_cfg(cfg)
+    context_lock = asyncio.Lock()
+    slots: asyncio.Queue = asyncio.Queue()
+    for slot in range(concurrency["max_concurrent"]):
+        if slot == 0:
+            slots.put_nowait((train_loader, test_loader))
+        else:
+            slots.put_nowait((fork_loader(train_loader), fork_loader(test_loader)))
+    
+    async def train_candidate(trial_id: int, rung: Rung) -> Optional[float]:
+        cand = candidates[trial_id]
+        budget = rung.budget * cand["budget_scale"]
+        increment = budget - cand["trained"]
+        if increment <= 1e-9:
+            return cand["train_result"].get("final_val_acc", 0.0)
         
-        combined_score = eval_result.get("combined_score", 0.0)
-        param_count = eval_result.get("param_count", 0)
+        slot_train_loader, slot_test_loader = await slots.get()
+        try:
+            # TrainerAgent (resumes from the candidate's model/optimizer state)
+            train_result = await asyncio.wait_for(trainer.execute(context, {
+                "type": "train_model",
+                "trial_id": trial_id,
+                "model": cand["model"],
+                "optimizer": cand["optimizer"],
+                "train_loader": slot_train_loader,
+                "val_loader": slot_test_loader,  # Usar test como val para simplificar
+                "epochs": increment,
+                "lr": cand["architecture"].get("lr"),
+                "device": device
+            }), timeout=concurrency["timeout"])
+        except asyncio.TimeoutError:
+            train_result = {"status": "timeout", "error": f"timed out after {concurrency['timeout']:g}s"}
+        finally:
+            # wait_for returns only after the trainer's thread has stopped, so the loaders are idle here.
+            slots.put_nowait((slot_train_loader, slot_test_loader))
         
-        # CriticAgent: analyses and provides feedback
-        critic_result = await critic.execute(context, {
-            "type": "critique",
-            "trial_id": trial_id,
-            "metrics": train_result.get("metrics", {}),
-            "score": combined_score,
-            "param_count": param_count
-        })
+        return await finish_training(trial_id, rung, budget, increment, train_result)
+    
+    async def finish_training(trial_id: int, rung: Rung, budget: float, increment: float, train_result: Dict[str, Any]) -> Optional[float]:
+        cand = candidates[trial_id]
+        if train_result.get("status") != "success":
+            logger.warning(f"      Trial {trial_id} training {train_result.get('status')}: {train_result.get('error')}")
+            await _record_failed_trial(context, round_id, trial_id, cand, str(train_result.get("error")), context_lock)
+            cand.update(model=None, optimizer=None, optimizer_state=None, failed=True)
+            return None
         
-        concerns = critic_result.get("concerns", [])
-        improvements = critic_result.get("improvements", [])
+        async with context_lock:
+            context.add_epochs(increment)
+        previous = (cand["train_result"] or {}).get("metrics", {})
+        merged = {k: list(previous.get(k, [])) + list(v) for k, v in train_result.get("metrics", {}).items()}
+        train_result["metrics"] = merged
+        cand.update(
+            optimizer=train_result.get("optimizer"),
+            optimizer_state=train_result.get("optimizer_state"),
+            trained=budget,
+            rung=rung.index,
+            train_result=train_result
+        )
+        if weight_cache is not None:
+            weight_cache.put(trial_id, cand["architecture"], train_result["model"], train_result.get("final_val_acc", 0.0))
+        return train_result.get("final_val_acc", 0.0)
+    
+    # Same-shape candidates at the same training progress train together as vmapped
+    # populations of up to `training.population_size` models, one data pass for all of them.
+    async def train_population(trial_ids: List[int], rung: Rung) -> Dict[int, Optional[float]]:
+        first = candidates[trial_ids[0]]
+        budget = rung.budget * first["budget_scale"]
+        increment = budget - first["trained"]
+        if increment <= 1e-9:
+            return {t: candidates[t]["train_result"].get("final_val_acc", 0.0) for t in trial_ids}
         
-        # Log resultado
-        logger.info(f"      ✅ Score: {combined_score:.4f} | Params: {param_count:,}")
-        if concerns:
-            for c in concerns[:2]:
-                logger.warning(f"        {c}")
-        if improvements:
-            logger.info(f"        Suggestion: {improvements[0]}")
+        slot_train_loader, slot_test_loader = await slots.get()
+        try:
+            population_result = await asyncio.wait_for(trainer.execute(context, {
+                "type": "train_population",
+                "trial_ids": trial_ids,
+                "models": [candidates[t]["model"] for t in trial_ids],
+                "lrs": [candidates[t]["architecture"].get("lr") for t in trial_ids],
+                "optimizer_states": [candidates[t].get("optimizer_state") for t in trial_ids],
+                "train_loader": slot_train_loader,
+                "val_loader": slot_test_loader,
+                "epochs": increment,
+                "device": device
+            }), timeout=concurrency["timeout"])
+        except asyncio.TimeoutError:
+            population_result = {"status": "timeout", "error": f"timed out after {concurrency['timeout']:g}s"}
+        finally:
+            slots.put_nowait((slot_train_loader, slot_test_loader))
         
-        # Updates the cntext
-        trial_state = TrialState(
-            trial_id=trial_id,
-            architecture=architecture,
-            metrics={
-                "train_acc": train_result.get("final_train_acc"),
-                "val_acc": final_val_acc,
-                "combined_score": combined_score,
-                "param_count": param_count,
-                "flops": eval_result.get("flops", -1)
-            },
-            status="completed"
+        per_trial = population_result.get("results") or {}
+        return {
+            t: await finish_training(t, rung, budget, increment, per_trial.get(t, population_result))
+            for t in trial_ids
+        }
+    
+    def populations(trial_ids: List[int]) -> List[List[int]]:
+        # Members must share parameter shapes, training progress and budget scale.
+        groups = group_by_shape(
+            ((candidates[t]["trained"], candidates[t]["budget_scale"], t), candidates[t]["model"]) for t in trial_ids
         )
+        split: Dict[Any, List[int]] = {}
+        for g, group in enumerate(groups):
+            for trained, scale, t in group:
+                split.setdefault((g, trained, scale), []).append(t)
+        size = concurrency["population_size"]
+        return [ids[i : i + size] for ids in split.values() for i in range(0, len(ids), size)]
+    
+    active = list(candidates)
+    for rung_pos, rung in enumerate(rungs):
+        logger.info(f"\n  ▶ Rung {rung.index}: {len(active)} candidates to {rung.budget:g} epochs")
+        if concurrency["population_size"] > 1:
+            outcomes: Dict[int, Optional[float]] = {}
+            for part in await asyncio.gather(*(train_population(ids, rung) for ids in populations(active))):
+                outcomes.update(part)
+            results = [outcomes.get(t) for t in active]
+        else:
+            results = await asyncio.gather(*(train_candidate(trial_id, rung) for trial_id in active))
+        scores: Dict[int, float] = {t: score for t, score in zip(active, results) if score is not None}
         
-        context.add_trial(round_id, trial_state)
-        context.total_trials_done += 1
+        if rung_pos == len(rungs) - 1:
+            active = [t for t in active if t in scores]
+            break
         
-        # Save emissions record to run-specific CSV
-        append_emissions_record(
-            run_dir=results_dir,
-            trial_id=f"trial_{trial_id}",
-            emissions_kg=eval_result.get("emissions_kg"),  # Will be None for now
-            accuracy=final_val_acc,
-            params_M=param_count / 1_000_000.0 if param_count else None,
-            flops_B=eval_result.get("flops", -1) / 1_000_000_000.0 if eval_result.get("flops", -1) > 0 else None
+        keep = rungs[rung_pos + 1].n_candidates
+        promoted = select_promotions(scores, keep)
+        logger.info(f"    Promoted {promoted} of {sorted(scores)}")
+        stopped = [t for t in scores if t not in promoted]
+        await asyncio.gather(*(
+            _finalize_trial(context, round_id, t, candidates[t], evaluator, critic, results_dir, False, context_lock)
+            for t in stopped
+        ))
+        for trial_id in stopped:
+            candidates[trial_id].update(model=None, optimizer=None, optimizer_state=None)
+        active = promoted
+    
+    await asyncio.gather(*(
+        _finalize_trial(context, round_id, t, candidates[t], evaluator, critic, results_dir, True, context_lock)
+        for t in active
+    ))
+    if evolution is not None:
+        evolution.tell_many(
+            (candidates[t]["architecture"], (candidates[t]["train_result"] or {}).get("final_val_acc"))
+            for t in active
         )
-        
-        # Update global best
-        if combined_score > (context.global_best_score or 0):
-            context.update_best(trial_id, combined_score, architecture)
-            logger.info(f"      🌟 NEW BEST FOUND!")
+    
+    # Write the round's scored trials back to the memory store in one batch
+    await memory_agent.execute(context, {"type": "store_trials", "round_id": round_id})
+    if surrogate is not None:
+        await asyncio.to_thread(surrogate.sync)
     
     context.current_round += 1
     
@@ -252,24 +551,26 @@ async def _run_nas_agents_pipeline(
         "round_id": round_id,
         "strategy": strategy,
         "trials_executed": planned_trials,
+        "epochs_used": context.epochs_used,
         "global_best_score": context.global_best_score
     }
 
 # Main func to run the crew
 async def run_crewai_async(cfg: Dict[str, Any], device: str, logger_in=None) -> Dict[str, Any]:
+    # Loaders and the memory store are released (and the index flushed) when the run ends.
+    with search_session(cfg) as session:
+        return await _run_crewai_async(cfg, device, session)
+
+
+async def _run_crewai_async(cfg: Dict[str, Any], device: str, session: SearchSession) -> Dict[str, Any]:
     
     _configure_environment(cfg)
     results_dir = _ensure_results_dir(cfg)
     run_id = cfg.get("tracking", {}).get("run_id", "run")
     
     # load data
-    train_loader, test_loader, dataset_meta = get_loaders(
-        name=cfg.get("dataset", "MNIST"),
-        batch_size=cfg.get("batch_size", 128),
-        num_workers=cfg.get("num_workers", 2)
-    )
-    
-    search_space = get_search_space(cfg.get("search_space", {}).get("name", "simple_cnn_default"))
+    train_loader, test_loader = session.train_loader, session.test_loader
+    search_space = session.search_space
     
     # Starts the search context
     total_budget = _get_int(cfg, "n_trials", default=10)
@@ -284,10 +585,24 @@ async def run_crewai_async(cfg: Dict[str, Any], device: str, logger_in=None) ->
         total_budget=total_budget,
         max_rounds=max_rounds,
         exploration_ratio=exploration_ratio,
+        epoch_budget=(cfg.get("agents") or {}).get("epoch_budget"),
     )
     
     set_search_context(context)
     
+    # One MemoryAgent per run, so its query cache spans rounds
+    dataset_meta = session.dataset_meta.to_dict()
+    memory_agent = MemoryAgent(
+        memory_store=session.memory_store,
+        query_context={
+            "in_ch": dataset_meta["in_ch"],
+            "size": dataset_meta["size"],
+            "batch_size": cfg.get("batch_size", 128),
+            "epochs": cfg.get("epochs", 2),
+        },
+        config_hash=str((cfg.get("tracking") or {}).get("config_hash", "")),
+    )
+    
     logger.info(f"\n{'#'*70}")
     logger.info("🚀 NAS MULTI-AGENT SYSTEM")
     logger.info(f"{'#'*70}")
@@ -298,25 +613,53 @@ async def run_crewai_async(cfg: Dict[str, Any], device: str, logger_in=None) ->
     logger.info(f"Device: {device}")
     logger.info(f"{'#'*70}\n")
     
+    surrogate = get_surrogate(session, cfg)
+    proxy_screen = ProxyScreen.from_cfg(cfg)
+    weight_cache = ParentWeightCache.from_cfg(cfg, search_space, dataset_meta)
+    evolution = None
+    if str((cfg.get("agents") or {}).get("refine_sampler", "default")).lower() == "evolution":
+        if getattr(search_space, "supports_evolution", False):
+            evolution = RegularizedEvolution.from_cfg(cfg, search_space)
+        else:
+            logger.warning(f"Search space {search_space.name} does not support evolution; using the default refine sampler")
+    
     # Execute trials in rounds until budget or rounds are exhausted
-    while context.current_round < context.max_rounds and context.total_trials_done < context.total_budget:
+    while (
+        context.current_round < context.max_rounds
+        and context.total_trials_done < context.total_budget
+        and not context.epoch_budget_exhausted()
+    ):
         await _run_nas_agents_pipeline(
             context,
             train_loader,
             test_loader,
             search_space,
             device,
-            results_dir
+            results_dir,
+            cfg=cfg,
+            memory_agent=memory_agent,
+            surrogate=surrogate,
+            proxy_screen=proxy_screen,
+            weight_cache=weight_cache,
+            evolution=evolution
         )
     
     # Final summary
     logger.info(f"\n{'='*70}")
     logger.info("📊 FINAL REPORT")
     logger.info(f"{'='*70}")
-    logger.info(f"Global Best Score: {context.global_best_score:.4f}")
+    logger.info(f"Global Best Score: {context.global_best_score:.4f}" if context.global_best_score is not None else "Global Best Score: n/a")
     logger.info(f"Global Best Architecture: {context.global_best_architecture}")
     logger.info(f"Total Trials Executed: {context.total_trials_done}/{context.total_budget}")
+    logger.info(f"Epoch-equivalents Used: {context.epochs_used:.2f}" + (f"/{context.epoch_budget:g}" if context.epoch_budget is not None else ""))
     logger.info(f"Rounds Completed: {context.current_round}/{context.max_rounds}")
+    logger.info(f"Memory: {memory_agent.stored} trials stored, {memory_agent.cache_hits} cached queries")
+    if weight_cache is not None:
+        stats = weight_cache.stats()
+        logger.info(f"Weight inheritance: {stats['warm_starts']} warm starts from {stats['parents']} cached parents")
+    if evolution is not None:
+        stats = evolution.stats()
+        logger.info(f"Regularized evolution: {stats['told']} members told, population {stats['population']}, {stats['asked']} offspring asked")
     if context.reflection_notes:
         logger.info(f"\nReflection Notes:")
         for note in context.reflection_notes[-3:]:  # Last 3
@@ -343,6 +686,7 @@ async def run_crewai_async(cfg: Dict[str, Any], device: str, logger_in=None) ->
         "global_best_architecture": context.global_best_architecture,
         "total_trials": context.total_trials_done,
         "total_budget": context.total_budget,
+        "epochs_used": context.epochs_used,
         "rounds": context.current_round,
         "emissions_summary": emissions_summary,
         "context": context.to_dict(),
@@ -0,0 +1,83 @@
+"""
+Multi-fidelity successive-halving scheduler for the agent orchestrator.
+
+Budgets are measured in epoch-equivalents: a rung budget below 1.0 means one
+pass over that fraction of the training batches, so cheap rungs can use a data
+subset while later rungs add whole epochs. Survivors resume from their saved
+model/optimizer state, so each rung only trains the budget increment.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class Rung:
+    index: int
+    budget: float  # cumulative epoch-equivalents trained by each candidate that reaches this rung
+    n_candidates: int
+
+
+@dataclass
+class Bracket:
+    eta: int
+    rungs: List[Rung] = field(default_factory=list)
+
+    @property
+    def n_candidates(self) -> int:
+        return self.rungs[0].n_candidates if self.rungs else 0
+
+    @property
+    def max_budget(self) -> float:
+        return self.rungs[-1].budget if self.rungs else 0.0
+
+    def epoch_cost(self) -> float:
+        """Total epoch-equivalents the bracket spends if every rung is filled."""
+        cost, trained = 0.0, 0.0
+        for rung in self.rungs:
+            cost += rung.n_candidates * (rung.budget - trained)
+            trained = rung.budget
+        return cost
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"eta": self.eta, "rungs": [asdict(r) for r in self.rungs], "epoch_cost": self.epoch_cost()}
+
+
+def max_halvings(min_budget: float, max_budget: float, eta: int) -> int:
+    """Number of promotions that fit between ``min_budget`` and ``max_budget``."""
+    if min_budget <= 0 or max_budget <= min_budget or eta < 2:
+        return 0
+    return int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9))
+
+
+def plan_bracket(n_candidates: int, min_budget: float, max_budget: float, eta: int = 3, halvings: int | None = None) -> Bracket:
+    """
+    Successive-halving bracket ending at ``max_budget``.
+
+    ``halvings`` picks the Hyperband bracket: the maximum starts every candidate at
+    ``min_budget`` (widest exploration), 0 trains all candidates at ``max_budget``.
+    """
+    n_candidates = max(1, int(n_candidates))
+    eta = max(2, int(eta))
+    s_max = max_halvings(min_budget, max_budget, eta)
+    s = s_max if halvings is None else max(0, min(int(halvings), s_max))
+
+    rungs: List[Rung] = []
+    for i in range(s + 1):
+        budget = max_budget / (eta ** (s - i))
+        n_i = max(1, n_candidates // (eta ** i))
+        if rungs and n_i == rungs[-1].n_candidates and n_i == 1:
+            # A single survivor gains nothing from intermediate rungs; jump to the top budget.
+            rungs[-1] = Rung(index=rungs[-1].index, budget=max_budget, n_candidates=1)
+            break
+        rungs.append(Rung(index=i, budget=round(budget, 6), n_candidates=n_i))
+    rungs[-1].budget = float(max_budget)
+    return Bracket(eta=eta, rungs=rungs)
+
+
+def select_promotions(scores: Dict[int, float], n_keep: int) -> List[int]:
+    """Trial ids of the ``n_keep`` best scores (ties broken by trial id)."""
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [trial_id for trial_id, _ in ranked[: max(0, n_keep)]]
@@ -18,8 +18,12 @@ class TrialState:
     architecture: Dict[str, Any]  # {"conv_channels": 32, "kernel_size": 3, ...}
     metrics: Dict[str, float] = field(default_factory=dict)  # {"train_loss": 0.5, "eval_acc": 0.95, ...}
     training_log: str = ""
-    status: str = "pending"  # pending, building, training, evaluating, completed, failed
+    status: str = "pending"  # pending, building, training, evaluating, completed, stopped, failed, rejected
     errors: List[str] = field(default_factory=list)
+    rung: int = 0  # highest successive-halving rung reached
+    fidelity_epochs: float = 0.0  # epoch-equivalents trained
+    proxy_scores: Optional[Dict[str, float]] = None  # zero-cost proxies of the untrained model
+    inherited_from: Optional[int] = None  # trial whose weights warm-started this one (weight inheritance)
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
 
 
@@ -29,6 +33,7 @@ class RoundState:
     round_id: int
     strategy: str  # "explore" or "refine"
     planned_trials: int  # number of trials to plan
+    bracket: Optional[Dict[str, Any]] = None  # successive-halving rungs planned for the round
     trials: Dict[int, TrialState] = field(default_factory=dict)
     reasoning_log: List[str] = field(default_factory=list)  # ReAct trace
     best_trial_id: Optional[int] = None
@@ -47,10 +52,12 @@ class SearchContext:
     total_budget: int  # total trials budget
     max_rounds: int
     exploration_ratio: float  # % of trials for exploration vs refinement
+    epoch_budget: Optional[float] = None  # total budget in epoch-equivalents (None = trial budget only)
     
     # Current state
     current_round: int = 0
     total_trials_done: int = 0
+    epochs_used: float = 0.0  # epoch-equivalents trained so far, comparable across runs
     rounds: Dict[int, RoundState] = field(default_factory=dict)
     memory_hits: List[Dict[str, Any]] = field(default_factory=list)
     
@@ -75,6 +82,13 @@ class SearchContext:
             self.rounds[round_id] = RoundState(round_id=round_id, strategy="explore", planned_trials=0)
         self.rounds[round_id].trials[trial.trial_id] = trial
     
+    def add_epochs(self, epochs: float) -> None:
+        """Charges trained epoch-equivalents to the budget."""
+        self.epochs_used += float(epochs)
+    
+    def epoch_budget_exhausted(self) -> bool:
+        return self.epoch_budget is not None and self.epochs_used >= self.epoch_budget
+    
     def update_best(self, trial_id: int, score: float, architecture: Dict[str, Any]) -> None:
         """Updates the best trial discovered so far."""
         if self.global_best_score is None or score > self.global_best_score:
@@ -94,6 +108,8 @@ class SearchContext:
             "max_rounds": self.max_rounds,
             "current_round": self.current_round,
             "total_trials_done": self.total_trials_done,
+            "epoch_budget": self.epoch_budget,
+            "epochs_used": self.epochs_used,
             "global_best_trial_id": self.global_best_trial_id,
             "global_best_score": self.global_best_score,
             "global_best_architecture": self.global_best_architecture,
@@ -9,6 +9,7 @@ from crewai.tools import tool
 
 from agents.evaluation_agent import EvaluationAgent
 from nas.optuna_search import run_optuna_search
+from nas.session import get_search_session
 from crew.runtime import get_runtime
 
 
@@ -36,7 +37,8 @@ def execute_optuna_block(payload: Dict[str, Any]) -> str:
     cfg_block["tracking"] = cfg_block.get("tracking") or {}
     cfg_block["tracking"]["run_dir"] = str(block_dir / f"block_{block_id:03d}")
 
-    summary = run_optuna_search(cfg_block, rt.device)
+    # Reuse the run's warm session (loaders, search space, memory) instead of rebuilding it per block.
+    summary = run_optuna_search(cfg_block, rt.device, session=get_search_session(rt.cfg))
 
     out_path = block_dir / f"block_{block_id:03d}_summary.json"
     with out_path.open("w", encoding="utf-8") as f:
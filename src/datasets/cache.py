@@ -0,0 +1,148 @@
+"""
+Versioned on-disk cache of decoded dataset splits.
+
+Each split is stored as two ``.npy`` files (uint8 images in NCHW layout and int64
+labels) plus a ``manifest.json`` holding the cache version, shapes, content
+checksums and a fingerprint of the torchvision raw files it was built from.
+Readers open the arrays with ``np.load(mmap_mode=...)`` so concurrent processes
+share the OS page cache instead of each holding a private copy.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+# Where torchvision keeps the raw files for each dataset, relative to the data root.
+_RAW_DIRS = {
+    "MNIST": "MNIST/raw",
+    "FASHIONMNIST": "FashionMNIST/raw",
+    "CIFAR10": "cifar-10-batches-py",
+}
+
+_CHUNK = 16 * 1024 * 1024
+
+
+def _split_name(train: bool) -> str:
+    return "train" if train else "test"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(key: str, data_root: str | Path = "data") -> Optional[str]:
+    """Cheap fingerprint (names, sizes, mtimes) of the raw files; None when they are not on disk."""
+    raw_dir = Path(data_root) / _RAW_DIRS.get(key, key)
+    if not raw_dir.is_dir():
+        return None
+    entries = []
+    for fp in sorted(raw_dir.iterdir()):
+        if fp.is_file():
+            st = fp.stat()
+            entries.append(f"{fp.name}:{st.st_size}:{st.st_mtime_ns}")
+    if not entries:
+        return None
+    return hashlib.sha256("|".join(entries).encode("utf-8")).hexdigest()
+
+
+class SplitCache:
+    """On-disk cache for one (dataset, split) pair under ``<cache_dir>/<dataset>/v<version>/``."""
+
+    def __init__(self, key: str, train: bool, cache_dir: str | Path = "data/cache", data_root: str | Path = "data") -> None:
+        self.key = key
+        self.split = _split_name(train)
+        self.data_root = Path(data_root)
+        self.root = Path(cache_dir) / key / f"v{CACHE_VERSION}"
+        self.images_path = self.root / f"{self.split}_images.npy"
+        self.labels_path = self.root / f"{self.split}_labels.npy"
+        self.manifest_path = self.root / f"{self.split}_manifest.json"
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return None
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def is_valid(self, verify_checksum: bool = False) -> bool:
+        """Fast validity check; ``verify_checksum`` additionally re-hashes the array files."""
+        manifest = self._read_manifest()
+        if not manifest or manifest.get("version") != CACHE_VERSION or manifest.get("dataset") != self.key:
+            return False
+        if not self.images_path.exists() or not self.labels_path.exists():
+            return False
+
+        # Raw files changed since the build -> stale. Skipped when the raw files are not on disk.
+        fingerprint = source_fingerprint(self.key, self.data_root)
+        if fingerprint is not None and manifest.get("source_fingerprint") not in (None, fingerprint):
+            return False
+
+        try:
+            images = np.load(self.images_path, mmap_mode="r")
+            labels = np.load(self.labels_path, mmap_mode="r")
+        except Exception:
+            return False
+        if list(images.shape) != manifest.get("images_shape") or list(labels.shape) != manifest.get("labels_shape"):
+            return False
+
+        if verify_checksum:
+            if _file_sha256(self.images_path) != manifest.get("images_sha256"):
+                return False
+            if _file_sha256(self.labels_path) != manifest.get("labels_sha256"):
+                return False
+        return True
+
+    def build(self, images: np.ndarray, labels: np.ndarray) -> None:
+        """Writes the arrays atomically (tmp file + rename) and the manifest last."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        images = np.ascontiguousarray(images, dtype=np.uint8)
+        labels = np.ascontiguousarray(labels, dtype=np.int64)
+
+        suffix = f".tmp{os.getpid()}"
+        for path, array in ((self.images_path, images), (self.labels_path, labels)):
+            tmp = path.with_name(path.name + suffix)
+            with tmp.open("wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+
+        manifest = {
+            "version": CACHE_VERSION,
+            "dataset": self.key,
+            "split": self.split,
+            "images_shape": list(images.shape),
+            "labels_shape": list(labels.shape),
+            "images_sha256": _file_sha256(self.images_path),
+            "labels_sha256": _file_sha256(self.labels_path),
+            "source_fingerprint": source_fingerprint(self.key, self.data_root),
+        }
+        tmp = self.manifest_path.with_name(self.manifest_path.name + suffix)
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def open(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-maps the cached arrays copy-on-write: pages are shared until written to."""
+        return np.load(self.images_path, mmap_mode="c"), np.load(self.labels_path, mmap_mode="c")
+
+    def load_or_build(
+        self,
+        decode: Callable[[], Tuple[np.ndarray, np.ndarray]],
+        verify_checksum: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_valid(verify_checksum=verify_checksum):
+            images, labels = decode()
+            self.build(images, labels)
+        return self.open()
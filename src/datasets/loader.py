@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import copy
 from dataclasses import asdict, dataclass
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Optional, Sequence, Tuple
 
+import torch
 from torch.utils.data import DataLoader
 from torchvision import datasets, transforms
 
+from datasets.cache import SplitCache
+
 
 @dataclass
 class DatasetMeta:
@@ -18,32 +22,206 @@ class DatasetMeta:
         return asdict(self)
 
 
-def get_loaders(name: str = "MNIST", batch_size: int = 128, num_workers: int = 2) -> Tuple[DataLoader, DataLoader, DatasetMeta]:
-    key = name.upper()
+_NORMALIZATION: Dict[str, Tuple[Tuple[float, ...], Tuple[float, ...]]] = {
+    "MNIST": ((0.1307,), (0.3081,)),
+    "FASHIONMNIST": ((0.1307,), (0.3081,)),
+    "CIFAR10": ((0.4914, 0.4822, 0.4465), (0.247, 0.243, 0.261)),
+}
+
+LOADER_MODES = ("torchvision", "tensor", "mmap")
+
+# Decoded splits shared by every trial of the process: (dataset, train, mode, cache_dir) -> (images, targets).
+_SPLIT_CACHE: Dict[Tuple[str, bool, str, Optional[str]], Tuple[torch.Tensor, torch.Tensor]] = {}
+
+
+class TensorLoader:
+    """Serves batches from an in-memory split by slicing a permuted index.
+
+    Drop-in replacement for ``DataLoader`` in the train/eval loops: iterating yields
+    ``(x, y)`` batches and ``len()`` is the number of batches. Float images are served
+    as-is; uint8 images are normalized per batch with ``mean``/``std``.
+    """
+
+    def __init__(
+        self,
+        images: torch.Tensor,
+        targets: torch.Tensor,
+        batch_size: int,
+        shuffle: bool = False,
+        mean: Optional[Sequence[float]] = None,
+        std: Optional[Sequence[float]] = None,
+        drop_last: bool = False,
+    ) -> None:
+        if images.size(0) != targets.size(0):
+            raise ValueError("images and targets must have the same number of samples")
+        self.images = images
+        self.targets = targets
+        self.batch_size = max(1, int(batch_size))
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self._mean = torch.tensor(mean or (0.0,), dtype=torch.float32).view(1, -1, 1, 1)
+        self._std = torch.tensor(std or (1.0,), dtype=torch.float32).view(1, -1, 1, 1)
+
+    @property
+    def num_samples(self) -> int:
+        return int(self.images.size(0))
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return (self.num_samples + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        n = self.num_samples
+        order = torch.randperm(n) if self.shuffle else None
+        stop = n - (n % self.batch_size) if self.drop_last else n
+        for start in range(0, stop, self.batch_size):
+            end = min(start + self.batch_size, n)
+            if order is None:
+                x, y = self.images[start:end], self.targets[start:end]
+            else:
+                idx = order[start:end]
+                x, y = self.images.index_select(0, idx), self.targets.index_select(0, idx)
+            if x.dtype == torch.uint8:
+                x = x.float().div_(255.0).sub_(self._mean).div_(self._std)
+            yield x, y
+
+
+class BatchLimitedLoader:
+    """Iterates only the first ``fraction`` of a loader's batches (a shuffled loader gives a random subset)."""
+
+    def __init__(self, loader, fraction: float) -> None:
+        self.loader = loader
+        self.max_batches = max(1, int(round(len(loader) * min(1.0, max(0.0, float(fraction))))))
+
+    def __len__(self) -> int:
+        return self.max_batches
+
+    def __iter__(self):
+        for i, batch in enumerate(self.loader):
+            if i >= self.max_batches:
+                break
+            yield batch
+
+
+def fork_loader(loader):
+    """
+    Loader that can be iterated concurrently with ``loader``.
+
+    ``TensorLoader`` iterators are independent already. A DataLoader with persistent
+    workers keeps a single shared iterator, so it gets a shallow copy with its own
+    worker pool.
+    """
+    if isinstance(loader, DataLoader) and loader.persistent_workers:
+        forked = copy.copy(loader)
+        forked._iterator = None
+        return forked
+    return loader
+
+
+def _dataset_meta(key: str) -> DatasetMeta:
     if key in ["MNIST", "FASHIONMNIST"]:
-        meta = DatasetMeta(name=key, in_ch=1, size=28, num_classes=10)
-        tfm = transforms.Compose(
-            [
-                transforms.ToTensor(),
-                transforms.Normalize((0.1307,), (0.3081,)),
-            ]
-        )
-        ds_cls = datasets.MNIST if key == "MNIST" else datasets.FashionMNIST
-        train = ds_cls(root="data", train=True, download=True, transform=tfm)
-        test = ds_cls(root="data", train=False, download=True, transform=tfm)
-    elif key == "CIFAR10":
-        meta = DatasetMeta(name=key, in_ch=3, size=32, num_classes=10)
-        tfm = transforms.Compose(
-            [
-                transforms.ToTensor(),
-                transforms.Normalize((0.4914, 0.4822, 0.4465), (0.247, 0.243, 0.261)),
-            ]
-        )
-        train = datasets.CIFAR10(root="data", train=True, download=True, transform=tfm)
-        test = datasets.CIFAR10(root="data", train=False, download=True, transform=tfm)
-    else:
+        return DatasetMeta(name=key, in_ch=1, size=28, num_classes=10)
+    if key == "CIFAR10":
+        return DatasetMeta(name=key, in_ch=3, size=32, num_classes=10)
+    raise ValueError(f"Unsupported dataset: {key}")
+
+
+def _torchvision_split(key: str, train: bool, transform=None):
+    if key == "MNIST":
+        return datasets.MNIST(root="data", train=train, download=True, transform=transform)
+    if key == "FASHIONMNIST":
+        return datasets.FashionMNIST(root="data", train=train, download=True, transform=transform)
+    if key == "CIFAR10":
+        return datasets.CIFAR10(root="data", train=train, download=True, transform=transform)
+    raise ValueError(f"Unsupported dataset: {key}")
+
+
+def _decode_split(key: str, train: bool) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Reads the raw uint8 arrays held by the torchvision dataset as (N, C, H, W) images and int64 targets."""
+    ds = _torchvision_split(key, train)
+    data = torch.as_tensor(ds.data)
+    if data.dim() == 3:  # MNIST-style (N, H, W)
+        images = data.unsqueeze(1)
+    else:  # CIFAR-style (N, H, W, C)
+        images = data.permute(0, 3, 1, 2)
+    targets = torch.as_tensor(ds.targets, dtype=torch.long)
+    return images.contiguous(), targets
+
+
+def _uint8_split(key: str, train: bool, cache_dir: Optional[str], verify_cache: bool) -> Tuple[torch.Tensor, torch.Tensor]:
+    """uint8 split, memory-mapped from the on-disk cache when ``cache_dir`` is set."""
+    if not cache_dir:
+        return _decode_split(key, train)
+
+    def decode():
+        images, targets = _decode_split(key, train)
+        return images.numpy(), targets.numpy()
+
+    images, targets = SplitCache(key, train, cache_dir=cache_dir).load_or_build(decode, verify_checksum=verify_cache)
+    return torch.from_numpy(images), torch.from_numpy(targets)
+
+
+def _split(key: str, train: bool, mode: str, cache_dir: Optional[str], verify_cache: bool) -> Tuple[torch.Tensor, torch.Tensor]:
+    cache_key = (key, train, mode, cache_dir)
+    if cache_key not in _SPLIT_CACHE:
+        images, targets = _uint8_split(key, train, cache_dir, verify_cache)
+        if mode == "tensor":
+            mean, std = _NORMALIZATION[key]
+            mean_t = torch.tensor(mean, dtype=torch.float32).view(1, -1, 1, 1)
+            std_t = torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1)
+            images = images.float().div_(255.0).sub_(mean_t).div_(std_t).contiguous()
+            targets = targets.clone()
+        _SPLIT_CACHE[cache_key] = (images, targets)
+    return _SPLIT_CACHE[cache_key]
+
+
+def clear_tensor_cache() -> None:
+    """Drops the process-wide decoded splits used by ``mode="tensor"`` and ``mode="mmap"``."""
+    _SPLIT_CACHE.clear()
+
+
+def get_loaders(
+    name: str = "MNIST",
+    batch_size: int = 128,
+    num_workers: int = 2,
+    mode: str = "torchvision",
+    cache_dir: Optional[str] = None,
+    verify_cache: bool = False,
+    eval_batch_size: Optional[int] = None,
+) -> Tuple[DataLoader | TensorLoader, DataLoader | TensorLoader, DatasetMeta]:
+    key = name.upper()
+    if key not in _NORMALIZATION:
         raise ValueError(f"Unsupported dataset: {name}")
+    if mode not in LOADER_MODES:
+        raise ValueError(f"Unsupported loader mode: {mode}. Available: {list(LOADER_MODES)}")
+    if mode == "mmap" and not cache_dir:
+        raise ValueError("Loader mode 'mmap' requires a cache_dir.")
+    meta = _dataset_meta(key)
+    eval_batch_size = int(eval_batch_size or batch_size)
+
+    if mode in ("tensor", "mmap"):
+        # "tensor" decodes and normalizes each split once into float memory; "mmap" keeps the
+        # uint8 cache memory-mapped and normalizes per batch. All loaders of the process share the tensors.
+        mean, std = _NORMALIZATION[key]
+        train_x, train_y = _split(key, True, mode, cache_dir, verify_cache)
+        test_x, test_y = _split(key, False, mode, cache_dir, verify_cache)
+        train_loader = TensorLoader(train_x, train_y, batch_size=batch_size, shuffle=True, mean=mean, std=std)
+        test_loader = TensorLoader(test_x, test_y, batch_size=eval_batch_size, shuffle=False, mean=mean, std=std)
+        return train_loader, test_loader, meta
+
+    mean, std = _NORMALIZATION[key]
+    tfm = transforms.Compose(
+        [
+            transforms.ToTensor(),
+            transforms.Normalize(mean, std),
+        ]
+    )
+    train = _torchvision_split(key, train=True, transform=tfm)
+    test = _torchvision_split(key, train=False, transform=tfm)
 
-    train_loader = DataLoader(train, batch_size=batch_size, shuffle=True, num_workers=num_workers)
-    test_loader = DataLoader(test, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+    # Persistent workers survive between epochs and, via the search session, between blocks.
+    persistent = num_workers > 0
+    train_loader = DataLoader(train, batch_size=batch_size, shuffle=True, num_workers=num_workers, persistent_workers=persistent)
+    test_loader = DataLoader(test, batch_size=eval_batch_size, shuffle=False, num_workers=num_workers, persistent_workers=persistent)
     return train_loader, test_loader, meta
@@ -8,6 +8,7 @@ from utils.env import set_seed, get_device
 from tracking.io import init_run_context
 from config.schema import validate_config
 from crew.crew_runner import run_crewai
+from nas.oneshot import run_oneshot_search
 
 # Reads the YAML config, validates it, and initializes the run context for tracking.
 def load_config(cfg_path: str):
@@ -60,9 +61,13 @@ def main():
     logger.info(f"Run id: {cfg['tracking']['run_id']}")
     logger.info(f"Run dir: {cfg['tracking']['run_dir']}")
 
-    logger.info("🚀 Starting NAS with CrewAI multi-agent orchestration...")
-    # Starts the orquestration process
-    summary = run_crewai(cfg, device=device, logger=logger)
+    if (cfg.get("oneshot") or {}).get("enabled", False):
+        logger.info("🚀 Starting one-shot (supernet) NAS...")
+        summary = run_oneshot_search(cfg, device)
+    else:
+        logger.info("🚀 Starting NAS with CrewAI multi-agent orchestration...")
+        # Starts the orquestration process
+        summary = run_crewai(cfg, device=device, logger=logger)
     logger.info(f"✅ NAS run complete. Summary: {summary}")
 
 
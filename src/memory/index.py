@@ -0,0 +1,178 @@
+"""
+Partitioned, standardized nearest-neighbour indexes for the memory store.
+
+Each (dataset, search space) pair gets its own ``Partition``, so a query only
+scans the history it can use. A partition z-scores its vectors with its own
+per-feature mean/std and searches them with a FAISS index wrapped in
+``IndexIDMap`` (ids are store rows). The index type is ``flat`` (exact),
+``hnsw`` or ``ivf`` (IVF-Flat); partitions smaller than ``ann_min_rows`` stay
+exact. The scaler is refit and the index rebuilt (IVF: retrained) every time a
+partition grows by ``retrain_growth`` since its last build, which keeps
+retraining amortized O(1) per add. Without FAISS the partition scans its rows
+with an ``argpartition`` top-k.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except Exception:
+    faiss = None
+
+PartitionKey = Tuple[str, str]
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+
+
+@dataclass
+class IndexSpec:
+    index_type: str = "flat"  # flat | hnsw | ivf
+    hnsw_m: int = 32
+    ef_construction: int = 40
+    ef_search: int = 64
+    nlist: Optional[int] = None  # IVF lists (None = 4 * sqrt(rows))
+    nprobe: int = 8
+    ann_min_rows: int = 10_000  # smaller partitions use exact search
+    retrain_growth: float = 2.0
+
+    @classmethod
+    def from_cfg(cls, index_type: str = "flat", index_kwargs: Optional[Dict[str, Any]] = None) -> "IndexSpec":
+        index_type = str(index_type or "flat").strip().lower()
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported memory index type: {index_type}. Available: {list(INDEX_TYPES)}")
+        known = {f.name for f in fields(cls)}
+        kwargs = {k: v for k, v in (index_kwargs or {}).items() if k in known and k != "index_type"}
+        return cls(index_type=index_type, **kwargs)
+
+
+def partition_key(dataset: Any, search_space: Any) -> PartitionKey:
+    return (str(dataset or "").upper(), str(search_space or ""))
+
+
+class Partition:
+    def __init__(self, key: PartitionKey, spec: IndexSpec, dim: int) -> None:
+        self.key = key
+        self.spec = spec
+        self.dim = dim
+        self.rows = np.empty((0,), dtype=np.int64)
+        self.size = 0
+        self.mean = np.zeros(dim, dtype=np.float32)
+        self.std = np.ones(dim, dtype=np.float32)
+        self.trained_rows = 0
+        self.index = None
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.rows[: self.size]
+
+    def _standardize(self, x: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray((x - self.mean) / self.std, dtype=np.float32)
+
+    def _make_index(self, n: int):
+        spec = self.spec
+        if spec.index_type == "hnsw" and n >= spec.ann_min_rows:
+            inner = faiss.IndexHNSWFlat(self.dim, int(spec.hnsw_m))
+            inner.hnsw.efConstruction = int(spec.ef_construction)
+        elif spec.index_type == "ivf" and n >= spec.ann_min_rows:
+            # FAISS wants roughly 39 training points per list.
+            nlist = max(1, min(int(spec.nlist or 4 * math.sqrt(n)), n // 39))
+            inner = faiss.IndexIVFFlat(faiss.IndexFlatL2(self.dim), self.dim, nlist)
+        else:
+            inner = faiss.IndexFlatL2(self.dim)
+        return faiss.IndexIDMap(inner)
+
+    def _tune(self) -> None:
+        inner = faiss.downcast_index(self.index.index)
+        if hasattr(inner, "hnsw"):
+            inner.hnsw.efSearch = int(self.spec.ef_search)
+        if hasattr(inner, "nprobe"):
+            inner.nprobe = int(self.spec.nprobe)
+
+    def rebuild(self, matrix: np.ndarray) -> None:
+        """Refits the scaler on every row of the partition and rebuilds (retrains) the index."""
+        raw = np.asarray(matrix[self.ids], dtype=np.float32)
+        if len(raw):
+            self.mean = raw.mean(axis=0).astype(np.float32)
+            std = raw.std(axis=0).astype(np.float32)
+            self.std = np.where(std > 1e-6, std, 1.0).astype(np.float32)
+        self.trained_rows = self.size
+        if faiss:
+            x = self._standardize(raw)
+            self.index = self._make_index(len(x))
+            if not self.index.is_trained:
+                self.index.train(x)
+            self.index.add_with_ids(x, self.ids)
+            self._tune()
+
+    def add(self, ids: np.ndarray, matrix: np.ndarray) -> None:
+        """Adds store rows ``ids`` (already in ``matrix``), retraining once the partition has grown enough."""
+        needed = self.size + len(ids)
+        if needed > self.rows.shape[0]:
+            grown = np.empty((max(needed, 2 * self.rows.shape[0], 64),), dtype=np.int64)
+            grown[: self.size] = self.rows[: self.size]
+            self.rows = grown
+        self.rows[self.size : needed] = ids
+        self.size = needed
+        if self.trained_rows == 0 or self.size >= self.spec.retrain_growth * self.trained_rows:
+            self.rebuild(matrix)
+        elif faiss and self.index is not None:
+            self.index.add_with_ids(self._standardize(np.asarray(matrix[ids], dtype=np.float32)), ids)
+
+    def attach(self, index, matrix: np.ndarray) -> None:
+        """Uses a persisted index, adding any rows it is missing; rebuilds when it does not fit."""
+        if index is None or index.ntotal > self.size or self.trained_rows == 0:
+            self.rebuild(matrix)
+            return
+        self.index = index
+        if index.ntotal < self.size:
+            missing = self.ids[index.ntotal :]
+            self.index.add_with_ids(self._standardize(np.asarray(matrix[missing], dtype=np.float32)), missing)
+        self._tune()
+
+    def search_many(self, queries: np.ndarray, k: int, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Squared L2 distances and store rows of the ``k`` nearest rows to each raw query vector.
+
+        Returns ``(m, k)`` arrays; slots without a neighbour hold ``inf`` / ``-1``.
+        """
+        m = queries.shape[0]
+        k = min(k, self.size)
+        if k <= 0 or m == 0:
+            return np.empty((m, 0), dtype=np.float32), np.empty((m, 0), dtype=np.int64)
+        qs = self._standardize(queries)
+        if faiss and self.index is not None:
+            dist, ids = self.index.search(qs, k)
+            return np.where(ids >= 0, dist, np.inf).astype(np.float32), ids
+        # Numpy fallback: an O(n) scan per query with argpartition top-k instead of a full sort,
+        # in query blocks that keep the (n, block) distance matrix around 16M floats.
+        x = self._standardize(np.asarray(matrix[self.ids], dtype=np.float32))
+        xx = (x * x).sum(axis=1)[:, None]
+        dist_out = np.empty((m, k), dtype=np.float32)
+        ids_out = np.empty((m, k), dtype=np.int64)
+        block = max(1, (16 << 20) // max(1, len(x)))
+        for lo in range(0, m, block):
+            qb = qs[lo : lo + block]
+            dist = xx - 2.0 * (x @ qb.T) + (qb * qb).sum(axis=1)[None, :]
+            top = np.argpartition(dist, k - 1, axis=0)[:k] if k < len(x) else np.broadcast_to(np.arange(len(x))[:, None], dist.shape)
+            top_dist = np.take_along_axis(dist, top, axis=0)
+            order = np.argsort(top_dist, axis=0)
+            dist_out[lo : lo + block] = np.take_along_axis(top_dist, order, axis=0).T
+            ids_out[lo : lo + block] = self.ids[np.take_along_axis(top, order, axis=0)].T
+        return np.maximum(dist_out, 0.0), ids_out
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {
+            "key": list(self.key),
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "trained_rows": self.trained_rows,
+        }
+
+    def load_meta(self, meta: Dict[str, Any]) -> None:
+        self.mean = np.asarray(meta["mean"], dtype=np.float32)
+        self.std = np.asarray(meta["std"], dtype=np.float32)
+        self.trained_rows = int(meta["trained_rows"])
@@ -1,20 +1,59 @@
+"""
+FAISS-backed memory of past trials.
+
+``trials.jsonl`` is the source of truth and is appended (and flushed) on every
+add. Next to the index the store persists, append-only, the embedding matrix
+(``<index>.matrix.f32``), the byte offset of every record line
+(``<index>.offsets.i64``) and every row's partition code (``<index>.parts.i32``),
+plus a small ``<index>.meta.json`` written last that holds the number of
+persisted rows, the JSONL byte watermark they cover and the partition scalers.
+Vectors are searched per (dataset, search space) partition, see ``memory.index``. Opening a store memory-maps those files and parses only the JSONL lines
+past the watermark. Full ``TrialRecord`` objects are read lazily, by offset,
+for the rows a query returns.
+
+Several stores, in different processes, may share the same files. Every
+writer takes an exclusive ``flock`` on the JSONL and embeds the lines other
+writers appended since its watermark before it appends its own. Rows therefore
+always follow the JSONL line order, in every process. Without ``fcntl`` there
+is no lock, and the store supports a single writer only.
+
+Writing to disk is deferred: it happens after ``flush_every`` adds or
+``flush_interval_s`` seconds, and on ``close()`` or process exit. Row files are
+truncated to the meta row count on open, and the index is replaced atomically,
+so a crash at any point leaves the persisted state a consistent prefix of the
+JSONL that is caught up on the next open.
+"""
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
 from contracts import TrialRecord
+from memory.index import IndexSpec, Partition, PartitionKey, partition_key
 
 try:
     import faiss
 except Exception:
     faiss = None
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
 
 _DATASET_TO_ID = {"MNIST": 1.0, "FASHIONMNIST": 2.0, "CIFAR10": 3.0}
+_DIM = 13
+_LAYOUT_VERSION = 2
 
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
@@ -24,115 +63,430 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
+def _ctx_matrix(contexts: List[Dict[str, Any]]) -> np.ndarray:
+    """Embeds contexts column by column into one ``(n, _DIM)`` float32 matrix."""
+    params = [c.get("params") or {} for c in contexts]
+
+    def column(values) -> np.ndarray:
+        return np.fromiter((_safe_float(v, 0.0) for v in values), dtype=np.float64, count=len(contexts))
+
+    lr = np.fromiter((_safe_float(p.get("lr"), 1e-3) for p in params), dtype=np.float64, count=len(contexts))
+    columns = [
+        np.fromiter((_DATASET_TO_ID.get(str(c.get("dataset", "MNIST")).upper(), 0.0) for c in contexts), dtype=np.float64, count=len(contexts)),
+        column(c.get("in_ch") for c in contexts),
+        column(c.get("size") for c in contexts),
+        column(c.get("batch_size") for c in contexts),
+        column(c.get("epochs") for c in contexts),
+        column(p.get("conv_channels") for p in params),
+        column(p.get("kernel_size") for p in params),
+        column(p.get("dropout") for p in params),
+        np.log10(np.maximum(lr, 1e-8)),
+        column(c.get("value") for c in contexts),
+        column(c.get("model_params") for c in contexts) / 1_000_000.0,
+        column(c.get("flops") for c in contexts) / 1_000_000_000.0,
+        column(c.get("emissions_kg") for c in contexts),
+    ]
+    if not contexts:
+        return np.empty((0, _DIM), dtype=np.float32)
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
 def _ctx_to_vector(context: Dict[str, Any]) -> np.ndarray:
-    dataset = str(context.get("dataset", "MNIST")).upper()
-    params = context.get("params") or {}
-    vector = np.array(
-        [
-            _DATASET_TO_ID.get(dataset, 0.0),
-            _safe_float(context.get("in_ch"), 0.0),
-            _safe_float(context.get("size"), 0.0),
-            _safe_float(context.get("batch_size"), 0.0),
-            _safe_float(context.get("epochs"), 0.0),
-            _safe_float(params.get("conv_channels"), 0.0),
-            _safe_float(params.get("kernel_size"), 0.0),
-            _safe_float(params.get("dropout"), 0.0),
-            _safe_float(np.log10(max(_safe_float(params.get("lr"), 1e-3), 1e-8))),
-            _safe_float(context.get("value"), 0.0),
-            _safe_float(context.get("model_params"), 0.0) / 1_000_000.0,
-            _safe_float(context.get("flops"), 0.0) / 1_000_000_000.0,
-            _safe_float(context.get("emissions_kg"), 0.0),
-        ],
-        dtype=np.float32,
+    return _ctx_matrix([context])[0]
+
+
+def _record_context(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Embedding context of a record given as a plain dict (a parsed JSONL line or ``model_dump()``)."""
+    ctx = dict(record.get("context") or {})
+    ctx.update(
+        {
+            "dataset": record.get("dataset"),
+            "params": record.get("params"),
+            "value": record.get("value"),
+            "model_params": record.get("model_params"),
+            "flops": record.get("flops"),
+            "emissions_kg": record.get("emissions_kg"),
+        }
     )
-    return vector
+    return ctx
+
+
+def _grow(array: np.ndarray, size: int, needed: int) -> np.ndarray:
+    """Copy of ``array[:size]`` with room for ``needed`` rows, doubling capacity."""
+    if needed <= array.shape[0]:
+        return array
+    capacity = max(needed, 2 * array.shape[0], 64)
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+def _flush_at_exit(ref: "weakref.ref[FaissMemoryStore]") -> None:
+    store = ref()
+    if store is not None:
+        store.close()
 
 
 class FaissMemoryStore:
-    def __init__(self, index_path: str, records_path: str) -> None:
+    def __init__(
+        self,
+        index_path: str,
+        records_path: str,
+        flush_every: int = 64,
+        flush_interval_s: float = 30.0,
+        index_type: str = "flat",
+        index_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> None:
         self.index_path = Path(index_path)
         self.records_path = Path(records_path)
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
         self.records_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, int(flush_every))
+        self.flush_interval_s = float(flush_interval_s)
+        self.spec = IndexSpec.from_cfg(index_type, index_kwargs)
+
+        self.matrix_path = self.index_path.with_name(self.index_path.name + ".matrix.f32")
+        self.offsets_path = self.index_path.with_name(self.index_path.name + ".offsets.i64")
+        self.parts_path = self.index_path.with_name(self.index_path.name + ".parts.i32")
+        self.meta_path = self.index_path.with_name(self.index_path.name + ".meta.json")
+
+        self._matrix = np.empty((0, _DIM), dtype=np.float32)
+        self._offsets = np.empty((0,), dtype=np.int64)
+        self._parts = np.empty((0,), dtype=np.int32)
+        self._size = 0
+        self._persisted = 0  # rows already in the row files
+        self._watermark = 0  # JSONL bytes covered by the rows in memory
+        self._cache: Dict[int, TrialRecord] = {}
+        self.partitions: List[Partition] = []  # position = partition code
+        self._codes: Dict[PartitionKey, int] = {}
+        self._pending = 0  # rows or index changes not yet written to disk
+        self._last_flush = time.monotonic()
+
+        with self._locked():
+            if not self._open_persisted():
+                self._reset_persisted()
+            self._catch_up()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    @property
+    def records(self) -> List[TrialRecord]:
+        """Every record, hydrated. Reads the whole JSONL; prefer ``query``/``get_records``."""
+        return self.get_records(range(self._size))
+
+    def _row_files(self):
+        return (
+            (self.matrix_path, np.float32, (_DIM,)),
+            (self.offsets_path, np.int64, ()),
+            (self.parts_path, np.int32, ()),
+        )
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the JSONL, shared with every other writer of these files."""
+        with self.records_path.open("ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _partition(self, key: PartitionKey) -> int:
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.partitions)
+            self.partitions.append(Partition(key, self.spec, _DIM))
+        return code
+
+    # ------------------------------------------------------------------ open
 
-        self.records: List[TrialRecord] = []
-        self.matrix = np.empty((0, 13), dtype=np.float32)
-        self.index = None
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != _LAYOUT_VERSION or meta.get("dim") != _DIM:
+            return None
+        return meta
 
-        self._load_records()
-        self._rebuild_index()
+    def _read_indexes(self, meta: Dict[str, Any]) -> Dict[int, Any]:
+        """Persisted partition indexes, if they were built with the configured index settings."""
+        if not faiss or meta.get("index_spec") != asdict(self.spec) or not self.index_path.exists():
+            return {}
+        try:
+            with np.load(self.index_path) as blobs:
+                return {int(name[1:]): faiss.deserialize_index(blobs[name]) for name in blobs.files}
+        except (OSError, ValueError, RuntimeError):
+            return {}
 
-    def _load_records(self) -> None:
+    def _open_persisted(self) -> bool:
+        """Memory-maps the persisted rows; False when they are missing or do not match the JSONL."""
+        meta = self._read_meta()
+        if meta is None or not self.records_path.exists():
+            return False
+        rows, watermark = int(meta["rows"]), int(meta["watermark"])
+        try:
+            if self.records_path.stat().st_size < watermark:
+                return False  # JSONL was truncated or replaced
+            # Rows appended after the last meta write belong to an unfinished flush; drop them.
+            for path, dtype, shape in self._row_files():
+                row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+                if path.stat().st_size < rows * row_bytes:
+                    return False
+                if path.stat().st_size > rows * row_bytes:
+                    os.truncate(path, rows * row_bytes)
+        except OSError:
+            return False
+
+        if rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(rows, _DIM))
+            self._offsets = np.memmap(self.offsets_path, dtype=np.int64, mode="r", shape=(rows,))
+            self._parts = np.memmap(self.parts_path, dtype=np.int32, mode="r", shape=(rows,))
+        self._size = self._persisted = rows
+        self._watermark = watermark
+
+        indexes = self._read_indexes(meta)
+        for code, part_meta in enumerate(meta.get("partitions", [])):
+            partition = self.partitions[self._partition(tuple(part_meta["key"]))]
+            ids = np.flatnonzero(self._parts[:rows] == code).astype(np.int64)
+            partition.rows, partition.size = ids, len(ids)
+            partition.load_meta(part_meta)
+            if faiss:
+                partition.attach(indexes.get(code), self._matrix)
+                if code not in indexes or indexes[code].ntotal != partition.size:
+                    self._pending += 1  # the index file lags the rows; rewrite it on flush
+        return True
+
+    def _reset_persisted(self) -> None:
+        """Starts the row files over; ``_catch_up`` then rebuilds them from the whole JSONL."""
+        for path, _, _ in self._row_files():
+            path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
+        self._matrix = np.empty((0, _DIM), dtype=np.float32)
+        self._offsets = np.empty((0,), dtype=np.int64)
+        self._parts = np.empty((0,), dtype=np.int32)
+        self._size = self._persisted = self._watermark = 0
+        self.partitions, self._codes = [], {}
+
+    def _catch_up(self) -> None:
+        """
+        Embeds the JSONL lines written past the watermark (by a crash or another process).
+        Called with ``_locked`` held, so a line without its newline is a torn write.
+        """
         if not self.records_path.exists():
             return
-        with self.records_path.open("r", encoding="utf-8") as f:
+        offsets: List[int] = []
+        rows: List[Dict[str, Any]] = []
+        with self.records_path.open("rb") as f:
+            f.seek(self._watermark)
+            pos = self._watermark
             for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+                if not line.endswith(b"\n"):
+                    break  # partial line from an interrupted write
+                start, pos = pos, pos + len(line)
                 try:
-                    self.records.append(TrialRecord.model_validate_json(line))
-                except Exception:
+                    row = json.loads(line)
+                except ValueError:
                     continue
+                if isinstance(row, dict) and "dataset" in row:
+                    offsets.append(start)
+                    rows.append(row)
+        if pos < self.records_path.stat().st_size and fcntl:
+            # Drop the torn tail so the next append starts on a fresh line. Without the
+            # lock it could be another writer's line in progress: skip it, keep the watermark.
+            os.truncate(self.records_path, pos)
+        self._append_rows(rows, offsets, pos)
+
+    # ------------------------------------------------------------------ write
 
-    def _rebuild_index(self) -> None:
-        if not self.records:
-            self.matrix = np.empty((0, 13), dtype=np.float32)
-            self.index = None
+    def _append_rows(self, rows: List[Dict[str, Any]], offsets: List[int], watermark: int) -> None:
+        self._watermark = watermark
+        if not rows:
             return
+        vectors = _ctx_matrix([_record_context(r) for r in rows])
+        codes = np.array([self._partition(partition_key(r.get("dataset"), r.get("search_space"))) for r in rows], dtype=np.int32)
+        first, needed = self._size, self._size + len(rows)
+        self._matrix = _grow(self._matrix, self._size, needed)
+        self._offsets = _grow(self._offsets, self._size, needed)
+        self._parts = _grow(self._parts, self._size, needed)
+        self._matrix[first:needed] = vectors
+        self._offsets[first:needed] = offsets
+        self._parts[first:needed] = codes
+        self._size = needed
+        for code in np.unique(codes).tolist():
+            self.partitions[code].add(first + np.flatnonzero(codes == code).astype(np.int64), self._matrix)
+        self._pending += len(rows)
 
-        self.matrix = np.vstack([_ctx_to_vector(self._record_context(r)) for r in self.records]).astype(np.float32)
+    def add(self, record: TrialRecord) -> None:
+        self.add_many([record])
 
-        if faiss:
-            self.index = faiss.IndexFlatL2(self.matrix.shape[1])
-            self.index.add(self.matrix)
-            faiss.write_index(self.index, str(self.index_path))
-        else:
-            self.index = None
-
-    def _record_context(self, record: TrialRecord) -> Dict[str, Any]:
-        ctx = dict(record.context)
-        ctx.update(
-            {
-                "dataset": record.dataset,
-                "params": record.params,
-                "value": record.value,
-                "model_params": record.model_params,
-                "flops": record.flops,
-                "emissions_kg": record.emissions_kg,
-            }
-        )
-        return ctx
+    def add_many(self, records: Iterable[TrialRecord]) -> None:
+        """Appends records with one JSONL write and one index update per partition."""
+        records = list(records)
+        if not records:
+            return
+        lines = [(r.model_dump_json() + "\n").encode("utf-8") for r in records]
+        # JSONL first: nothing persisted may get ahead of the records it points into.
+        with self._locked() as f:
+            # Lines other writers appended since the watermark come first, so rows keep the file's order.
+            self._catch_up()
+            f.seek(0, os.SEEK_END)
+            start = f.tell()
+            f.write(b"".join(lines))
+            f.flush()
+            # Otherwise (no lock) a skipped partial line sits before ours; a later catch-up embeds both.
+            if start == self._watermark:
+                offsets = (start + np.cumsum([0] + [len(line) for line in lines[:-1]])).tolist()
+                first_row = self._size
+                self._append_rows([r.model_dump() for r in records], offsets, start + sum(len(line) for line in lines))
+                for i, record in enumerate(records):
+                    self._cache[first_row + i] = record
 
-    def add(self, record: TrialRecord) -> None:
-        self.records.append(record)
-        with self.records_path.open("a", encoding="utf-8") as f:
-            f.write(record.model_dump_json() + "\n")
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def _write_atomic(self, path: Path, write) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
 
-        vec = _ctx_to_vector(self._record_context(record)).reshape(1, -1)
-        if self.matrix.size == 0:
-            self.matrix = vec.astype(np.float32)
-        else:
-            self.matrix = np.vstack([self.matrix, vec]).astype(np.float32)
+    def _write_rows(self) -> None:
+        """Brings the row files up to ``_size``: appends the new rows, or rewrites them if another writer flushed."""
+        meta = self._read_meta()
+        keys = [list(p.key) for p in self.partitions]
+        disk_keys = [list(m["key"]) for m in (meta or {}).get("partitions", [])]
+        # Appending is only valid on top of exactly the rows (and partition codes) this store persisted.
+        appendable = meta is not None and int(meta["rows"]) == self._persisted and disk_keys == keys[: len(disk_keys)]
+        arrays = (self._matrix, self._offsets, self._parts)
+        for (path, dtype, shape), array in zip(self._row_files(), arrays):
+            if appendable:
+                row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+                with path.open("ab") as f:
+                    f.truncate(self._persisted * row_bytes)  # drop rows of another writer's unfinished flush
+                    f.write(np.ascontiguousarray(array[self._persisted : self._size]).tobytes())
+            else:
+                self._write_atomic(path, lambda f, a=array: f.write(np.ascontiguousarray(a[: self._size]).tobytes()))
+        self._persisted = self._size
 
+    def _write_index_and_meta(self) -> None:
         if faiss:
-            if self.index is None:
-                self.index = faiss.IndexFlatL2(self.matrix.shape[1])
-            self.index.add(vec.astype(np.float32))
-            faiss.write_index(self.index, str(self.index_path))
+            blobs = {f"p{code}": faiss.serialize_index(p.index) for code, p in enumerate(self.partitions) if p.index is not None}
+            self._write_atomic(self.index_path, lambda f: np.savez(f, **blobs))
+        meta = {
+            "version": _LAYOUT_VERSION,
+            "dim": _DIM,
+            "rows": self._size,
+            "watermark": self._watermark,
+            "index_spec": asdict(self.spec),
+            "partitions": [p.to_meta() for p in self.partitions],
+        }
+        self._write_atomic(self.meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
 
-    def query(self, context: Dict[str, Any], k: int = 5) -> List[TrialRecord]:
-        if not self.records:
-            return []
+    def flush(self) -> None:
+        """
+        Persists new rows, the partition indexes and (last) the meta watermark.
+
+        Runs under the writers' lock, after embedding the lines other writers appended,
+        so this store covers the whole JSONL. Whatever it writes supersedes what they flushed.
+        """
+        with self._locked():
+            self._catch_up()
+            if self._pending:
+                self._write_rows()
+                self._write_index_and_meta()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+
+    # ------------------------------------------------------------------ read
+
+    def _hydrate(self, rows: Iterable[int]):
+        """(rows, records) for the given store rows that parse, reading each line by its byte offset."""
+        rows = [int(i) for i in rows]
+        missing = sorted({i for i in rows if i not in self._cache})
+        if missing:
+            with self.records_path.open("rb") as f:
+                for i in missing:
+                    f.seek(int(self._offsets[i]))
+                    try:
+                        self._cache[i] = TrialRecord.model_validate_json(f.readline())
+                    except ValueError:
+                        continue
+        kept = [i for i in rows if i in self._cache]
+        return kept, [self._cache[i] for i in kept]
+
+    def get_records(self, rows: Iterable[int]) -> List[TrialRecord]:
+        """Hydrates ``TrialRecord``s for ``rows``."""
+        return self._hydrate(rows)[1]
 
-        k = max(1, min(k, len(self.records)))
-        q = _ctx_to_vector(context).reshape(1, -1).astype(np.float32)
+    def _query_partitions(self, context: Dict[str, Any]) -> List[Partition]:
+        """Partitions matching the context's dataset and (when given) search space."""
+        dataset = context.get("dataset")
+        search_space = context.get("search_space")
+        return [
+            p
+            for p in self.partitions
+            if (dataset is None or p.key[0] == str(dataset).upper()) and (search_space is None or p.key[1] == str(search_space))
+        ]
 
-        if faiss and self.index is not None:
-            _, idx = self.index.search(q, k)
-            return [self.records[int(i)] for i in idx[0] if int(i) >= 0]
+    def partition_rows(self, context: Dict[str, Any]) -> np.ndarray:
+        """Store rows of every partition matching the context, oldest first."""
+        rows = [p.ids for p in self._query_partitions(context)]
+        return np.sort(np.concatenate(rows)) if rows else np.empty((0,), dtype=np.int64)
 
-        # Numpy fallback if faiss is unavailable.
-        distances = np.linalg.norm(self.matrix - q, axis=1)
-        order = np.argsort(distances)[:k]
-        return [self.records[int(i)] for i in order.tolist()]
+    def search_many(self, contexts: List[Dict[str, Any]], k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Squared distances and store rows of the ``k`` nearest records for each context.
+
+        Contexts are embedded into one matrix, and each partition runs a single search
+        for all the contexts that target it. Returns ``(len(contexts), k)`` arrays
+        padded with ``inf`` / ``-1``.
+        """
+        m, k = len(contexts), max(1, int(k))
+        dist = np.full((m, k), np.inf, dtype=np.float32)
+        ids = np.full((m, k), -1, dtype=np.int64)
+        if not m or not self._size:
+            return dist, ids
+        queries = _ctx_matrix(contexts)
+        targets: Dict[int, List[int]] = {}
+        for qi, context in enumerate(contexts):
+            for partition in self._query_partitions(context):
+                targets.setdefault(self._codes[partition.key], []).append(qi)
+        for code, rows in targets.items():
+            rows_arr = np.asarray(rows, dtype=np.int64)
+            part_dist, part_ids = self.partitions[code].search_many(queries[rows_arr], k, self._matrix)
+            # Merge with what earlier partitions found for the same queries.
+            merged_dist = np.concatenate([dist[rows_arr], part_dist], axis=1)
+            merged_ids = np.concatenate([ids[rows_arr], part_ids], axis=1)
+            order = np.argsort(merged_dist, axis=1, kind="stable")[:, :k]
+            dist[rows_arr] = np.take_along_axis(merged_dist, order, axis=1)
+            ids[rows_arr] = np.take_along_axis(merged_ids, order, axis=1)
+        return dist, ids
+
+    def search(self, context: Dict[str, Any], k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Squared distances and store rows of the ``k`` nearest records in the matching partitions."""
+        dist, ids = self.search_many([context], k=k)
+        keep = ids[0] >= 0
+        return dist[0][keep], ids[0][keep]
+
+    def query_many(self, contexts: List[Dict[str, Any]], k: int = 5) -> List[List[TrialRecord]]:
+        """Nearest records for each context, from one batched search and one pass over the JSONL."""
+        if not contexts:
+            return []
+        _, ids = self.search_many(contexts, k=k)
+        hydrated = {row: rec for row, rec in zip(*self._hydrate(ids[ids >= 0].tolist()))}
+        return [[hydrated[row] for row in row_ids.tolist() if row in hydrated] for row_ids in ids]
+
+    def query(self, context: Dict[str, Any], k: int = 5) -> List[TrialRecord]:
+        return self.query_many([context], k=k)[0]
@@ -0,0 +1,82 @@
+"""
+Network morphisms (Net2Net) for warm-starting a child architecture from a parent.
+
+Widening a layer copies randomly chosen parent units into the new slots and
+divides the next layer's input weights by each unit's replication count, so the
+widened network computes the same function (Net2WiderNet). Small noise on the
+copies' incoming weights breaks the symmetry between replicas. Narrowing keeps
+the first units. Kernels grow by zero-padding around the centre, which is
+function-preserving with ``padding = k // 2``, and shrink by centre-cropping.
+"""
+from typing import Dict, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+
+def resize_kernel(weight: torch.Tensor, k: int) -> torch.Tensor:
+    """Zero-pads or centre-crops the last two dims of a conv weight to ``k x k``."""
+    size = weight.shape[-1]
+    if k == size:
+        return weight.clone()
+    if k > size:
+        pad = (k - size) // 2
+        return F.pad(weight, (pad, k - size - pad, pad, k - size - pad))
+    start = (size - k) // 2
+    return weight[..., start : start + k, start : start + k].clone()
+
+
+def channel_map(parent: int, child: int, generator: Optional[torch.Generator] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    ``(index, scale)``: the parent unit each child unit copies, and the factor that
+    the next layer's input weights of that unit are multiplied by (1 / replicas).
+    """
+    if child <= parent:
+        return torch.arange(child), torch.ones(child)
+    extra = torch.randint(0, parent, (child - parent,), generator=generator)
+    index = torch.cat([torch.arange(parent), extra])
+    counts = torch.bincount(index, minlength=parent).float()
+    return index, 1.0 / counts[index]
+
+
+def _perturb(weight: torch.Tensor, start: int, noise: float, generator: Optional[torch.Generator]) -> torch.Tensor:
+    """Adds noise (relative to the weight's std) to the output units from ``start`` on: the replicas."""
+    if noise > 0 and start < weight.shape[0]:
+        scale = float(weight.std()) * noise
+        weight[start:] += torch.randn(weight[start:].shape, generator=generator) * scale
+    return weight
+
+
+def morph_simple_cnn(
+    parent_state: Dict[str, torch.Tensor],
+    parent_params: Dict[str, int],
+    child_params: Dict[str, int],
+    spatial: int,
+    noise: float = 0.01,
+    seed: Optional[int] = None,
+) -> Dict[str, torch.Tensor]:
+    """``SimpleCNN`` state dict for ``child_params`` derived from a trained parent's weights."""
+    generator = torch.Generator().manual_seed(int(seed)) if seed is not None else None
+    cp, cc = int(parent_params["conv_channels"]), int(child_params["conv_channels"])
+    k = int(child_params["kernel_size"])
+    state = {name: t.detach().float().cpu() for name, t in parent_state.items()}
+
+    g1, s1 = channel_map(cp, cc, generator)
+    g2, s2 = channel_map(cp * 2, cc * 2, generator)
+
+    conv1 = _perturb(resize_kernel(state["conv1.weight"], k)[g1], cp, noise, generator)
+    conv2 = resize_kernel(state["conv2.weight"], k)[g2][:, g1] * s1[None, :, None, None]
+    conv2 = _perturb(conv2, cp * 2, noise, generator)
+    fc1 = state["fc1.weight"].view(state["fc1.weight"].shape[0], cp * 2, spatial, spatial)
+    fc1 = (fc1[:, g2] * s2[None, :, None, None]).reshape(fc1.shape[0], -1)
+
+    return {
+        "conv1.weight": conv1,
+        "conv1.bias": state["conv1.bias"][g1].clone(),
+        "conv2.weight": conv2,
+        "conv2.bias": state["conv2.bias"][g2].clone(),
+        "fc1.weight": fc1,
+        "fc1.bias": state["fc1.bias"].clone(),
+        "fc2.weight": state["fc2.weight"].clone(),
+        "fc2.bias": state["fc2.bias"].clone(),
+    }
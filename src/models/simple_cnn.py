@@ -16,6 +16,6 @@ class SimpleCNN(nn.Module):
     def forward(self, x):
         x = self.pool(F.relu(self.conv1(x)))
         x = self.pool(F.relu(self.conv2(x)))
-        x = x.view(x.size(0), -1)
+        x = x.flatten(1)
         x = self.drop(F.relu(self.fc1(x)))
         return self.fc2(x)
@@ -0,0 +1,88 @@
+"""
+Weight-sharing supernet for the SimpleCNN search space.
+
+The supernet holds the largest conv layers of the space (``max(conv_channels)``
+filters, ``max(kernel_size)`` kernels). A sub-architecture uses the first
+``conv_channels`` filters of conv1, the first ``2 * conv_channels`` of conv2,
+the matching input columns of fc1 and the centre ``kernel_size x kernel_size``
+crop of every kernel, so all candidates share one set of weights.
+
+In train mode every forward pass samples a random sub-architecture (uniform
+over the channel and kernel choices), so a plain training loop trains all of
+them at once. In eval mode the sub-architecture set with ``activate`` is used.
+``extract`` copies a sub-architecture's weights into a standalone ``SimpleCNN``.
+"""
+import random
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from models.simple_cnn import SimpleCNN
+
+
+class SimpleCNNSupernet(nn.Module):
+    def __init__(self, in_ch=1, num_classes=10, channel_choices=(16, 32, 48, 64), kernel_choices=(3, 5), dropout=0.1):
+        super().__init__()
+        self.channel_choices = sorted(int(c) for c in channel_choices)
+        self.kernel_choices = sorted(int(k) for k in kernel_choices)
+        c, k = self.channel_choices[-1], self.kernel_choices[-1]
+        self.in_ch = in_ch
+        self.num_classes = num_classes
+        self.max_channels, self.max_kernel = c, k
+        # Same spatial size as SimpleCNN's fc1 (28x28 -> 7x7, 32x32 -> 8x8).
+        self.spatial = 7 if in_ch == 1 else 8
+        self.conv1 = nn.Conv2d(in_ch, c, k, padding=k // 2)
+        self.conv2 = nn.Conv2d(c, c * 2, k, padding=k // 2)
+        self.pool = nn.MaxPool2d(2, 2)
+        self.drop = nn.Dropout(dropout)
+        self.fc1 = nn.Linear(c * 2 * self.spatial * self.spatial, 128)
+        self.fc2 = nn.Linear(128, num_classes)
+        self.active = (c, k)
+
+    def activate(self, params):
+        """Selects the sub-architecture used in eval mode."""
+        self.active = (int(params["conv_channels"]), int(params["kernel_size"]))
+        return self
+
+    def _kernel(self, weight, k):
+        start = (self.max_kernel - k) // 2
+        return weight[..., start : start + k, start : start + k]
+
+    def _fc1_weight(self, channels):
+        # fc1 inputs are laid out channel-major: (2C, s, s) flattened.
+        weight = self.fc1.weight.view(128, self.max_channels * 2, self.spatial, self.spatial)
+        return weight[:, : channels * 2].reshape(128, -1)
+
+    def forward(self, x):
+        if self.training:
+            c, k = random.choice(self.channel_choices), random.choice(self.kernel_choices)
+        else:
+            c, k = self.active
+        x = F.conv2d(x, self._kernel(self.conv1.weight[:c], k), self.conv1.bias[:c], padding=k // 2)
+        x = self.pool(F.relu(x))
+        x = F.conv2d(x, self._kernel(self.conv2.weight[: c * 2, :c], k), self.conv2.bias[: c * 2], padding=k // 2)
+        x = self.pool(F.relu(x))
+        x = x.flatten(1)
+        x = self.drop(F.relu(F.linear(x, self._fc1_weight(c), self.fc1.bias)))
+        return self.fc2(x)
+
+    @torch.no_grad()
+    def extract(self, params):
+        """A standalone ``SimpleCNN`` initialised with the shared weights of ``params``."""
+        c, k = int(params["conv_channels"]), int(params["kernel_size"])
+        model = SimpleCNN(
+            in_ch=self.in_ch,
+            num_classes=self.num_classes,
+            conv_channels=c,
+            kernel_size=k,
+            dropout=float(params.get("dropout", self.drop.p)),
+        ).to(self.conv1.weight.device)
+        model.conv1.weight.copy_(self._kernel(self.conv1.weight[:c], k))
+        model.conv1.bias.copy_(self.conv1.bias[:c])
+        model.conv2.weight.copy_(self._kernel(self.conv2.weight[: c * 2, :c], k))
+        model.conv2.bias.copy_(self.conv2.bias[: c * 2])
+        model.fc1.weight.copy_(self._fc1_weight(c))
+        model.fc1.bias.copy_(self.fc1.bias)
+        model.fc2.load_state_dict(self.fc2.state_dict())
+        return model
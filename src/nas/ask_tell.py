@@ -0,0 +1,268 @@
+"""
+Ask/tell driver for the Optuna search.
+
+Instead of handing control to ``study.optimize``, ``AskTellDriver`` asks the
+study for trials, samples their params right away (so the sampler sees them as
+pending), hands them to an execution backend and tells each result back as soon
+as it completes. Up to ``batch_size`` trials are in flight; with the study's
+``TPESampler(constant_liar=True)`` the pending trials count as bad results
+while new trials are sampled, which keeps concurrent samples diverse.
+
+Backends:
+
+- ``inline``: one trial at a time in this thread, on the live trial (pruning works).
+- ``thread``: a thread pool sharing the run's ``TrialRunner``; torch releases the
+  GIL inside its kernels, so small models overlap.
+- ``process``: spawned worker processes, each with its own ``TrialRunner``. A
+  worker runs a ``FixedTrial`` with the params sampled here and returns the
+  user attrs, records and (when it beat the worker's best or joined its
+  Pareto front) the weights; the driver merges them. Fixed trials never prune.
+- ``batched``: each batch of asked trials trains as vmapped populations
+  (``TrialRunner.run_population``).
+"""
+from __future__ import annotations
+
+import concurrent.futures as cf
+import copy
+import multiprocessing as mp
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import optuna
+
+from contracts import TrialRecord
+from nas.objective import ObjectiveValue, is_better
+from nas.parallel import resolve_threads_per_worker
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("inline", "thread", "process", "batched")
+TrialState = optuna.trial.TrialState
+
+
+@dataclass
+class TrialOutcome:
+    number: int
+    state: TrialState
+    value: Optional[ObjectiveValue] = None
+    user_attrs: Dict[str, Any] = field(default_factory=dict)  # set on the live trial (process backend)
+    records: List[Dict[str, Any]] = field(default_factory=list)  # completed records the parent still has to store
+    best: Optional[Dict[str, Any]] = None  # worker best_state when this trial improved it
+    front: Optional[Dict[str, Any]] = None  # Pareto-front payload when this trial joined the worker's front
+
+
+def _run_live(runner, trial: optuna.trial.Trial) -> TrialOutcome:
+    try:
+        return TrialOutcome(trial.number, TrialState.COMPLETE, runner(trial))
+    except optuna.TrialPruned:
+        return TrialOutcome(trial.number, TrialState.PRUNED)
+
+
+def _completed(outcome: TrialOutcome) -> cf.Future:
+    future: cf.Future = cf.Future()
+    future.set_result(outcome)
+    return future
+
+
+class InlineBackend:
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    def submit(self, trials: List[optuna.trial.Trial]) -> List[cf.Future]:
+        return [_completed(_run_live(self.runner, trial)) for trial in trials]
+
+    def close(self) -> None:
+        pass
+
+
+class ThreadBackend:
+    def __init__(self, runner, n_workers: int) -> None:
+        self.runner = runner
+        self.pool = cf.ThreadPoolExecutor(max_workers=max(1, n_workers), thread_name_prefix="trial")
+
+    def submit(self, trials: List[optuna.trial.Trial]) -> List[cf.Future]:
+        return [self.pool.submit(_run_live, self.runner, trial) for trial in trials]
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+class BatchedBackend:
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    def submit(self, trials: List[optuna.trial.Trial]) -> List[cf.Future]:
+        return [_completed(TrialOutcome(t.number, state, value)) for t, state, value in self.runner.run_population(trials)]
+
+    def close(self) -> None:
+        pass
+
+
+_WORKER_RUNNER = None
+
+
+def _init_worker(cfg: Dict[str, Any], device: str, guidance: Optional[Dict[str, Any]], threads: int) -> None:
+    import os
+
+    import torch
+
+    from nas.objective import TrialRunner
+    from nas.session import get_search_session
+    from utils.env import set_seed
+
+    global _WORKER_RUNNER
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    set_seed(int(cfg.get("seed", 42)) + os.getpid())
+    _WORKER_RUNNER = TrialRunner(cfg, device, get_search_session(cfg), guidance=guidance)
+
+
+def _run_detached(number: int, params: Dict[str, Any]) -> TrialOutcome:
+    runner = _WORKER_RUNNER
+    trial = optuna.trial.FixedTrial(params, number=number)
+    n_records, best_before = len(runner.records), runner.best_state["value"]
+    try:
+        state, value = TrialState.COMPLETE, runner(trial)
+    except optuna.TrialPruned:
+        state, value = TrialState.PRUNED, None
+    improved = state == TrialState.COMPLETE and runner.best_state["value"] != best_before
+    front = None
+    if runner.front is not None and number in runner.front:
+        front = next(m.payload for m in runner.front.members() if m.number == number)
+    return TrialOutcome(
+        number,
+        state,
+        value,
+        user_attrs=dict(trial.user_attrs),
+        records=[r.model_dump(mode="json") for r in runner.records[n_records:]],
+        best=dict(runner.best_state) if improved else None,
+        front=front,
+    )
+
+
+class ProcessBackend:
+    def __init__(self, cfg: Dict[str, Any], device, guidance: Optional[Dict[str, Any]], n_workers: int) -> None:
+        cfg = copy.deepcopy(cfg)
+        # Loader workers would oversubscribe the cores split between trial workers;
+        # the memory store is written by the parent only.
+        cfg["num_workers"] = 0
+        cfg.setdefault("memory", {})["enabled"] = False
+        threads = resolve_threads_per_worker(n_workers, (cfg.get("optuna") or {}).get("threads_per_worker"))
+        self.pool = cf.ProcessPoolExecutor(
+            max_workers=max(1, n_workers),
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(cfg, str(device), guidance, threads),
+        )
+
+    def submit(self, trials: List[optuna.trial.Trial]) -> List[cf.Future]:
+        return [self.pool.submit(_run_detached, trial.number, dict(trial.params)) for trial in trials]
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+def make_backend(name: str, runner, cfg: Dict[str, Any], device, n_workers: int):
+    name = str(name or "inline").strip().lower()
+    if name == "inline":
+        return InlineBackend(runner)
+    if name == "thread":
+        return ThreadBackend(runner, n_workers)
+    if name == "process":
+        return ProcessBackend(cfg, device, runner.guidance, n_workers)
+    if name == "batched":
+        return BatchedBackend(runner)
+    raise ValueError(f"Unsupported trial backend: {name}. Available: {list(BACKENDS)}")
+
+
+class AskTellDriver:
+    """
+    Runs ``n_trials`` trials of ``study`` on ``backend`` with up to ``batch_size`` in flight.
+
+    With a ``proposer`` (``ask(n) -> [params]``, ``tell(params, value)``, e.g.
+    ``RegularizedEvolution``) the params of each batch come from the proposer and
+    are enqueued into the study, once trials already waiting in its queue have run;
+    completed values are told back to it.
+    """
+
+    def __init__(
+        self,
+        study: optuna.study.Study,
+        runner,
+        backend,
+        n_trials: int,
+        batch_size: int = 1,
+        timeout: Optional[float] = None,
+        proposer=None,
+    ) -> None:
+        self.study = study
+        self.runner = runner
+        self.backend = backend
+        self.n_trials = int(n_trials)
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = float(timeout) if timeout else None
+        self.proposer = proposer
+        # Whole batches for the batched backend; the others refill as soon as a trial finishes.
+        self.refill = not isinstance(backend, BatchedBackend)
+
+    def _ask_batch(self, n: int) -> List[optuna.trial.Trial]:
+        if self.proposer is not None:
+            waiting = len(self.study.get_trials(deepcopy=False, states=(TrialState.WAITING,)))
+            for params in self.proposer.ask(max(0, n - waiting)):
+                self.study.enqueue_trial(params)
+        return [self._ask() for _ in range(n)]
+
+    def _ask(self) -> optuna.trial.Trial:
+        trial = self.study.ask()
+        # Sampling now registers the params as pending, so the next asks (constant liar) avoid them.
+        self.runner.search_space.sample(trial, guidance=self.runner.guidance)
+        return trial
+
+    def _tell(self, trial: optuna.trial.Trial, outcome: TrialOutcome) -> None:
+        for key, value in outcome.user_attrs.items():
+            trial.set_user_attr(key, value)
+        if outcome.records:
+            records = [TrialRecord.model_validate(raw) for raw in outcome.records]
+            self.runner.records.extend(records)
+            if self.runner.memory_store is not None:
+                self.runner.memory_store.add_many(records)
+        if outcome.best is not None and is_better(outcome.best["value"], self.runner.best_state["value"], self.runner.direction):
+            self.runner.best_state = outcome.best
+        if outcome.front is not None and self.runner.front is not None:
+            self.runner.front.add(outcome.number, outcome.value, outcome.front)
+        self.study.tell(trial, outcome.value if outcome.state == TrialState.COMPLETE else None, state=outcome.state)
+        if self.proposer is not None and outcome.state == TrialState.COMPLETE:
+            self.proposer.tell(dict(trial.params), outcome.value)
+
+    def run(self) -> int:
+        start = time.perf_counter()
+        asked = 0
+        pending: Dict[cf.Future, optuna.trial.Trial] = {}
+        try:
+            while True:
+                in_time = self.timeout is None or time.perf_counter() - start < self.timeout
+                free = self.batch_size - len(pending)
+                if in_time and asked < self.n_trials and (free == self.batch_size or (self.refill and free > 0)):
+                    trials = self._ask_batch(min(free, self.n_trials - asked))
+                    asked += len(trials)
+                    pending.update(zip(self.backend.submit(trials), trials))
+                if not pending:
+                    break
+                done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                for future in done:
+                    trial = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as exc:
+                        logger.warning(f"Trial {trial.number} failed: {exc}")
+                        self.study.tell(trial, state=TrialState.FAIL)
+                        continue
+                    self._tell(trial, outcome)
+        finally:
+            self.backend.close()
+        return asked
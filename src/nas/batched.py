@@ -0,0 +1,196 @@
+"""
+Vectorized training of a population of same-shape models.
+
+Candidates that only differ in float hyperparameters (dropout, lr) have
+identical parameter shapes, and each is too small to keep the device busy on
+its own. ``BatchedTrainer`` stacks K such models (``torch.func.stack_module_state``)
+and runs them as one computation with ``vmap`` over ``functional_call``: every
+mini-batch goes through all K members in a single forward/backward pass.
+
+Members keep their own hyperparameters:
+
+- dropout modules are swapped for ``TensorDropout``, whose rate is a buffer and
+  is therefore stacked per member (``vmap`` draws different masks per member);
+- the optimizer is a stacked AdamW (same defaults as ``torch.optim.AdamW``)
+  with a per-member learning rate and step count.
+
+The summed per-member losses give each member exactly its own gradients, so
+training K members together matches training them one by one on the same
+batches. ``write_back`` copies the trained weights into the original models and
+``optimizer_state``/``states`` carry a member's AdamW state to a later trainer.
+"""
+from __future__ import annotations
+
+import copy
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.func import functional_call, stack_module_state, vmap
+
+from nas.engine import EpochResult, TrainingCancelled, TrainingEngine
+
+MemberState = Dict[str, Any]  # {"step": int, "exp_avg": {name: tensor}, "exp_avg_sq": {name: tensor}}
+
+
+def population_key(model: nn.Module) -> Tuple[Any, ...]:
+    """Models with the same key have the same parameter names and shapes and can be stacked."""
+    return (type(model).__name__,) + tuple((name, tuple(p.shape)) for name, p in model.named_parameters())
+
+
+def group_by_shape(items: Iterable[Tuple[Any, nn.Module]]) -> List[List[Any]]:
+    """Groups ``(item, model)`` pairs by ``population_key``, keeping first-seen order."""
+    groups: Dict[Tuple[Any, ...], List[Any]] = {}
+    for item, model in items:
+        groups.setdefault(population_key(model), []).append(item)
+    return list(groups.values())
+
+
+class TensorDropout(nn.Module):
+    """Dropout whose rate is a buffer, so stacked members can each have their own."""
+
+    def __init__(self, p: float) -> None:
+        super().__init__()
+        self.register_buffer("p", torch.tensor(float(p)))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if not self.training:
+            return x
+        return x * (torch.rand_like(x) >= self.p) / (1.0 - self.p)
+
+
+def _with_tensor_dropout(model: nn.Module) -> nn.Module:
+    for name, module in list(model.named_modules()):
+        for child_name, child in list(module.named_children()):
+            if isinstance(child, nn.Dropout):
+                setattr(module, child_name, TensorDropout(child.p))
+    return model
+
+
+class BatchedTrainer:
+    def __init__(
+        self,
+        models: Sequence[nn.Module],
+        lrs: Sequence[float],
+        engine: TrainingEngine,
+        states: Optional[Sequence[Optional[MemberState]]] = None,
+        weight_decay: float = 0.01,
+        betas: Tuple[float, float] = (0.9, 0.999),
+        eps: float = 1e-8,
+    ) -> None:
+        if not models:
+            raise ValueError("BatchedTrainer needs at least one model")
+        self.models = list(models)
+        self.engine = engine
+        device = engine.device
+        members = [_with_tensor_dropout(copy.deepcopy(m)).to(device) for m in self.models]
+        self.template = copy.deepcopy(members[0]).to("meta")
+        self.params, self.buffers = stack_module_state(members)
+        self.size = len(members)
+        self.weight_decay, self.betas, self.eps = float(weight_decay), betas, float(eps)
+        self.lr = torch.tensor([float(lr) for lr in lrs], device=device)
+
+        states = list(states or [None] * self.size)
+        self.step = torch.tensor([float((s or {}).get("step", 0)) for s in states], device=device)
+        self.exp_avg: Dict[str, torch.Tensor] = {}
+        self.exp_avg_sq: Dict[str, torch.Tensor] = {}
+        for name, p in self.params.items():
+            self.exp_avg[name] = torch.stack([
+                (s["exp_avg"][name].to(device) if s else torch.zeros_like(p[i])) for i, s in enumerate(states)
+            ])
+            self.exp_avg_sq[name] = torch.stack([
+                (s["exp_avg_sq"][name].to(device) if s else torch.zeros_like(p[i])) for i, s in enumerate(states)
+            ])
+
+        def member_forward(params, buffers, x):
+            return functional_call(self.template, (params, buffers), (x,))
+
+        self._forward = vmap(member_forward, in_dims=(0, 0, None), randomness="different")
+
+    def _per_member(self, t: torch.Tensor, like: torch.Tensor) -> torch.Tensor:
+        return t.view((-1,) + (1,) * (like.dim() - 1))
+
+    @torch.no_grad()
+    def _adamw_step(self) -> None:
+        beta1, beta2 = self.betas
+        self.step += 1
+        bias1 = 1 - beta1 ** self.step
+        bias2_sqrt = (1 - beta2 ** self.step).sqrt()
+        for name, p in self.params.items():
+            grad = p.grad
+            if grad is None:
+                continue
+            lr = self._per_member(self.lr, p)
+            p.mul_(1 - lr * self.weight_decay)
+            m, v = self.exp_avg[name], self.exp_avg_sq[name]
+            m.lerp_(grad, 1 - beta1)
+            v.mul_(beta2).addcmul_(grad, grad, value=1 - beta2)
+            denom = (v.sqrt() / self._per_member(bias2_sqrt, p)).add_(self.eps)
+            p.sub_(lr / self._per_member(bias1, p) * m / denom)
+            p.grad = None
+
+    def _loss(self, x: torch.Tensor, y: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        out = self._forward(self.params, self.buffers, x)  # (K, B, classes)
+        k, b = out.shape[0], out.shape[1]
+        losses = F.cross_entropy(out.reshape(k * b, -1), y.repeat(k), reduction="none").view(k, b).mean(dim=1)
+        return losses, out
+
+    def train_epoch(self, loader, stop_event=None) -> List[EpochResult]:
+        """One pass over ``loader`` training every member; returns per-member results."""
+        self.template.train()
+        loss_sum = torch.zeros(self.size, device=self.engine.device)
+        correct = torch.zeros(self.size, device=self.engine.device)
+        count, start = 0, time.perf_counter()
+        for x, y in loader:
+            if stop_event is not None and stop_event.is_set():
+                raise TrainingCancelled("training stopped")
+            x, y = self.engine._to_device(x, y)
+            losses, out = self._loss(x, y)
+            losses.sum().backward()
+            self._adamw_step()
+            loss_sum += losses.detach() * y.shape[0]
+            correct += (out.detach().argmax(dim=-1) == y).sum(dim=1)
+            count += int(y.shape[0])
+        return self._results(loss_sum, correct, count, time.perf_counter() - start)
+
+    @torch.no_grad()
+    def evaluate(self, loader, stop_event=None) -> List[EpochResult]:
+        self.template.eval()
+        loss_sum = torch.zeros(self.size, device=self.engine.device)
+        correct = torch.zeros(self.size, device=self.engine.device)
+        count, start = 0, time.perf_counter()
+        for x, y in loader:
+            if stop_event is not None and stop_event.is_set():
+                raise TrainingCancelled("evaluation stopped")
+            x, y = self.engine._to_device(x, y)
+            losses, out = self._loss(x, y)
+            loss_sum += losses * y.shape[0]
+            correct += (out.argmax(dim=-1) == y).sum(dim=1)
+            count += int(y.shape[0])
+        return self._results(loss_sum, correct, count, time.perf_counter() - start)
+
+    def _results(self, loss_sum: torch.Tensor, correct: torch.Tensor, count: int, seconds: float) -> List[EpochResult]:
+        # One host sync per epoch; every member saw the same samples in the same time.
+        losses, accs = (loss_sum / max(1, count)).tolist(), (correct / max(1, count)).tolist()
+        return [EpochResult(loss=l, acc=a, samples=count, seconds=seconds) for l, a in zip(losses, accs)]
+
+    @torch.no_grad()
+    def write_back(self) -> List[nn.Module]:
+        """Copies each member's trained weights into its original model and returns the models."""
+        for i, model in enumerate(self.models):
+            own = dict(model.named_parameters())
+            for name, p in self.params.items():
+                own[name].copy_(p[i])
+        return self.models
+
+    def optimizer_state(self, i: int) -> MemberState:
+        return {
+            "step": int(self.step[i].item()),
+            "exp_avg": {k: v[i].detach().clone() for k, v in self.exp_avg.items()},
+            "exp_avg_sq": {k: v[i].detach().clone() for k, v in self.exp_avg_sq.items()},
+        }
+
+    def states(self) -> List[MemberState]:
+        return [self.optimizer_state(i) for i in range(self.size)]
@@ -0,0 +1,199 @@
+"""
+Shared training engine used by the Optuna objective and the TrainerAgent.
+
+Performance features are opt-in through the ``training`` config section:
+autocast (bf16 on CPU, fp16 + GradScaler on CUDA), ``channels_last`` memory
+format, fused/foreach AdamW, ``torch.inference_mode`` evaluation and
+``torch.compile``. Every epoch reports its throughput in samples/s.
+
+Epochs can be stopped cooperatively: when the optional ``stop_event`` is set
+(e.g. by a timed-out or cancelled trial), the loop raises ``TrainingCancelled``
+at the next batch.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from contextlib import nullcontext
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Optional
+
+import torch
+import torch.nn as nn
+
+from utils.logger import get_logger
+from utils.metrics import MetricAccumulator
+
+logger = get_logger(__name__)
+
+
+class TrainingCancelled(RuntimeError):
+    """Raised inside an epoch once its ``stop_event`` is set."""
+
+
+def _check_stop(stop_event: Optional[threading.Event]) -> None:
+    if stop_event is not None and stop_event.is_set():
+        raise TrainingCancelled("training stopped by request")
+
+
+@dataclass
+class EngineConfig:
+    amp: bool = False
+    channels_last: bool = False
+    optimizer_impl: str = "auto"  # auto | default | foreach | fused
+    inference_mode: bool = True
+    compile: bool = False
+    log_interval: int = 0
+
+    @classmethod
+    def from_cfg(cls, training_cfg: Optional[Dict[str, Any]]) -> "EngineConfig":
+        training_cfg = training_cfg or {}
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in training_cfg.items() if k in known and v is not None})
+
+
+@dataclass
+class EpochResult:
+    loss: float
+    acc: float
+    samples: int
+    seconds: float
+
+    @property
+    def samples_per_s(self) -> float:
+        return self.samples / self.seconds if self.seconds > 0 else 0.0
+
+
+class _Compiled:
+    """A model's ``torch.compile`` wrapper, kept on the model itself; copies of the model start uncompiled."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable) -> None:
+        self.fn = fn
+
+    def __deepcopy__(self, memo) -> None:
+        return None
+
+
+class TrainingEngine:
+    """Runs train/eval epochs for a model with the configured performance features."""
+
+    def __init__(self, device, config: Optional[EngineConfig] = None) -> None:
+        self.device = torch.device(device)
+        self.config = config or EngineConfig()
+        self._scalers: "weakref.WeakKeyDictionary[torch.optim.Optimizer, Any]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any], device) -> "TrainingEngine":
+        return cls(device, EngineConfig.from_cfg(cfg.get("training")))
+
+    def prepare(self, model: nn.Module) -> nn.Module:
+        """Moves the model to the device/memory format and compiles it when enabled."""
+        model = model.to(self.device)
+        if self.config.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        # The wrapper references the model, so it lives on the model (a collectable cycle),
+        # not in an engine-level map that would keep every trial's model alive.
+        if self.config.compile and getattr(model, "_nas_compiled", None) is None:
+            try:
+                model._nas_compiled = _Compiled(torch.compile(model))
+            except Exception as exc:
+                logger.warning(f"torch.compile unavailable, running eagerly: {exc}")
+        return model
+
+    def make_optimizer(self, model: nn.Module, lr: float) -> torch.optim.Optimizer:
+        impl = self.config.optimizer_impl
+        if impl == "auto":
+            impl = "fused" if self.device.type == "cuda" else "foreach"
+        kwargs: Dict[str, Any] = {}
+        if impl == "fused":
+            kwargs["fused"] = True
+        elif impl == "foreach":
+            kwargs["foreach"] = True
+        try:
+            return torch.optim.AdamW(model.parameters(), lr=float(lr), **kwargs)
+        except (RuntimeError, TypeError) as exc:
+            logger.warning(f"AdamW({impl}) unavailable, using default implementation: {exc}")
+            return torch.optim.AdamW(model.parameters(), lr=float(lr))
+
+    def _forward_fn(self, model: nn.Module) -> Callable:
+        compiled = getattr(model, "_nas_compiled", None)
+        return compiled.fn if compiled is not None else model
+
+    def _autocast(self):
+        if not self.config.amp:
+            return nullcontext()
+        if self.device.type == "cuda":
+            return torch.autocast("cuda", dtype=torch.float16)
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+
+    def _scaler(self, optimizer: torch.optim.Optimizer):
+        if not (self.config.amp and self.device.type == "cuda"):
+            return None
+        if optimizer not in self._scalers:
+            self._scalers[optimizer] = torch.amp.GradScaler("cuda")
+        return self._scalers[optimizer]
+
+    def _to_device(self, x: torch.Tensor, y: torch.Tensor):
+        x = x.to(self.device, non_blocking=True)
+        y = y.to(self.device, non_blocking=True)
+        if self.config.channels_last and x.dim() == 4:
+            x = x.contiguous(memory_format=torch.channels_last)
+        return x, y
+
+    def train_epoch(
+        self,
+        model: nn.Module,
+        loader,
+        optimizer: torch.optim.Optimizer,
+        criterion,
+        on_log: Optional[Callable[[int, float, float], None]] = None,
+        on_step: Optional[Callable[[int], None]] = None,
+        step_interval: int = 0,
+        stop_event: Optional[threading.Event] = None,
+    ) -> EpochResult:
+        """Trains one epoch; ``on_step(step)`` runs every ``step_interval`` batches (and may raise to stop)."""
+        model.train()
+        forward = self._forward_fn(model)
+        scaler = self._scaler(optimizer)
+        meter = MetricAccumulator(self.device, log_interval=self.config.log_interval, on_log=on_log)
+        start = time.perf_counter()
+        for x, y in loader:
+            _check_stop(stop_event)
+            x, y = self._to_device(x, y)
+            optimizer.zero_grad(set_to_none=True)
+            with self._autocast():
+                out = forward(x)
+                loss = criterion(out, y)
+            if scaler is not None:
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+            else:
+                loss.backward()
+                optimizer.step()
+            meter.update(loss, out, y)
+            if on_step is not None and step_interval > 0 and meter.steps % step_interval == 0:
+                on_step(meter.steps)
+                model.train()
+        loss_avg, acc = meter.compute()
+        return EpochResult(loss=loss_avg, acc=acc, samples=meter.count, seconds=time.perf_counter() - start)
+
+    def evaluate(self, model: nn.Module, loader, criterion, stop_event: Optional[threading.Event] = None) -> EpochResult:
+        model.eval()
+        forward = self._forward_fn(model)
+        meter = MetricAccumulator(self.device)
+        grad_ctx = torch.inference_mode if self.config.inference_mode else torch.no_grad
+        start = time.perf_counter()
+        with grad_ctx():
+            for x, y in loader:
+                _check_stop(stop_event)
+                x, y = self._to_device(x, y)
+                with self._autocast():
+                    out = forward(x)
+                    loss = criterion(out, y)
+                meter.update(loss, out, y)
+        loss_avg, acc = meter.compute()
+        return EpochResult(loss=loss_avg, acc=acc, samples=meter.count, seconds=time.perf_counter() - start)
@@ -0,0 +1,137 @@
+"""
+Regularized (aging) evolution.
+
+The population is a fixed-capacity ring of architecture encodings
+(``search_space.encode``) and their fitness, held in numpy arrays. A new
+member replaces the oldest one, not the worst: every architecture ages out
+eventually, which keeps the search from over-trusting a lucky early result.
+
+``ask(n)`` returns a batch of ``n`` offspring. While the population holds fewer
+than ``warmup`` members, offspring are random samples from the search space.
+After that, each child comes from one tournament: ``sample_size`` random
+members are drawn and the fittest is mutated through ``search_space.mutate``.
+The ``n`` tournaments run as one vectorized numpy draw. ``tell`` adds the
+evaluated children back to the population.
+
+Fitness is stored as "higher is better"; for ``direction: minimize`` values
+are negated on the way in.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from nas.surrogate import sample_candidates
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Population:
+    """Aging population of ``(encoding, fitness)`` rows; full rings overwrite their oldest row."""
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.capacity = max(1, int(capacity))
+        self.encodings = np.zeros((self.capacity, int(dim)), dtype=np.float64)
+        self.fitness = np.zeros(self.capacity, dtype=np.float64)
+        self.size = 0
+        self.head = 0  # next row to write: the oldest member once the ring is full
+        self.added = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, encoding: List[float], fitness: float) -> None:
+        self.encodings[self.head] = encoding
+        self.fitness[self.head] = float(fitness)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.added += 1
+
+    def tournament(self, n: int, sample_size: int, rng: np.random.Generator) -> np.ndarray:
+        """Row indices of the winners of ``n`` tournaments of ``sample_size`` random members each."""
+        contestants = rng.integers(0, self.size, size=(int(n), max(1, min(int(sample_size), self.size))))
+        return contestants[np.arange(int(n)), self.fitness[contestants].argmax(axis=1)]
+
+    def best(self) -> int:
+        return int(self.fitness[: self.size].argmax())
+
+
+class RegularizedEvolution:
+    def __init__(
+        self,
+        search_space,
+        population_size: int = 32,
+        sample_size: int = 8,
+        warmup: int = 8,
+        direction: str = "maximize",
+        guidance: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not getattr(search_space, "supports_evolution", False):
+            raise ValueError(f"Search space {search_space.name} does not support evolution")
+        self.search_space = search_space
+        self.sample_size = max(1, int(sample_size))
+        self.warmup = max(1, int(warmup))
+        self.sign = -1.0 if str(direction).lower() == "minimize" else 1.0
+        self.guidance = guidance
+        self.rng = np.random.default_rng(seed)
+        self.population: Optional[Population] = None
+        self.capacity = max(1, int(population_size))
+        self.asked = 0
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any], search_space, guidance: Optional[Dict[str, Any]] = None, direction: str = "maximize") -> "RegularizedEvolution":
+        evolution_cfg = cfg.get("evolution") or {}
+        return cls(
+            search_space,
+            population_size=int(evolution_cfg.get("population_size", 32)),
+            sample_size=int(evolution_cfg.get("sample_size", 8)),
+            warmup=int(evolution_cfg.get("warmup", 8)),
+            direction=direction,
+            guidance=guidance,
+            seed=cfg.get("seed"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.population) if self.population is not None else 0
+
+    def ask(self, n: int) -> List[Dict[str, Any]]:
+        """``n`` offspring: random samples during warm-up, mutated tournament winners afterwards."""
+        n = max(0, int(n))
+        if n == 0:
+            return []
+        self.asked += n
+        if len(self) < self.warmup:
+            return sample_candidates(self.search_space, n, self.guidance, seed=int(self.rng.integers(2**31)))
+        parents = self.population.tournament(n, self.sample_size, self.rng)
+        return [self.search_space.mutate(self.search_space.decode(self.population.encodings[i]), self.rng, self.guidance) for i in parents]
+
+    def tell(self, params: Dict[str, Any], value: Optional[float]) -> None:
+        if value is None or not np.isfinite(value):
+            return
+        encoding = self.search_space.encode(params)
+        if self.population is None:
+            self.population = Population(self.capacity, len(encoding))
+        self.population.add(encoding, self.sign * float(value))
+
+    def tell_many(self, results: Iterable[Any]) -> None:
+        """Adds ``(params, value)`` pairs, e.g. to seed the population from earlier records."""
+        for params, value in results:
+            self.tell(params, value)
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        if not len(self):
+            return None
+        i = self.population.best()
+        return {"params": self.search_space.decode(self.population.encodings[i]), "value": self.sign * float(self.population.fitness[i])}
+
+    def stats(self) -> Dict[str, Any]:
+        best = self.best()
+        return {
+            "population": len(self),
+            "asked": self.asked,
+            "told": self.population.added if self.population is not None else 0,
+            "best_value": best["value"] if best else None,
+        }
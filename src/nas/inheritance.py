@@ -0,0 +1,158 @@
+"""
+Parent-weight cache for warm-starting trials (weight inheritance).
+
+Trained models are kept as CPU state dicts, least recently used first out, up
+to ``max_entries``. With ``spill_dir`` evicted parents are written to disk and
+reloaded on demand instead of being dropped. A new candidate is initialised
+from the nearest cached parent through the search space's ``morph_weights``
+(Net2Net widening/narrowing and kernel padding/cropping), so it starts close
+to the parent's accuracy and can be trained for ``epoch_scale`` of the usual
+epochs.
+
+Distance between architectures is the sum, over their integer params (the
+shape: channels, kernel size, ...), of ``|log2(child / parent)|``; float params
+such as lr and dropout do not change the weights' shapes and are ignored. Only
+parents within ``max_distance`` are used, nearest first, then best score.
+"""
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def architecture_distance(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    distance = 0.0
+    for key in set(a) & set(b):
+        x, y = a[key], b[key]
+        if not isinstance(x, int) or not isinstance(y, int) or isinstance(x, bool) or isinstance(y, bool):
+            continue
+        distance += abs(math.log2(x / y)) if x > 0 and y > 0 else float(x != y)
+    return distance
+
+
+@dataclass
+class ParentEntry:
+    trial_id: int
+    params: Dict[str, Any]
+    score: float
+    state_dict: Optional[Dict[str, torch.Tensor]] = None  # None while spilled to ``path``
+    path: Optional[Path] = None
+
+
+class ParentWeightCache:
+    def __init__(
+        self,
+        search_space,
+        dataset_meta: Dict[str, Any],
+        max_entries: int = 16,
+        spill_dir: Optional[str] = None,
+        max_distance: float = 2.0,
+        epoch_scale: float = 0.5,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.search_space = search_space
+        self.dataset_meta = dataset_meta
+        self.max_entries = max(1, int(max_entries))
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.max_distance = float(max_distance)
+        self.epoch_scale = float(epoch_scale)
+        self.seed = seed
+        self._entries: "OrderedDict[int, ParentEntry]" = OrderedDict()  # every known parent, LRU order
+        self.resident = 0  # entries whose weights are in memory
+        self.warm_starts = 0
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any], search_space, dataset_meta: Dict[str, Any]) -> Optional["ParentWeightCache"]:
+        inherit_cfg = cfg.get("inheritance") or {}
+        if not inherit_cfg.get("enabled", False):
+            return None
+        if not getattr(search_space, "supports_morphism", False):
+            logger.warning(f"Search space {search_space.name} does not support weight inheritance; disabled")
+            return None
+        spill_dir = inherit_cfg.get("spill_dir")
+        if spill_dir:
+            run_id = (cfg.get("tracking") or {}).get("run_id", "run")
+            spill_dir = Path(spill_dir) / str(run_id)
+        return cls(
+            search_space,
+            dataset_meta,
+            max_entries=int(inherit_cfg.get("max_entries", 16)),
+            spill_dir=spill_dir,
+            max_distance=float(inherit_cfg.get("max_distance", 2.0)),
+            epoch_scale=float(inherit_cfg.get("epoch_scale", 0.5)),
+            seed=cfg.get("seed"),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        for entry in self._entries.values():
+            if self.resident <= self.max_entries:
+                return
+            if entry.state_dict is None:
+                continue
+            if self.spill_dir is not None:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                entry.path = self.spill_dir / f"parent_{entry.trial_id}.pt"
+                torch.save(entry.state_dict, entry.path)
+            entry.state_dict = None
+            self.resident -= 1
+        # Without a spill directory an evicted parent cannot be reloaded.
+        for trial_id in [t for t, e in self._entries.items() if e.state_dict is None and e.path is None]:
+            del self._entries[trial_id]
+
+    def put(self, trial_id: int, params: Dict[str, Any], model: nn.Module, score: float) -> None:
+        """Caches (or refreshes) the weights of a trained trial as a future parent."""
+        state = {k: v.detach().to("cpu", copy=True) for k, v in model.state_dict().items()}
+        entry = self._entries.pop(trial_id, None)
+        if entry is None or entry.state_dict is None:
+            self.resident += 1
+        self._entries[trial_id] = ParentEntry(trial_id=trial_id, params=dict(params), score=float(score), state_dict=state)
+        self._evict()
+
+    def nearest(self, params: Dict[str, Any]) -> Optional[Tuple[ParentEntry, float]]:
+        best: Optional[Tuple[ParentEntry, float]] = None
+        for entry in self._entries.values():
+            distance = architecture_distance(params, entry.params)
+            if distance > self.max_distance:
+                continue
+            if best is None or (distance, -entry.score) < (best[1], -best[0].score):
+                best = (entry, distance)
+        return best
+
+    def _weights(self, entry: ParentEntry) -> Dict[str, torch.Tensor]:
+        self._entries.move_to_end(entry.trial_id)
+        if entry.state_dict is None:
+            entry.state_dict = torch.load(entry.path, map_location="cpu")
+            self.resident += 1
+            self._evict()
+        return entry.state_dict
+
+    def warm_start(self, model: nn.Module, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Loads morphed weights of the nearest parent into ``model``; returns the parent's info, or None."""
+        found = self.nearest(params)
+        if found is None:
+            return None
+        entry, distance = found
+        try:
+            state = self.search_space.morph_weights(self._weights(entry), entry.params, params, self.dataset_meta, seed=self.seed)
+            model.load_state_dict(state)
+        except Exception as exc:
+            logger.warning(f"Weight inheritance from trial {entry.trial_id} failed: {exc}")
+            return None
+        self.warm_starts += 1
+        return {"trial_id": entry.trial_id, "distance": round(distance, 4), "parent_score": entry.score}
+
+    def stats(self) -> Dict[str, int]:
+        return {"parents": len(self._entries), "resident": self.resident, "warm_starts": self.warm_starts}
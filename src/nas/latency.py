@@ -0,0 +1,242 @@
+"""
+Inference latency: measurement and a per-layer lookup-table predictor.
+
+``benchmark_latency`` times a built model's forward pass (eval mode,
+``torch.inference_mode``) for every configured batch size and thread count.
+After ``warmup`` untimed passes it takes ``iters`` timed ones and reports
+percentiles in milliseconds.
+
+``LatencyTable`` predicts a candidate's latency without building it. The
+search space's cost model lists every layer with its op signature, e.g.
+``("conv2d", in_ch, out_ch, kernel, stride, padding, h, w)``. Each distinct
+signature is timed once on its own, at the table's batch size and thread count,
+and the prediction is the sum over the layers. Entries are keyed per machine
+(CPU, core count, torch version) and persisted as
+``<lut_dir>/latency_lut_<machine>.json``. A table is therefore built once per
+machine and grows only when a new layer shape appears. ``prebuild`` times the
+layers of many sampled candidates up front, before trials start to compete for
+the cores.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from nas.surrogate import sample_candidates
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LUT_VERSION = 1
+
+
+def latency_stats(samples_ms: Sequence[float]) -> Dict[str, float]:
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        "mean_ms": float(samples.mean()),
+        "std_ms": float(samples.std()),
+        "min_ms": float(samples.min()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+    }
+
+
+@contextmanager
+def num_threads(threads: Optional[int]) -> Iterator[None]:
+    """Runs the block with ``torch.set_num_threads(threads)``, restoring the previous count."""
+    previous = torch.get_num_threads()
+    if threads:
+        torch.set_num_threads(int(threads))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def time_forward(fn: Callable[[], Any], warmup: int, iters: int, device: torch.device) -> List[float]:
+    """Milliseconds of ``iters`` calls of ``fn`` after ``warmup`` untimed ones."""
+    sync = torch.cuda.synchronize if device.type == "cuda" else (lambda: None)
+    with torch.inference_mode():
+        for _ in range(max(0, int(warmup))):
+            fn()
+        sync()
+        samples = []
+        for _ in range(max(1, int(iters))):
+            start = time.perf_counter()
+            fn()
+            sync()
+            samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def benchmark_latency(
+    model: nn.Module,
+    input_shape: Tuple[int, ...],
+    batch_sizes: Sequence[int] = (1,),
+    threads: Sequence[int] = (1,),
+    warmup: int = 10,
+    iters: int = 50,
+    device="cpu",
+) -> List[Dict[str, Any]]:
+    """Forward latency of ``model`` on ``(batch, *input_shape)`` inputs, per batch size and thread count."""
+    device = torch.device(device)
+    model = model.to(device).eval()
+    results = []
+    for n_threads in threads:
+        with num_threads(n_threads):
+            for batch_size in batch_sizes:
+                x = torch.randn((int(batch_size),) + tuple(input_shape), device=device)
+                stats = latency_stats(time_forward(lambda: model(x), warmup, iters, device))
+                results.append({"batch_size": int(batch_size), "threads": int(n_threads), **stats})
+    return results
+
+
+def machine_id() -> str:
+    """Short fingerprint of what latencies depend on: CPU, core count and torch build."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    raw = f"{platform.system()}|{cpu}|{os.cpu_count()}|{torch.__version__}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _layer(op: Tuple[Any, ...], batch_size: int) -> Optional[Tuple[nn.Module, torch.Tensor]]:
+    """A module computing ``op`` and an input for it; None for ops that cost nothing at inference."""
+    kind = op[0]
+    if kind == "conv2d":
+        in_ch, out_ch, k, stride, padding, h, w = op[1:]
+        return nn.Conv2d(in_ch, out_ch, k, stride=stride, padding=padding), torch.randn(batch_size, in_ch, h, w)
+    if kind == "max_pool2d":
+        c, k, stride, h, w = op[1:]
+        return nn.MaxPool2d(k, stride), torch.randn(batch_size, c, h, w)
+    if kind == "linear":
+        in_features, out_features = op[1:]
+        return nn.Linear(in_features, out_features), torch.randn(batch_size, in_features)
+    if kind == "relu":
+        return nn.ReLU(), torch.randn(batch_size, op[1])
+    if kind == "dropout":
+        return None
+    raise ValueError(f"No latency measurement for op {kind!r}")
+
+
+def _read_entries(path: Path) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning(f"Unreadable latency table {path}; rebuilding")
+        return {}
+    if data.get("version") != LUT_VERSION:
+        return {}
+    return {k: float(v) for k, v in (data.get("entries") or {}).items()}
+
+
+class LatencyTable:
+    def __init__(
+        self,
+        lut_dir: str,
+        batch_size: int = 1,
+        threads: int = 1,
+        warmup: int = 10,
+        iters: int = 50,
+        machine: Optional[str] = None,
+    ) -> None:
+        self.batch_size = max(1, int(batch_size))
+        self.threads = max(1, int(threads))
+        self.warmup, self.iters = int(warmup), int(iters)
+        self.machine = machine or machine_id()
+        self.path = Path(lut_dir) / f"latency_lut_{self.machine}.json"
+        self.entries: Dict[str, float] = _read_entries(self.path)
+        self.measured = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any]) -> Optional["LatencyTable"]:
+        latency_cfg = cfg.get("latency") or {}
+        if not latency_cfg.get("enabled", False):
+            return None
+        lut_dir = latency_cfg.get("lut_dir") or Path((cfg.get("paths") or {}).get("artifacts", "experiments/artifacts")) / "latency"
+        return cls(
+            str(lut_dir),
+            batch_size=int(latency_cfg.get("batch_size", 1)),
+            threads=int(latency_cfg.get("threads", 1)),
+            warmup=int(latency_cfg.get("warmup", 10)),
+            iters=int(latency_cfg.get("iters", 50)),
+        )
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Merge with entries other processes saved meanwhile, then swap the file in atomically.
+        self.entries = {**_read_entries(self.path), **self.entries}
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": LUT_VERSION, "machine": self.machine, "entries": self.entries}, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def key(self, op: Tuple[Any, ...]) -> str:
+        return f"b{self.batch_size}|t{self.threads}|" + "|".join(str(x) for x in op)
+
+    def _measure(self, op: Tuple[Any, ...]) -> float:
+        layer = _layer(op, self.batch_size)
+        if layer is None:
+            return 0.0
+        module, x = layer
+        module.eval()
+        with num_threads(self.threads):
+            samples = time_forward(lambda: module(x), self.warmup, self.iters, torch.device("cpu"))
+        return float(np.median(samples))
+
+    def layer_ms(self, op: Tuple[Any, ...], save: bool = True) -> float:
+        key = self.key(op)
+        with self._lock:
+            if key not in self.entries:
+                self.entries[key] = self._measure(op)
+                self.measured += 1
+                if save:
+                    self.save()
+            return self.entries[key]
+
+    def predict(self, cost) -> float:
+        """Predicted forward latency (ms) of an ``ArchitectureCost``: the sum of its layers' table entries."""
+        return float(sum(self.layer_ms(layer.op) for layer in cost.layers if layer.op))
+
+    def prebuild(self, costs) -> int:
+        """Times every layer signature of ``costs`` missing from the table; returns how many were new."""
+        before = self.measured
+        ops = {layer.op for cost in costs for layer in cost.layers if layer.op}
+        for op in sorted(ops, key=str):
+            self.layer_ms(op, save=False)
+        if self.measured > before:
+            with self._lock:
+                self.save()
+        return self.measured - before
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.entries), "measured": self.measured, "path": self.path.as_posix()}
+
+
+def prebuild_table(table: LatencyTable, cfg: Dict[str, Any], search_space, dataset_meta: Dict[str, Any], guidance: Optional[Dict[str, Any]] = None) -> int:
+    """Times the layers of ``latency.prebuild_candidates`` sampled candidates; returns how many were new."""
+    n = int((cfg.get("latency") or {}).get("prebuild_candidates", 0) or 0)
+    if n <= 0:
+        return 0
+    candidates = sample_candidates(search_space, n, guidance, seed=cfg.get("seed"))
+    new = table.prebuild(search_space.cost_model(params, dataset_meta) for params in candidates)
+    logger.info(f"Latency table {table.path}: {len(table.entries)} layer entries ({new} timed now)")
+    return new
@@ -0,0 +1,502 @@
+"""
+Optuna objective shared by the in-process search and the parallel trial workers.
+
+``TrialRunner`` holds everything one trial needs (loaders, search space, engine)
+so a worker process can build its own copy from the config and run trials
+against a shared study storage.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import optuna
+import torch.nn as nn
+
+from contracts import TrialRecord
+from memory import FaissMemoryStore
+from nas.batched import BatchedTrainer, group_by_shape
+from nas.engine import EpochResult, TrainingEngine
+from nas.latency import LatencyTable, prebuild_table
+from nas.pareto import ParetoFront, objective_values, resolve_objectives
+from nas.proxies import ProxyScreen
+from nas.result_cache import ResultCache
+from nas.session import SearchSession
+from tracking.io import append_jsonl
+from utils.carbon import carbon_tracker
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _log_progress(step: int, loss: float, acc: float) -> None:
+    logger.info(f"  step {step}: train_loss={loss:.4f}, train_acc={acc:.4f}")
+
+
+ObjectiveValue = Union[float, List[float]]  # one value per objective in multi-objective studies
+
+
+def is_better(value: float, best: Optional[float], direction: str) -> bool:
+    if best is None:
+        return True
+    if str(direction).lower() == "minimize":
+        return float(value) < float(best)
+    return float(value) > float(best)
+
+
+class TrialRunner:
+    """Callable Optuna objective: samples, trains, evaluates and records one trial."""
+
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        device,
+        session: SearchSession,
+        guidance: Optional[Dict[str, Any]] = None,
+        memory_store: Optional[FaissMemoryStore] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.device = device
+        self.guidance = guidance
+        self.memory_store = memory_store
+        self.train_loader, self.test_loader = session.train_loader, session.test_loader
+        self.dataset_meta_dict = session.dataset_meta.to_dict()
+        self.search_space = session.search_space
+        self.engine = TrainingEngine.from_cfg(cfg, device)
+
+        tracking = cfg.get("tracking") or {}
+        self.run_id = tracking.get("run_id", "run")
+        self.config_hash = str(tracking.get("config_hash", ""))
+        run_dir = Path(tracking.get("run_dir", cfg.get("paths", {}).get("results", "experiments/results")))
+        self.metrics_path = run_dir / "metrics.jsonl"
+
+        self.direction = str(cfg["optuna"]["direction"]).lower()
+        self.pruning = str(cfg["optuna"].get("pruner") or "none").lower() != "none"
+        self.objectives = resolve_objectives(cfg["optuna"].get("objectives"))
+        # Completed trials no other trial dominates, with their weights (multi-objective studies only).
+        self.front: Optional[ParetoFront] = None
+        if len(self.objectives) > 1:
+            self.front = ParetoFront([o.direction for o in self.objectives])
+            if self.pruning:
+                logger.warning("Optuna cannot prune multi-objective trials; pruner disabled")
+                self.pruning = False
+        self.report_every = int(cfg["optuna"].get("report_every_n_batches", 0) or 0)
+        self.context = {
+            "dataset": cfg["dataset"],
+            "in_ch": self.dataset_meta_dict["in_ch"],
+            "size": self.dataset_meta_dict["size"],
+            "batch_size": cfg["batch_size"],
+            "epochs": cfg["epochs"],
+            "seed": cfg.get("seed"),
+        }
+
+        # Earlier results of identical configs: memory-store history, then this run's metrics.jsonl.
+        self.result_cache = ResultCache.from_cfg(cfg)
+        if self.result_cache is not None:
+            if memory_store is not None:
+                rows = memory_store.partition_rows({"dataset": cfg["dataset"], "search_space": self.search_space.name})
+                limit = int((cfg.get("result_cache") or {}).get("memory_rows", 20000))
+                self.result_cache.load_records(memory_store.get_records(rows[-limit:].tolist() if limit > 0 else []))
+            self.result_cache.follow_jsonl(self.metrics_path)
+
+        self.proxy_screen = ProxyScreen.from_cfg(cfg)
+
+        # Predicted inference latency of every candidate, from this machine's per-layer table.
+        latency_cfg = cfg.get("latency") or {}
+        self.latency = LatencyTable.from_cfg(cfg)
+        self.max_latency_ms = float(latency_cfg["max_ms"]) if latency_cfg.get("max_ms") else None
+        if self.latency is None and any(o.name == "latency" for o in self.objectives):
+            raise ValueError("The latency objective needs latency.enabled")
+        if self.latency is not None:
+            prebuild_table(self.latency, cfg, self.search_space, self.dataset_meta_dict, guidance)
+
+        # Best trial trained in this process, with its weights (cached results are not counted).
+        self.best_state: Dict[str, Any] = {"value": None, "state_dict": None, "params": None}
+        # Completed-trial records, kept so a parent process can merge them into its memory store.
+        self.records: List[TrialRecord] = []
+        # Guards the shared bookkeeping (cache, records, memory store, best state) when trials run on threads.
+        self._lock = threading.Lock()
+
+    def _objective_value(self, trial: optuna.trial.Trial, value: float, attrs: Optional[Dict[str, Any]] = None) -> ObjectiveValue:
+        if self.front is None:
+            return value
+        return objective_values(self.objectives, {**trial.user_attrs, **(attrs or {})})
+
+    def _cached_result(self, trial: optuna.trial.Trial, params: Dict[str, Any]) -> Optional[ObjectiveValue]:
+        """Answers the trial from the result cache, without training, when it has enough measurements."""
+        if self.result_cache is None:
+            return None
+        with self._lock:
+            hit = self.result_cache.lookup(params, self.search_space.name, self.cfg["dataset"], self.context)
+        if hit is None:
+            return None
+        source, repeats = hit
+        value = float(source["value"])
+        cost = self.search_space.cost_model(params, self.dataset_meta_dict)
+
+        trial.set_user_attr("params", int(cost.params))
+        trial.set_user_attr("flops", int(cost.flops))
+        trial.set_user_attr("peak_activation_bytes", int(cost.peak_activation_bytes))
+        for key in ("eval_loss", "eval_acc", "train_loss", "train_acc", "train_samples_per_s", "eval_samples_per_s"):
+            trial.set_user_attr(key, source.get(key))
+        trial.set_user_attr("emissions_kg", None)
+        trial.set_user_attr("duration_s", 0.0)
+        trial.set_user_attr("cached", True)
+        trial.set_user_attr("cache_repeats", int(repeats))
+        trial.set_user_attr("cached_from", f"{source.get('run_id')}#{source.get('trial_number')}")
+
+        # Logged for observability; the "cached" tag keeps it out of the cache and the memory store.
+        record = TrialRecord(
+            run_id=self.run_id,
+            trial_number=int(trial.number),
+            dataset=str(self.cfg["dataset"]),
+            device=str(self.device),
+            search_space=self.search_space.name,
+            params=params,
+            value=value,
+            eval_loss=source.get("eval_loss"),
+            eval_acc=value,
+            model_params=int(cost.params),
+            flops=int(cost.flops),
+            latency_ms=trial.user_attrs.get("latency_ms"),
+            duration_s=0.0,
+            epochs_completed=0.0,
+            config_hash=self.config_hash,
+            context=dict(self.context),
+            tags=["optuna", self.search_space.name, "cached"],
+        )
+        logger.info(f"Trial {trial.number} served from result cache (mean of {repeats} run(s)): value={value:.4f}")
+
+        # The source's cost, not this trial's zero, is what the configuration takes to train.
+        objective = self._objective_value(trial, value, {"duration_s": source.get("duration_s"), "emissions_kg": source.get("emissions_kg")})
+        with self._lock:
+            append_jsonl(self.metrics_path, record.model_dump(mode="python"))
+            # best_state stays with the best trained trial: a cached measurement has no weights to checkpoint.
+            if self.front is not None:
+                self.front.add(trial.number, objective, {"params": dict(params), "state_dict": None})
+        return objective
+
+    def _check_latency(self, trial: optuna.trial.Trial, params: Dict[str, Any]) -> None:
+        """Predicts the candidate's latency; prunes it before training when it exceeds ``latency.max_ms``."""
+        if self.latency is None:
+            return
+        latency_ms = self.latency.predict(self.search_space.cost_model(params, self.dataset_meta_dict))
+        trial.set_user_attr("latency_ms", latency_ms)
+        if self.max_latency_ms is None or latency_ms <= self.max_latency_ms:
+            return
+
+        trial.set_user_attr("status", "rejected")
+        trial.set_user_attr("epochs_completed", 0.0)
+        trial.set_user_attr("duration_s", 0.0)
+        record = TrialRecord(
+            run_id=self.run_id,
+            trial_number=int(trial.number),
+            dataset=str(self.cfg["dataset"]),
+            device=str(self.device),
+            search_space=self.search_space.name,
+            params=params,
+            value=0.0,
+            status="rejected",
+            epochs_completed=0.0,
+            duration_s=0.0,
+            latency_ms=latency_ms,
+            config_hash=self.config_hash,
+            context=dict(self.context),
+            tags=["optuna", self.search_space.name, "rejected"],
+        )
+        append_jsonl(self.metrics_path, record.model_dump(mode="python"))
+        logger.info(f"Trial {trial.number} rejected: predicted latency {latency_ms:.3f} ms > {self.max_latency_ms:g} ms")
+        raise optuna.TrialPruned("Predicted latency above latency.max_ms")
+
+    def _screen(self, trial: optuna.trial.Trial, params: Dict[str, Any], model: nn.Module) -> Optional[Dict[str, float]]:
+        """Zero-cost proxy scores of the untrained model; prunes the trial when the screen rejects it."""
+        if self.proxy_screen is None:
+            return None
+        verdict = self.proxy_screen.screen(model, self.train_loader, self.device)
+        trial.set_user_attr("proxy_scores", verdict.scores)
+        trial.set_user_attr("proxy_quantile", verdict.quantile)
+        if not verdict.rejected:
+            return verdict.scores
+
+        trial.set_user_attr("status", "rejected")
+        trial.set_user_attr("epochs_completed", 0.0)
+        trial.set_user_attr("duration_s", float(verdict.seconds))
+        record = TrialRecord(
+            run_id=self.run_id,
+            trial_number=int(trial.number),
+            dataset=str(self.cfg["dataset"]),
+            device=str(self.device),
+            search_space=self.search_space.name,
+            params=params,
+            value=0.0,
+            status="rejected",
+            epochs_completed=0.0,
+            duration_s=float(verdict.seconds),
+            proxy_scores=verdict.scores,
+            config_hash=self.config_hash,
+            context=dict(self.context),
+            tags=["optuna", self.search_space.name, "rejected"],
+        )
+        append_jsonl(self.metrics_path, record.model_dump(mode="python"))
+        logger.info(f"Trial {trial.number} rejected by zero-cost proxies (quantile {verdict.quantile:.2f} < {self.proxy_screen.reject_quantile:g})")
+        raise optuna.TrialPruned("Rejected by zero-cost proxies")
+
+    def __call__(self, trial: optuna.trial.Trial) -> ObjectiveValue:
+        cfg, engine = self.cfg, self.engine
+        train_loader, test_loader = self.train_loader, self.test_loader
+        search_space, dataset_meta_dict = self.search_space, self.dataset_meta_dict
+
+        params = search_space.sample(trial, guidance=self.guidance)
+        self._check_latency(trial, params)
+        cached = self._cached_result(trial, params)
+        if cached is not None:
+            return cached
+        model = search_space.build_model(params, dataset_meta_dict)
+        proxy_scores = self._screen(trial, params, model)
+        model = engine.prepare(model)
+        criterion = nn.CrossEntropyLoss()
+        optimizer = engine.make_optimizer(model, lr=float(params["lr"]))
+
+        epochs = max(1, int(cfg["epochs"]))
+        steps_per_epoch = max(1, len(train_loader))
+        pruning, report_every = self.pruning, self.report_every
+        start = time.perf_counter()
+        last_train_loss, last_train_acc = None, None
+        train_samples, train_seconds = 0, 0.0
+        progress = {"epoch": 0, "batches": 0, "value": None}
+        eval_result = None
+        pruned = False
+
+        def report(step: int, value: float) -> None:
+            progress["value"] = value
+            trial.report(value, step)
+            if trial.should_prune():
+                raise optuna.TrialPruned(f"Pruned at step {step} with value {value:.4f}")
+
+        def report_batches(batch_step: int) -> None:
+            # Mid-epoch report on the validation split, keyed by the global batch index.
+            if batch_step >= steps_per_epoch:
+                return  # the end-of-epoch report covers this step
+            progress["batches"] = batch_step
+            result = engine.evaluate(model, test_loader, criterion)
+            report(progress["epoch"] * steps_per_epoch + batch_step, result.acc)
+
+        with carbon_tracker(f"{cfg.get('project_name', 'nas')}_{self.run_id}_trial_{trial.number}") as carbon_state:
+            try:
+                for epoch_idx in range(epochs):
+                    progress["epoch"], progress["batches"] = epoch_idx, 0
+                    epoch = engine.train_epoch(
+                        model,
+                        train_loader,
+                        optimizer,
+                        criterion,
+                        on_log=_log_progress,
+                        on_step=report_batches if pruning and report_every > 0 else None,
+                        step_interval=report_every,
+                    )
+                    last_train_loss, last_train_acc = epoch.loss, epoch.acc
+                    train_samples += epoch.samples
+                    train_seconds += epoch.seconds
+                    progress["epoch"], progress["batches"] = epoch_idx + 1, 0
+                    if pruning:
+                        # The last epoch's report doubles as the final evaluation.
+                        eval_result = engine.evaluate(model, test_loader, criterion)
+                        step = (epoch_idx + 1) * steps_per_epoch if report_every > 0 else epoch_idx
+                        report(step, eval_result.acc)
+            except optuna.TrialPruned:
+                pruned = True
+
+        if pruned:
+            duration_s = time.perf_counter() - start
+            # Compute used in epoch-equivalents, including the batches of a partially trained epoch.
+            epochs_done = progress["epoch"] + progress["batches"] / steps_per_epoch
+            train_samples += progress["batches"] * int(cfg["batch_size"])
+            emissions_kg = carbon_state.get("emissions_kg")
+            trial.set_user_attr("status", "pruned")
+            trial.set_user_attr("epochs_completed", float(epochs_done))
+            trial.set_user_attr("duration_s", float(duration_s))
+            record = TrialRecord(
+                run_id=self.run_id,
+                trial_number=int(trial.number),
+                dataset=str(cfg["dataset"]),
+                device=str(self.device),
+                search_space=search_space.name,
+                params=params,
+                value=float(progress["value"]) if progress["value"] is not None else 0.0,
+                status="pruned",
+                epochs_completed=float(epochs_done),
+                train_samples=int(train_samples),
+                train_loss=float(last_train_loss) if last_train_loss is not None else None,
+                train_acc=float(last_train_acc) if last_train_acc is not None else None,
+                eval_acc=float(progress["value"]) if progress["value"] is not None else None,
+                emissions_kg=float(emissions_kg) if emissions_kg is not None else None,
+                duration_s=float(duration_s),
+                config_hash=self.config_hash,
+                context=dict(self.context),
+                tags=["optuna", search_space.name, "pruned"],
+            )
+            append_jsonl(self.metrics_path, record.model_dump(mode="python"))
+            logger.info(f"Trial {trial.number} pruned after {epochs_done:.2f} epochs (value={record.value:.4f})")
+            raise optuna.TrialPruned()
+
+        if eval_result is None:
+            eval_result = engine.evaluate(model, test_loader, criterion)
+        return self._complete(
+            trial,
+            params,
+            model,
+            eval_result,
+            train_loss=last_train_loss,
+            train_acc=last_train_acc,
+            train_samples=train_samples,
+            train_seconds=train_seconds,
+            duration_s=time.perf_counter() - start,
+            emissions_kg=carbon_state.get("emissions_kg"),
+            epochs=epochs,
+            proxy_scores=proxy_scores,
+        )
+
+    def run_population(self, trials: List[optuna.trial.Trial]) -> List[Tuple[optuna.trial.Trial, optuna.trial.TrialState, Optional[ObjectiveValue]]]:
+        """
+        Runs asked trials together: cached and rejected ones are settled first, the rest
+        are grouped by parameter shapes and each group trains as one ``BatchedTrainer``
+        population on the same batches. Returns ``(trial, state, value)`` to tell the study.
+        Populations train without intermediate reports, so the pruner does not apply.
+        """
+        outcomes: List[Tuple[optuna.trial.Trial, optuna.trial.TrialState, Optional[ObjectiveValue]]] = []
+        pending = []
+        for trial in trials:
+            params = self.search_space.sample(trial, guidance=self.guidance)
+            try:
+                self._check_latency(trial, params)
+            except optuna.TrialPruned:
+                outcomes.append((trial, optuna.trial.TrialState.PRUNED, None))
+                continue
+            cached = self._cached_result(trial, params)
+            if cached is not None:
+                outcomes.append((trial, optuna.trial.TrialState.COMPLETE, cached))
+                continue
+            model = self.search_space.build_model(params, self.dataset_meta_dict)
+            try:
+                proxy_scores = self._screen(trial, params, model)
+            except optuna.TrialPruned:
+                outcomes.append((trial, optuna.trial.TrialState.PRUNED, None))
+                continue
+            pending.append(((trial, params, model, proxy_scores), model))
+
+        epochs = max(1, int(self.cfg["epochs"]))
+        for members in group_by_shape(pending):
+            start = time.perf_counter()
+            label = f"{self.cfg.get('project_name', 'nas')}_{self.run_id}_trials_{members[0][0].number}-{members[-1][0].number}"
+            with carbon_tracker(label) as carbon_state:
+                trainer = BatchedTrainer([m[2] for m in members], [float(m[1]["lr"]) for m in members], self.engine)
+                train_seconds, train_samples, results = 0.0, 0, None
+                for _ in range(epochs):
+                    results = trainer.train_epoch(self.train_loader)
+                    train_seconds += results[0].seconds
+                    train_samples += results[0].samples
+                eval_results = trainer.evaluate(self.test_loader)
+                trainer.write_back()
+            duration_s = time.perf_counter() - start
+            emissions_kg = carbon_state.get("emissions_kg")
+            logger.info(f"Trained {len(members)} trial(s) as one population in {duration_s:.1f}s")
+            for (trial, params, model, proxy_scores), train_result, eval_result in zip(members, results, eval_results):
+                trial.set_user_attr("population_size", len(members))
+                value = self._complete(
+                    trial,
+                    params,
+                    model,
+                    eval_result,
+                    train_loss=train_result.loss,
+                    train_acc=train_result.acc,
+                    train_samples=train_samples,
+                    # Members share the wall-clock time and emissions of their population.
+                    train_seconds=train_seconds * len(members),
+                    duration_s=duration_s / len(members),
+                    emissions_kg=emissions_kg / len(members) if emissions_kg is not None else None,
+                    epochs=epochs,
+                    proxy_scores=proxy_scores,
+                )
+                outcomes.append((trial, optuna.trial.TrialState.COMPLETE, value))
+        return outcomes
+
+    def _complete(
+        self,
+        trial: optuna.trial.Trial,
+        params: Dict[str, Any],
+        model: nn.Module,
+        eval_result: EpochResult,
+        train_loss: Optional[float],
+        train_acc: Optional[float],
+        train_samples: int,
+        train_seconds: float,
+        duration_s: float,
+        emissions_kg: Optional[float],
+        epochs: int,
+        proxy_scores: Optional[Dict[str, float]],
+    ) -> ObjectiveValue:
+        """Sets the user attrs of a trained trial, records it and keeps its weights when it is the best so far or on the front."""
+        search_space, dataset_meta_dict = self.search_space, self.dataset_meta_dict
+        eval_loss, eval_acc = eval_result.loss, eval_result.acc
+        train_samples_per_s = train_samples / train_seconds if train_seconds > 0 else None
+
+        cost = search_space.cost_model(params, dataset_meta_dict)
+        model_params, flops = cost.params, cost.flops
+
+        trial.set_user_attr("params", int(model_params))
+        trial.set_user_attr("flops", int(flops))
+        trial.set_user_attr("peak_activation_bytes", int(cost.peak_activation_bytes))
+        trial.set_user_attr("eval_loss", float(eval_loss))
+        trial.set_user_attr("eval_acc", float(eval_acc))
+        trial.set_user_attr("train_loss", float(train_loss) if train_loss is not None else None)
+        trial.set_user_attr("train_acc", float(train_acc) if train_acc is not None else None)
+        trial.set_user_attr("emissions_kg", float(emissions_kg) if emissions_kg is not None else None)
+        trial.set_user_attr("duration_s", float(duration_s))
+        trial.set_user_attr("train_samples_per_s", train_samples_per_s)
+        trial.set_user_attr("eval_samples_per_s", eval_result.samples_per_s)
+
+        record = TrialRecord(
+            run_id=self.run_id,
+            trial_number=int(trial.number),
+            dataset=str(self.cfg["dataset"]),
+            device=str(self.device),
+            search_space=search_space.name,
+            params=params,
+            value=float(eval_acc),
+            train_loss=float(train_loss) if train_loss is not None else None,
+            train_acc=float(train_acc) if train_acc is not None else None,
+            eval_loss=float(eval_loss),
+            eval_acc=float(eval_acc),
+            model_params=int(model_params),
+            flops=int(flops),
+            latency_ms=trial.user_attrs.get("latency_ms"),
+            emissions_kg=float(emissions_kg) if emissions_kg is not None else None,
+            duration_s=float(duration_s),
+            epochs_completed=float(epochs),
+            train_samples=int(train_samples),
+            train_samples_per_s=train_samples_per_s,
+            eval_samples_per_s=eval_result.samples_per_s,
+            proxy_scores=proxy_scores,
+            config_hash=self.config_hash,
+            context=dict(self.context),
+            tags=["optuna", search_space.name],
+        )
+
+        with self._lock:
+            append_jsonl(self.metrics_path, record.model_dump(mode="python"))
+            self.records.append(record)
+            if self.memory_store is not None:
+                self.memory_store.add(record)
+
+            if is_better(eval_acc, self.best_state["value"], self.direction):
+                self.best_state["value"] = float(eval_acc)
+                self.best_state["params"] = dict(params)
+                self.best_state["state_dict"] = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+            objective = self._objective_value(trial, float(eval_acc))
+            if self.front is not None and not self.front.dominated(objective):
+                state_dict = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+                self.front.add(trial.number, objective, {"params": dict(params), "state_dict": state_dict})
+
+        return objective
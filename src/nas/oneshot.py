@@ -0,0 +1,231 @@
+"""
+One-shot (weight-sharing) search.
+
+Instead of training every candidate from scratch, one supernet of the search
+space is trained for ``supernet_epochs``; each training step updates a random
+sub-network. Thousands of candidates are then drawn from the space and scored
+with the shared weights on ``eval_batches`` test batches, without retraining.
+Candidates that select the same sub-network (same ``supernet_key``; dropout and
+lr do not change the shared weights) are scored once.
+
+The ``top_k`` best sub-networks can optionally be extracted and fine-tuned for
+``finetune_epochs`` with their own lr and dropout. The search then costs about
+one training run, plus ``top_k`` short fine-tunes.
+
+Supernet scores are logged to ``metrics.jsonl`` with status ``supernet``, so the
+result cache and the surrogate never treat them as trained measurements.
+Fine-tuned candidates are logged as completed trials (tagged ``oneshot``) and
+added to the memory store.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from contracts import TrialRecord
+from datasets.loader import BatchLimitedLoader
+from nas.engine import TrainingEngine
+from nas.objective import _log_progress
+from nas.session import SearchSession, search_session
+from nas.surrogate import sample_candidates
+from tracking.io import append_jsonl, persist_summary
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _eval_loader(loader, batches: int):
+    if batches <= 0 or batches >= len(loader):
+        return loader
+    return BatchLimitedLoader(loader, batches / len(loader))
+
+
+def train_supernet(supernet: nn.Module, engine: TrainingEngine, loader, epochs: int, lr: float) -> Dict[str, Any]:
+    """Trains the supernet in place; every step samples a sub-network."""
+    supernet = supernet.to(engine.device)  # not compiled: the sampled shapes change every step
+    optimizer = engine.make_optimizer(supernet, lr=lr)
+    criterion = nn.CrossEntropyLoss()
+    seconds, result = 0.0, None
+    for epoch in range(max(1, int(epochs))):
+        result = engine.train_epoch(supernet, loader, optimizer, criterion, on_log=_log_progress)
+        seconds += result.seconds
+        logger.info(f"Supernet epoch {epoch + 1}/{epochs}: train_loss={result.loss:.4f}, train_acc={result.acc:.4f}")
+    return {"epochs": max(1, int(epochs)), "train_loss": result.loss, "train_acc": result.acc, "seconds": seconds}
+
+
+def score_candidates(
+    supernet: nn.Module, search_space, candidates: List[Dict[str, Any]], engine: TrainingEngine, loader
+) -> List[Tuple[Dict[str, Any], float, float]]:
+    """``(params, eval_acc, eval_loss)`` per distinct sub-network, evaluated with the shared weights, best first."""
+    criterion = nn.CrossEntropyLoss()
+    scored: Dict[Tuple[Any, ...], Tuple[Dict[str, Any], float, float]] = {}
+    for params in candidates:
+        key = search_space.supernet_key(params)
+        if key in scored:
+            continue
+        result = engine.evaluate(supernet.activate(params), loader, criterion)
+        scored[key] = (params, float(result.acc), float(result.loss))
+    return sorted(scored.values(), key=lambda item: item[1], reverse=True)
+
+
+def run_oneshot_search(cfg, device, session: Optional[SearchSession] = None):
+    with search_session(cfg, session) as session:
+        return _run_oneshot_search(cfg, device, session)
+
+
+def _run_oneshot_search(cfg, device, session: SearchSession):
+    tracking = cfg.get("tracking") or {}
+    run_id = tracking.get("run_id", "run")
+    config_hash = str(tracking.get("config_hash", ""))
+    run_dir = Path(tracking.get("run_dir", cfg.get("paths", {}).get("results", "experiments/results")))
+    metrics_path = run_dir / "metrics.jsonl"
+    oneshot_cfg = cfg.get("oneshot") or {}
+
+    search_space = session.search_space
+    if not getattr(search_space, "supports_supernet", False):
+        raise ValueError(f"Search space {search_space.name} does not support one-shot search")
+    dataset_meta_dict = session.dataset_meta.to_dict()
+    memory_store = session.memory_store
+    engine = TrainingEngine.from_cfg(cfg, device)
+    context = {
+        "dataset": cfg["dataset"],
+        "in_ch": dataset_meta_dict["in_ch"],
+        "size": dataset_meta_dict["size"],
+        "batch_size": cfg["batch_size"],
+        "epochs": cfg["epochs"],
+        "seed": cfg.get("seed"),
+    }
+
+    def record(number: int, params: Dict[str, Any], value: float, **fields: Any) -> TrialRecord:
+        cost = search_space.cost_model(params, dataset_meta_dict)
+        trial = TrialRecord(
+            run_id=run_id,
+            trial_number=number,
+            dataset=str(cfg["dataset"]),
+            device=str(device),
+            search_space=search_space.name,
+            params=params,
+            value=value,
+            model_params=int(cost.params),
+            flops=int(cost.flops),
+            config_hash=config_hash,
+            **fields,
+        )
+        append_jsonl(metrics_path, trial.model_dump(mode="python"))
+        return trial
+
+    start = time.perf_counter()
+    supernet_epochs = int(oneshot_cfg.get("supernet_epochs") or cfg["epochs"])
+    lr = float(oneshot_cfg.get("lr") or cfg.get("lr", 0.01))
+    logger.info(f"Training {search_space.name} supernet for {supernet_epochs} epoch(s)...")
+    supernet = search_space.build_supernet(dataset_meta_dict)
+    training = train_supernet(supernet, engine, session.train_loader, supernet_epochs, lr)
+
+    candidates = sample_candidates(search_space, int(oneshot_cfg.get("candidates", 1000)), seed=int(cfg.get("seed", 0)))
+    eval_loader = _eval_loader(session.test_loader, int(oneshot_cfg.get("eval_batches", 20)))
+    eval_start = time.perf_counter()
+    ranked = score_candidates(supernet, search_space, candidates, engine, eval_loader)
+    eval_seconds = time.perf_counter() - eval_start
+    logger.info(f"Scored {len(candidates)} candidates ({len(ranked)} distinct sub-networks) in {eval_seconds:.1f}s")
+
+    trials: List[Dict[str, Any]] = []
+    for params, acc, loss in ranked:
+        number = len(trials)
+        record(
+            number, params, acc, status="supernet", eval_acc=acc, eval_loss=loss, epochs_completed=0.0,
+            context={**context, "epochs": supernet_epochs}, tags=["oneshot", search_space.name, "supernet"],
+        )
+        trials.append({"number": number, "state": "COMPLETE", "value": acc, "params": dict(params), "attrs": {"stage": "supernet"}})
+        logger.info(f"  {search_space.supernet_key(params)}: supernet_acc={acc:.4f}")
+
+    # Fine-tune the best sub-networks from their shared weights, each with its own lr and dropout.
+    best_params, best_value = dict(ranked[0][0]), ranked[0][1]
+    best_state: Dict[str, Any] = {"state_dict": None}
+    finetune_epochs = int(oneshot_cfg.get("finetune_epochs", 0) or 0)
+    top_k = max(0, int(oneshot_cfg.get("top_k", 3)))
+    finetuned: List[TrialRecord] = []
+    if finetune_epochs > 0 and top_k > 0:
+        criterion = nn.CrossEntropyLoss()
+        best_value = None
+        for params, supernet_acc, _ in ranked[:top_k]:
+            number = len(trials)
+            model = engine.prepare(supernet.extract(params))
+            optimizer = engine.make_optimizer(model, lr=float(params["lr"]))
+            trial_start = time.perf_counter()
+            for _ in range(finetune_epochs):
+                epoch = engine.train_epoch(model, session.train_loader, optimizer, criterion, on_log=_log_progress)
+            result = engine.evaluate(model, session.test_loader, criterion)
+            trial = record(
+                number, params, float(result.acc), eval_acc=float(result.acc), eval_loss=float(result.loss),
+                train_loss=float(epoch.loss), train_acc=float(epoch.acc), epochs_completed=float(finetune_epochs),
+                duration_s=time.perf_counter() - trial_start, context={**context, "epochs": finetune_epochs},
+                tags=["oneshot", search_space.name, "finetuned"],
+            )
+            finetuned.append(trial)
+            trials.append({
+                "number": number, "state": "COMPLETE", "value": trial.value, "params": dict(params),
+                "attrs": {"stage": "finetune", "supernet_acc": supernet_acc, "params": trial.model_params, "flops": trial.flops},
+            })
+            logger.info(f"Fine-tuned {params}: supernet_acc={supernet_acc:.4f} -> eval_acc={trial.value:.4f}")
+            if best_value is None or trial.value > best_value:
+                best_params, best_value = dict(params), trial.value
+                best_state["state_dict"] = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+        if memory_store is not None:
+            memory_store.add_many(finetuned)
+
+    checkpoint_path = None
+    if tracking.get("save_checkpoints") and best_state["state_dict"] is not None:
+        ckpt_root = Path((cfg.get("paths") or {}).get("checkpoints", "checkpoints")) / run_id
+        ckpt_root.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = ckpt_root / "best_model.pt"
+        torch.save(
+            {
+                "state_dict": best_state["state_dict"],
+                "params": best_params,
+                "best_value": best_value,
+                "dataset_meta": dataset_meta_dict,
+                "run_id": run_id,
+            },
+            checkpoint_path,
+        )
+
+    best_cost = search_space.cost_model(best_params, dataset_meta_dict)
+    attrs = {
+        "params": int(best_cost.params),
+        "flops": int(best_cost.flops),
+        "n_trials": len(trials),
+        "n_candidates": len(candidates),
+        "n_subnets": len(ranked),
+        "n_finetuned": len(finetuned),
+        "supernet_epochs": supernet_epochs,
+        "supernet_train_seconds": training["seconds"],
+        "supernet_eval_seconds": eval_seconds,
+        "finetune_epochs": finetune_epochs,
+        "duration_s": time.perf_counter() - start,
+        "direction": "maximize",
+        "search_space": search_space.name,
+        "memory_enabled": memory_store is not None,
+        "metrics_path": metrics_path.as_posix(),
+        "checkpoint_path": checkpoint_path.as_posix() if checkpoint_path else None,
+    }
+    summary = {
+        "run_id": run_id,
+        "run_dir": run_dir.as_posix(),
+        "best_value": best_value,
+        "best_params": best_params,
+        "trials": trials,
+        "attrs": attrs,
+    }
+
+    logger.info(f"Best one-shot value: {best_value:.4f}")
+    logger.info(f"Best params: {best_params}")
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    paths = persist_summary(cfg, summary, f"oneshot_summary_{ts}.json")
+    logger.info(f"Saved one-shot summary to {paths['run_path']}")
+    return summary
@@ -1,110 +1,192 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from pathlib import Path
-import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
-import torch.nn as nn
-import torch.optim as optim
 import optuna
 
-from datasets.loader import get_loaders
-from search_spaces import get_search_space
-from utils.metrics import accuracy, count_params, try_flops
 from utils.logger import get_logger
-from utils.carbon import carbon_tracker
-from tracking.io import append_jsonl, persist_summary
+from tracking.io import persist_summary
 from contracts import TrialRecord
-from memory import FaissMemoryStore
 from agents.proposal_agent import ProposalAgent
+from nas.ask_tell import AskTellDriver, make_backend
+from nas.evolution import RegularizedEvolution
+from nas.latency import LatencyTable, benchmark_latency, prebuild_table
+from nas.objective import TrialRunner, is_better
+from nas.oneshot import run_oneshot_search
+from nas.parallel import run_parallel_trials, shared_storage
+from nas.pareto import ParetoFront, non_dominated_sort, resolve_objectives
+from nas.proxies import proxy_correlation
+from nas.session import SearchSession, search_session
+from nas.surrogate import get_surrogate, sample_candidates
 
 logger = get_logger(__name__)
 
 
-def train_one_epoch(model, loader, device, optimizer, criterion):
-    model.train()
-    total_loss, total_acc, n = 0.0, 0.0, 0
-    for x, y in loader:
-        x, y = x.to(device), y.to(device)
-        optimizer.zero_grad()
-        out = model(x)
-        loss = criterion(out, y)
-        loss.backward()
-        optimizer.step()
-        total_loss += loss.item() * x.size(0)
-        total_acc += accuracy(out.detach(), y) * x.size(0)
-        n += x.size(0)
-    return total_loss / n, total_acc / n
-
-
-def evaluate(model, loader, device, criterion):
-    model.eval()
-    total_loss, total_acc, n = 0.0, 0.0, 0
-    with torch.no_grad():
-        for x, y in loader:
-            x, y = x.to(device), y.to(device)
-            out = model(x)
-            loss = criterion(out, y)
-            total_loss += loss.item() * x.size(0)
-            total_acc += accuracy(out, y) * x.size(0)
-            n += x.size(0)
-    return total_loss / n, total_acc / n
-
-
 def _trial_record(t: optuna.trial.FrozenTrial):
-    return {
+    values = t.values or []
+    record = {
         "number": t.number,
-        "value": t.value,
+        "state": t.state.name,
+        "value": values[0] if len(values) == 1 else None,
         "params": dict(t.params),
         "attrs": {k: v for k, v in t.user_attrs.items()},
     }
+    if len(values) > 1:
+        record["values"] = list(values)
+    return record
+
+
+def _build_pruner(optuna_cfg: Dict[str, Any]) -> optuna.pruners.BasePruner:
+    name = str(optuna_cfg.get("pruner") or "none").strip().lower()
+    kwargs = dict(optuna_cfg.get("pruner_kwargs") or {})
+    pruners = {
+        "none": optuna.pruners.NopPruner,
+        "median": optuna.pruners.MedianPruner,
+        "percentile": optuna.pruners.PercentilePruner,
+        "successive_halving": optuna.pruners.SuccessiveHalvingPruner,
+        "hyperband": optuna.pruners.HyperbandPruner,
+    }
+    if name not in pruners:
+        raise ValueError(f"Unsupported pruner: {name}. Available: {sorted(pruners)}")
+    if name == "percentile":
+        kwargs.setdefault("percentile", 25.0)
+    return pruners[name](**kwargs)
 
 
-def _build_study(cfg: Dict[str, Any]) -> optuna.study.Study:
+def _storage_spec(cfg: Dict[str, Any]) -> Optional[str]:
+    """Configured storage, or a run-local journal file when trials run in worker processes."""
     tracking = cfg.get("tracking") or {}
-    storage = tracking.get("optuna_storage")
+    if tracking.get("optuna_storage"):
+        return str(tracking["optuna_storage"])
+    if int(cfg["optuna"].get("n_jobs", 1)) > 1:
+        run_dir = Path(tracking.get("run_dir", cfg.get("paths", {}).get("results", "experiments/results")))
+        return (run_dir / "optuna_journal.log").as_posix()
+    return None
+
+
+def _build_study(cfg: Dict[str, Any], storage_spec: Optional[str] = None) -> optuna.study.Study:
+    tracking = cfg.get("tracking") or {}
+    storage = shared_storage(storage_spec) if storage_spec else None
     study_name = f"{cfg.get('project_name', 'nas')}_{tracking.get('run_id', 'run')}"
-    direction = cfg["optuna"]["direction"]
+    objectives = resolve_objectives(cfg["optuna"].get("objectives"))
+    pruner = _build_pruner(cfg["optuna"])
+    constant_liar = _driver_settings(cfg)[1] > 1 and bool(cfg["optuna"].get("constant_liar", True))
+    if len(objectives) > 1:
+        # Multi-objective: one direction per objective, and an NSGA-II or MOTPE sampler.
+        directions = {"directions": [o.direction for o in objectives]}
+        sampler = _multi_objective_sampler(cfg, constant_liar)
+    else:
+        directions = {"direction": cfg["optuna"]["direction"]}
+        sampler = optuna.samplers.TPESampler(seed=cfg.get("seed"), constant_liar=True) if constant_liar else None
 
     if storage:
         return optuna.create_study(
-            direction=direction,
+            **directions,
             storage=storage,
             study_name=study_name,
             load_if_exists=True,
+            pruner=pruner,
+            sampler=sampler,
         )
-    return optuna.create_study(direction=direction)
+    return optuna.create_study(**directions, pruner=pruner, sampler=sampler)
+
+
+def _multi_objective_sampler(cfg: Dict[str, Any], constant_liar: bool = False) -> optuna.samplers.BaseSampler:
+    name = str(cfg["optuna"].get("multi_objective_sampler") or "nsga2").strip().lower()
+    if name == "nsga2":
+        return optuna.samplers.NSGAIISampler(seed=cfg.get("seed"))
+    if name == "motpe":
+        return optuna.samplers.TPESampler(seed=cfg.get("seed"), constant_liar=constant_liar)
+    raise ValueError(f"Unsupported multi-objective sampler: {name}. Available: ['motpe', 'nsga2']")
+
+
+def _save_front(front: ParetoFront, objectives: List[Any], ckpt_root: Optional[Path], dataset_meta: Dict[str, Any], run_id: str) -> List[Dict[str, Any]]:
+    """Front members for the summary; with ``ckpt_root`` each member's weights go to ``pareto/trial_<n>.pt``."""
+    entries = []
+    for member in front.members():
+        params, state_dict = member.payload.get("params"), member.payload.get("state_dict")
+        values = {o.name: v for o, v in zip(objectives, member.values)}
+        checkpoint_path = None
+        if ckpt_root is not None and state_dict is not None:
+            checkpoint_path = ckpt_root / "pareto" / f"trial_{member.number}.pt"
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            torch.save(
+                {"state_dict": state_dict, "params": params, "values": values, "dataset_meta": dataset_meta, "run_id": run_id},
+                checkpoint_path,
+            )
+        entries.append({
+            "number": member.number,
+            "values": values,
+            "params": params,
+            "checkpoint_path": checkpoint_path.as_posix() if checkpoint_path else None,
+        })
+    return entries
+
+
+def _benchmark_latency(cfg: Dict[str, Any], search_space, dataset_meta: Dict[str, Any], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Measured forward latency of ``params``' model at the configured batch sizes and thread counts."""
+    latency_cfg = cfg.get("latency") or {}
+    return benchmark_latency(
+        search_space.build_model(params, dataset_meta),
+        (int(dataset_meta["in_ch"]), int(dataset_meta["size"]), int(dataset_meta["size"])),
+        batch_sizes=latency_cfg.get("benchmark_batch_sizes") or [1],
+        threads=latency_cfg.get("benchmark_threads") or [1],
+        warmup=int(latency_cfg.get("warmup", 10)),
+        iters=int(latency_cfg.get("iters", 50)),
+    )
 
 
-def _make_memory(cfg: Dict[str, Any]):
-    memory_cfg = cfg.get("memory") or {}
-    if not memory_cfg.get("enabled", False):
-        return None
-    return FaissMemoryStore(
-        index_path=memory_cfg["index_path"],
-        records_path=memory_cfg["records_path"],
-    )
+def _proxy_correlation(metrics_path: Path) -> Dict[str, Dict[str, float]]:
+    """Per-dataset Spearman correlation of each zero-cost proxy with the final value, over this run's trials."""
+    if not metrics_path.exists():
+        return {}
+    with metrics_path.open("r", encoding="utf-8") as f:
+        return proxy_correlation(json.loads(line) for line in f if line.strip())
+
+
+def _best_worker_state(workers: List[Dict[str, Any]], direction: str) -> Dict[str, Any]:
+    best_state: Dict[str, Any] = {"value": None, "state_dict": None, "params": None}
+    for worker in workers:
+        if worker["checkpoint_path"] and is_better(worker["best_value"], best_state["value"], direction):
+            best_state = torch.load(worker["checkpoint_path"], map_location="cpu")
+    return best_state
+
+
+def _driver_settings(cfg: Dict[str, Any]) -> Tuple[str, int]:
+    """``(backend, batch_size)`` of the ask/tell driver; ``training.population_size > 1`` selects the batched backend."""
+    optuna_cfg = cfg["optuna"]
+    population_size = int((cfg.get("training") or {}).get("population_size", 1) or 1)
+    if population_size > 1:
+        return "batched", population_size
+    return str(optuna_cfg.get("backend") or "inline").lower(), max(1, int(optuna_cfg.get("batch_size", 1) or 1))
 
 
-def run_optuna_search(cfg, device):
+def run_optuna_search(cfg, device, session: Optional[SearchSession] = None):
+    if (cfg.get("oneshot") or {}).get("enabled", False):
+        return run_oneshot_search(cfg, device, session)
+    # A session passed in stays warm for the caller's next block; one built here closes with the run.
+    with search_session(cfg, session) as session:
+        return _run_optuna_search(cfg, device, session)
+
+
+def _run_optuna_search(cfg, device, session: SearchSession):
+    n_jobs = max(1, int(cfg["optuna"].get("n_jobs", 1)))
+    sampler_name = str(cfg["optuna"].get("sampler") or "tpe").lower()
+    if sampler_name == "evolution" and n_jobs > 1:
+        raise ValueError("optuna.sampler=evolution runs in one process; use optuna.backend=process for parallel trials")
+
     tracking = cfg.get("tracking") or {}
     run_id = tracking.get("run_id", "run")
     run_dir = Path(tracking.get("run_dir", cfg.get("paths", {}).get("results", "experiments/results")))
     metrics_path = run_dir / "metrics.jsonl"
 
-    train_loader, test_loader, dataset_meta = get_loaders(
-        name=cfg["dataset"],
-        batch_size=cfg["batch_size"],
-        num_workers=cfg["num_workers"],
-    )
-    dataset_meta_dict = dataset_meta.to_dict()
-
-    search_space_name = (cfg.get("search_space") or {}).get("name", "simple_cnn_default")
-    search_space = get_search_space(search_space_name)
-
-    memory_store = _make_memory(cfg)
+    dataset_meta_dict = session.dataset_meta.to_dict()
+    search_space = session.search_space
+    memory_store = session.memory_store
     agents_cfg = cfg.get("agents") or {}
     proposal_agent = ProposalAgent(
         strategy=agents_cfg.get("proposal_strategy", "rule_based"),
@@ -113,16 +195,32 @@ def run_optuna_search(cfg, device):
 
     query_context = {
         "dataset": cfg["dataset"],
+        "search_space": search_space.name,
         "in_ch": dataset_meta_dict["in_ch"],
         "size": dataset_meta_dict["size"],
         "batch_size": cfg["batch_size"],
         "epochs": cfg["epochs"],
         "params": {},
     }
-    memory_hits = memory_store.query(query_context, k=int((cfg.get("memory") or {}).get("top_k", 5))) if memory_store else []
+    memory_hits = memory_store.query(query_context, k=int((cfg.get("memory") or {}).get("top_k", 5))) if memory_store is not None else []
     guidance = proposal_agent.suggest_guidance(memory_hits)
 
-    study = _build_study(cfg)
+    storage_spec = _storage_spec(cfg)
+    study = _build_study(cfg, storage_spec)
+
+    # Surrogate pre-ranking: score many random candidates and train only the most promising.
+    # Enqueued first, ahead of the proposals re-enqueued from memory.
+    surrogate = get_surrogate(session, cfg)
+    surrogate_ranked = 0
+    if surrogate is not None and surrogate.ready:
+        surrogate_cfg = cfg.get("surrogate") or {}
+        candidates = sample_candidates(search_space, int(surrogate_cfg.get("candidates", 256)), guidance, seed=int(cfg.get("seed", 0)) + len(study.trials))
+        candidates = surrogate.untried(candidates, (t.params for t in study.trials))
+        top_k = min(int(surrogate_cfg.get("top_k", 4)), int(cfg["optuna"]["n_trials"]))
+        for params, mean, std in surrogate.rank(candidates, query_context, top_k):
+            logger.info(f"Surrogate candidate {params}: predicted {mean:.4f} ± {std:.4f}")
+            study.enqueue_trial(params)
+            surrogate_ranked += 1
 
     if agents_cfg.get("enabled", True):
         for suggested in proposal_agent.propose_trials(cfg, memory_hits):
@@ -133,96 +231,93 @@ def run_optuna_search(cfg, device):
 
     logger.info("Starting Optuna NAS search...")
 
-    best_state: Dict[str, Any] = {"value": None, "state_dict": None, "params": None}
-
-    def objective(trial: optuna.trial.Trial):
-        params = search_space.sample(trial, guidance=guidance)
-        model = search_space.build_model(params, dataset_meta_dict).to(device)
-        criterion = nn.CrossEntropyLoss()
-        optimizer = optim.AdamW(model.parameters(), lr=float(params["lr"]))
-
-        epochs = max(1, int(cfg["epochs"]))
-        start = time.perf_counter()
-        last_train_loss, last_train_acc = None, None
-
-        with carbon_tracker(f"{cfg.get('project_name', 'nas')}_{run_id}_trial_{trial.number}") as carbon_state:
-            for _ in range(epochs):
-                last_train_loss, last_train_acc = train_one_epoch(model, train_loader, device, optimizer, criterion)
-
-        eval_loss, eval_acc = evaluate(model, test_loader, device, criterion)
-        duration_s = time.perf_counter() - start
-
-        model_params = count_params(model)
-        flops = try_flops(model, input_size=(1, int(dataset_meta_dict["in_ch"]), int(dataset_meta_dict["size"]), int(dataset_meta_dict["size"])))
-        emissions_kg = carbon_state.get("emissions_kg")
-
-        trial.set_user_attr("params", int(model_params))
-        trial.set_user_attr("flops", int(flops))
-        trial.set_user_attr("eval_loss", float(eval_loss))
-        trial.set_user_attr("eval_acc", float(eval_acc))
-        trial.set_user_attr("train_loss", float(last_train_loss) if last_train_loss is not None else None)
-        trial.set_user_attr("train_acc", float(last_train_acc) if last_train_acc is not None else None)
-        trial.set_user_attr("emissions_kg", float(emissions_kg) if emissions_kg is not None else None)
-        trial.set_user_attr("duration_s", float(duration_s))
-
-        record = TrialRecord(
-            run_id=run_id,
-            trial_number=int(trial.number),
-            dataset=str(cfg["dataset"]),
-            device=str(device),
-            search_space=search_space.name,
-            params=params,
-            value=float(eval_acc),
-            train_loss=float(last_train_loss) if last_train_loss is not None else None,
-            train_acc=float(last_train_acc) if last_train_acc is not None else None,
-            eval_loss=float(eval_loss),
-            eval_acc=float(eval_acc),
-            model_params=int(model_params),
-            flops=int(flops),
-            emissions_kg=float(emissions_kg) if emissions_kg is not None else None,
-            duration_s=float(duration_s),
-            config_hash=str(tracking.get("config_hash", "")),
-            context={
-                "dataset": cfg["dataset"],
-                "in_ch": dataset_meta_dict["in_ch"],
-                "size": dataset_meta_dict["size"],
-                "batch_size": cfg["batch_size"],
-                "epochs": cfg["epochs"],
-            },
-            tags=["optuna", search_space.name],
+    workers: List[Dict[str, Any]] = []
+    if n_jobs > 1:
+        latency_table = LatencyTable.from_cfg(cfg)
+        if latency_table is not None:
+            # Timed here once, so the workers load a complete table instead of timing it concurrently.
+            prebuild_table(latency_table, cfg, search_space, dataset_meta_dict, guidance)
+        workers = run_parallel_trials(
+            cfg,
+            device,
+            storage_spec=storage_spec,
+            study_name=study.study_name,
+            pruner=_build_pruner(cfg["optuna"]),
+            guidance=guidance,
+            checkpoint_dir=(run_dir / "workers").as_posix() if tracking.get("save_checkpoints") else None,
         )
-
-        append_jsonl(metrics_path, record.model_dump(mode="python"))
-        if memory_store:
-            memory_store.add(record)
-
-        direction = str(cfg["optuna"]["direction"]).lower()
-        is_better = best_state["value"] is None
-        if not is_better:
-            if direction == "minimize":
-                is_better = float(eval_acc) < float(best_state["value"])
-            else:
-                is_better = float(eval_acc) > float(best_state["value"])
-
-        if is_better:
-            best_state["value"] = float(eval_acc)
-            best_state["params"] = dict(params)
-            best_state["state_dict"] = {k: v.detach().cpu() for k, v in model.state_dict().items()}
-
-        return float(eval_acc)
-
-    study.optimize(
-        objective,
-        n_trials=cfg["optuna"]["n_trials"],
-        timeout=cfg["optuna"].get("timeout"),
-    )
-
-    best = study.best_trial
+        # Workers never touch the memory store; merge their completed trials here.
+        worker_records = [TrialRecord.model_validate(raw) for worker in workers for raw in worker.pop("records")]
+        if memory_store is not None:
+            memory_store.add_many(worker_records)
+        best_state = _best_worker_state(workers, cfg["optuna"]["direction"])
+        front = None  # rebuilt from the study below; workers keep only their best weights
+    else:
+        runner = TrialRunner(cfg, device, session, guidance=guidance, memory_store=memory_store)
+        backend_name, batch_size = _driver_settings(cfg)
+        evolution = None
+        if sampler_name == "evolution":
+            if runner.front is not None:
+                raise ValueError("optuna.sampler=evolution optimizes a single objective; use multi_objective_sampler for several")
+            evolution = RegularizedEvolution.from_cfg(cfg, search_space, guidance=guidance, direction=cfg["optuna"]["direction"])
+            # Nearby completed trials from memory make the initial population.
+            evolution.tell_many((hit.params, hit.value) for hit in memory_hits if hit.status == "completed")
+        if backend_name == "inline" and batch_size == 1 and evolution is None:
+            study.optimize(
+                runner,
+                n_trials=cfg["optuna"]["n_trials"],
+                timeout=cfg["optuna"].get("timeout"),
+            )
+        else:
+            logger.info(f"Ask/tell driver: backend={backend_name}, batch_size={batch_size}")
+            AskTellDriver(
+                study,
+                runner,
+                make_backend(backend_name, runner, cfg, device, batch_size),
+                n_trials=int(cfg["optuna"]["n_trials"]),
+                batch_size=batch_size,
+                timeout=cfg["optuna"].get("timeout"),
+                proposer=evolution,
+            ).run()
+        best_state = runner.best_state
+        front = runner.front
+        latency_table = runner.latency
+        if evolution is not None:
+            logger.info(f"Regularized evolution: {evolution.stats()}")
+
+    if surrogate is not None:
+        surrogate.sync()
+
+    completed = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+    pruned_trials = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.PRUNED,))
+    if not completed:
+        raise RuntimeError(f"No Optuna trial completed ({len(pruned_trials)} pruned); cannot select a best trial.")
+    objectives = resolve_objectives(cfg["optuna"].get("objectives"))
+    if len(objectives) > 1:
+        if front is None:
+            front = ParetoFront([o.direction for o in objectives])
+            for t in completed:
+                front.add(t.number, t.values, {"params": dict(t.params)})
+        # The front member best on the first objective stands in for the single best trial.
+        best = next(t for t in completed if t.number == front.members()[0].number)
+        best_value = best.values[0]
+    else:
+        best = study.best_trial
+        best_value = best.value
     trials: List[Dict[str, Any]] = [_trial_record(t) for t in study.trials]
+    if len(objectives) > 1:
+        # Front rank of every completed trial (0 = non-dominated, 1 = non-dominated once those are removed, ...).
+        # A trial that ties a front member exactly ranks 0 too, though the front keeps only the first.
+        ranks = non_dominated_sort([[v * sign for v, sign in zip(t.values, front.signs)] for t in completed])
+        rank_of = dict(zip((t.number for t in completed), ranks.tolist()))
+        for record in trials:
+            if record["number"] in rank_of:
+                record["pareto_rank"] = rank_of[record["number"]]
 
     checkpoint_path = None
-    if tracking.get("save_checkpoints") and best_state.get("state_dict") is not None:
-        ckpt_root = Path((cfg.get("paths") or {}).get("checkpoints", "checkpoints")) / run_id
+    ckpt_root = Path((cfg.get("paths") or {}).get("checkpoints", "checkpoints")) / run_id if tracking.get("save_checkpoints") else None
+    pareto_front = _save_front(front, objectives, ckpt_root, dataset_meta_dict, run_id) if len(objectives) > 1 else None
+    if ckpt_root is not None and best_state.get("state_dict") is not None:
         ckpt_root.mkdir(parents=True, exist_ok=True)
         checkpoint_path = ckpt_root / "best_model.pt"
         torch.save(
@@ -235,28 +330,67 @@ def run_optuna_search(cfg, device):
             },
             checkpoint_path,
         )
+    if ckpt_root is not None and best.user_attrs.get("cached"):
+        if checkpoint_path is None:
+            logger.warning(f"Best trial {best.number} was served from the result cache and no trial was trained; best_model.pt not written")
+        else:
+            logger.warning(
+                f"Best trial {best.number} was served from the result cache ({best.user_attrs.get('cached_from')}); "
+                f"best_model.pt holds the best trained trial instead (value {best_state['value']:.4f})"
+            )
+
+    # Benchmark stage: time the selected architectures for real, next to the table's prediction.
+    latency = None
+    if latency_table is not None:
+        latency = {"lut": latency_table.stats(), "predicted_ms": best.user_attrs.get("latency_ms"), "best": None}
+        if (cfg.get("latency") or {}).get("benchmark", True):
+            latency["best"] = _benchmark_latency(cfg, search_space, dataset_meta_dict, dict(best.params))
+            for entry in pareto_front or []:
+                if entry["params"]:
+                    entry["latency"] = _benchmark_latency(cfg, search_space, dataset_meta_dict, entry["params"])
+            for row in latency["best"]:
+                logger.info(
+                    f"Best model latency (batch {row['batch_size']}, {row['threads']} thread(s)): "
+                    f"p50 {row['p50_ms']:.3f} ms, p90 {row['p90_ms']:.3f} ms"
+                )
 
     attrs = {
         "params": best.user_attrs.get("params"),
         "flops": best.user_attrs.get("flops"),
         "n_trials": len(study.trials),
+        "n_pruned": len(pruned_trials),
+        "n_rejected": sum(1 for t in pruned_trials if t.user_attrs.get("status") == "rejected"),
+        "pruned_epochs": sum(float(t.user_attrs.get("epochs_completed") or 0.0) for t in pruned_trials),
         "direction": cfg["optuna"]["direction"],
+        "objectives": [o.name for o in objectives],
         "search_space": search_space.name,
-        "memory_enabled": bool(memory_store),
+        "memory_enabled": memory_store is not None,
         "memory_hits": len(memory_hits),
+        "cache_hits": sum(1 for t in completed if t.user_attrs.get("cached")),
+        "surrogate_ranked": surrogate_ranked,
+        "proxy_correlation": _proxy_correlation(metrics_path) if (cfg.get("proxies") or {}).get("enabled") else None,
+        "latency": latency,
+        "n_jobs": n_jobs,
+        "sampler": sampler_name,
+        "workers": workers,
         "metrics_path": metrics_path.as_posix(),
         "checkpoint_path": checkpoint_path.as_posix() if checkpoint_path else None,
     }
     summary = {
         "run_id": run_id,
         "run_dir": run_dir.as_posix(),
-        "best_value": best.value,
+        "best_value": best_value,
         "best_params": dict(best.params),
         "trials": trials,
         "attrs": attrs,
     }
+    if pareto_front is not None:
+        summary["pareto_front"] = pareto_front
+        logger.info(f"Pareto front ({', '.join(o.name for o in objectives)}): {len(pareto_front)} trial(s)")
+        for entry in pareto_front:
+            logger.info(f"  Trial {entry['number']}: {entry['values']}")
 
-    logger.info(f"Best trial value: {best.value:.4f}")
+    logger.info(f"Best trial value: {best_value:.4f}")
     logger.info(f"Best params: {best.params}")
     logger.info(f"Params: {best.user_attrs.get('params')}, FLOPs: {best.user_attrs.get('flops')}")
 
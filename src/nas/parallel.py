@@ -0,0 +1,172 @@
+"""
+Parallel Optuna trial execution.
+
+``optuna.n_jobs`` worker processes (spawned, so CUDA and thread pools start
+clean) each load the same study from a shared storage: ``tracking.optuna_storage``
+when set, otherwise a journal file in the run directory. Every worker gets a
+bounded ``torch.set_num_threads`` share of the machine and claims trials from a
+shared counter, so the study runs exactly ``n_trials`` trials in total. Workers
+append their own lines to ``metrics.jsonl`` (the append is locked) and hand their
+completed records and best checkpoint back to the parent, which is the only
+process that writes to the memory store.
+"""
+from __future__ import annotations
+
+import copy
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import optuna
+import torch
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def resolve_threads_per_worker(n_jobs: int, threads_per_worker: Optional[int] = None) -> int:
+    if threads_per_worker:
+        return max(1, int(threads_per_worker))
+    return max(1, (os.cpu_count() or 1) // max(1, int(n_jobs)))
+
+
+def shared_storage(spec: str):
+    """Storage object for ``spec``: a database URL is passed through, anything else is a journal file path."""
+    if "://" in spec:
+        return spec
+    Path(spec).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        from optuna.storages.journal import JournalFileBackend
+
+        backend = JournalFileBackend(spec)
+    except ImportError:  # optuna < 4.0
+        backend = optuna.storages.JournalFileStorage(spec)
+    return optuna.storages.JournalStorage(backend)
+
+
+def _claim(tickets, lock, deadline: Optional[float]) -> bool:
+    if deadline is not None and time.time() >= deadline:
+        return False
+    with lock:
+        if tickets.value <= 0:
+            return False
+        tickets.value -= 1
+        return True
+
+
+def _worker_sampler(cfg: Dict[str, Any], seed: int) -> optuna.samplers.BaseSampler:
+    optuna_cfg = cfg.get("optuna") or {}
+    if len(optuna_cfg.get("objectives") or ["accuracy"]) > 1 and str(optuna_cfg.get("multi_objective_sampler") or "nsga2").lower() == "nsga2":
+        return optuna.samplers.NSGAIISampler(seed=seed)
+    return optuna.samplers.TPESampler(seed=seed, constant_liar=True)
+
+
+def _worker_main(
+    worker_id: int,
+    cfg: Dict[str, Any],
+    device,
+    storage_spec: str,
+    study_name: str,
+    pruner: optuna.pruners.BasePruner,
+    guidance: Optional[Dict[str, Any]],
+    tickets,
+    lock,
+    deadline: Optional[float],
+    threads: int,
+    checkpoint_dir: Optional[str],
+) -> Dict[str, Any]:
+    # Imported here so the parent can import this module without the training stack.
+    from nas.objective import TrialRunner
+    from nas.session import get_search_session
+    from utils.env import set_seed
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    set_seed(int(cfg.get("seed", 42)) + worker_id)
+
+    cfg = copy.deepcopy(cfg)
+    # Loader worker processes would oversubscribe the cores already split between trial workers;
+    # the memory store is written by the parent only.
+    cfg["num_workers"] = 0
+    cfg.setdefault("memory", {})["enabled"] = False
+
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=shared_storage(storage_spec),
+        pruner=pruner,
+        sampler=_worker_sampler(cfg, int(cfg.get("seed", 42)) + worker_id),
+    )
+    runner = TrialRunner(cfg, device, get_search_session(cfg), guidance=guidance)
+
+    start = time.perf_counter()
+    n_run = 0
+    while _claim(tickets, lock, deadline):
+        study.optimize(runner, n_trials=1)
+        n_run += 1
+    elapsed = time.perf_counter() - start
+
+    checkpoint_path = None
+    if checkpoint_dir and runner.best_state["state_dict"] is not None:
+        checkpoint_path = Path(checkpoint_dir) / f"worker_{worker_id}_best.pt"
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        torch.save(runner.best_state, checkpoint_path)
+
+    return {
+        "worker_id": worker_id,
+        "threads": threads,
+        "trials": n_run,
+        "elapsed_s": elapsed,
+        "best_value": runner.best_state["value"],
+        "checkpoint_path": checkpoint_path.as_posix() if checkpoint_path else None,
+        "records": [r.model_dump(mode="json") for r in runner.records],
+    }
+
+
+def run_parallel_trials(
+    cfg: Dict[str, Any],
+    device,
+    storage_spec: str,
+    study_name: str,
+    pruner: optuna.pruners.BasePruner,
+    guidance: Optional[Dict[str, Any]] = None,
+    checkpoint_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Runs ``optuna.n_trials`` trials of ``study_name`` across ``optuna.n_jobs`` worker processes."""
+    optuna_cfg = cfg["optuna"]
+    n_jobs = max(1, int(optuna_cfg.get("n_jobs", 1)))
+    threads = resolve_threads_per_worker(n_jobs, optuna_cfg.get("threads_per_worker"))
+    timeout = optuna_cfg.get("timeout")
+    deadline = time.time() + float(timeout) if timeout else None
+
+    ctx = mp.get_context("spawn")
+    logger.info(f"Running {optuna_cfg['n_trials']} trials on {n_jobs} workers x {threads} threads")
+    with ctx.Manager() as manager:
+        tickets = manager.Value("i", int(optuna_cfg["n_trials"]))
+        lock = manager.Lock()
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=ctx) as pool:
+            futures = [
+                pool.submit(
+                    _worker_main,
+                    worker_id,
+                    cfg,
+                    str(device),
+                    storage_spec,
+                    study_name,
+                    pruner,
+                    guidance,
+                    tickets,
+                    lock,
+                    deadline,
+                    threads,
+                    checkpoint_dir,
+                )
+                for worker_id in range(n_jobs)
+            ]
+            return [f.result() for f in futures]
@@ -0,0 +1,131 @@
+"""
+Multi-objective search: objectives and the Pareto front.
+
+An objective names a trial user attr and a direction (``OBJECTIVES``);
+``optuna.objectives: [accuracy, flops]`` makes the study optimize them
+together (``directions``) and every trial returns one value per objective.
+
+``ParetoFront`` is the set of completed trials no other trial dominates. It is
+updated one trial at a time as results arrive: the new point is compared with
+the current front in one vectorized step, and it is either rejected (weakly
+dominated by a member) or added while the members it dominates are dropped.
+Each member keeps a payload, e.g. its params and weights, so the summary and
+checkpoints can cover the whole front. ``non_dominated_sort`` ranks a full set
+of points (rank 0 is the front); the summary stores each completed trial's rank
+as ``pareto_rank``.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# name -> (trial user attr, direction)
+OBJECTIVES: Dict[str, Tuple[str, str]] = {
+    "accuracy": ("eval_acc", "maximize"),
+    "loss": ("eval_loss", "minimize"),
+    "params": ("params", "minimize"),
+    "flops": ("flops", "minimize"),
+    "activation_memory": ("peak_activation_bytes", "minimize"),
+    "latency": ("latency_ms", "minimize"),  # predicted by nas.latency (latency.enabled)
+    "duration": ("duration_s", "minimize"),
+    "emissions": ("emissions_kg", "minimize"),
+}
+
+
+@dataclass(frozen=True)
+class Objective:
+    name: str
+    attr: str
+    direction: str
+
+
+def resolve_objectives(names: Optional[Sequence[str]]) -> List[Objective]:
+    names = [str(n).strip().lower() for n in (names or ["accuracy"])]
+    unknown = [n for n in names if n not in OBJECTIVES]
+    if unknown:
+        raise ValueError(f"Unsupported objectives: {unknown}. Available: {sorted(OBJECTIVES)}")
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate objectives: {names}")
+    return [Objective(n, *OBJECTIVES[n]) for n in names]
+
+
+def objective_values(objectives: Sequence[Objective], attrs: Dict[str, Any]) -> List[float]:
+    """The objectives' values from a trial's user attrs; a missing value counts as the worst possible."""
+    values = []
+    for objective in objectives:
+        value = attrs.get(objective.attr)
+        if value is None:
+            value = -math.inf if objective.direction == "maximize" else math.inf
+        values.append(float(value))
+    return values
+
+
+def _minimized(values: Any, signs: np.ndarray) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64) * signs
+
+
+def non_dominated_sort(points: np.ndarray) -> np.ndarray:
+    """Front rank of each row of ``points`` (all objectives minimized); rank 0 is the Pareto front."""
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    ranks = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return ranks
+    le = (points[:, None, :] <= points[None, :, :]).all(axis=2)
+    lt = (points[:, None, :] < points[None, :, :]).any(axis=2)
+    dominates = le & lt  # dominates[i, j]: row i dominates row j
+    dominated_by = dominates.sum(axis=0)
+    rank, current = 0, np.flatnonzero(dominated_by == 0)
+    while current.size:
+        ranks[current] = rank
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        rank, current = rank + 1, np.flatnonzero(dominated_by == 0)
+    return ranks
+
+
+@dataclass
+class FrontMember:
+    number: int
+    values: List[float]
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class ParetoFront:
+    def __init__(self, directions: Sequence[str]) -> None:
+        self.directions = [str(d).lower() for d in directions]
+        self.signs = np.array([-1.0 if d == "maximize" else 1.0 for d in self.directions])
+        self._points = np.empty((0, len(self.directions)), dtype=np.float64)  # minimized values of the members
+        self._members: List[FrontMember] = []
+        self.seen = 0
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def dominated(self, values: Sequence[float]) -> bool:
+        """Whether a member is at least as good as ``values`` on every objective (or a value is NaN)."""
+        point = _minimized(values, self.signs)
+        return bool(np.isnan(point).any() or (self._points <= point).all(axis=1).any())
+
+    def add(self, number: int, values: Sequence[float], payload: Optional[Dict[str, Any]] = None) -> bool:
+        """Offers a completed trial; returns whether it joined the front."""
+        self.seen += 1
+        if self.dominated(values):
+            return False
+        point = _minimized(values, self.signs)
+        keep = ~((point <= self._points).all(axis=1) & (point < self._points).any(axis=1))
+        self._points = np.vstack([self._points[keep], point])
+        self._members = [m for m, k in zip(self._members, keep) if k]
+        self._members.append(FrontMember(int(number), [float(v) for v in values], dict(payload or {})))
+        return True
+
+    def __contains__(self, number: int) -> bool:
+        return any(m.number == number for m in self._members)
+
+    def members(self) -> List[FrontMember]:
+        """Front members ordered by the first objective, best first."""
+        order = np.argsort(self._points[:, 0], kind="stable")
+        return [self._members[i] for i in order]
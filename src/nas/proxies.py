@@ -0,0 +1,233 @@
+"""
+Zero-cost proxies: training-free scores that rank untrained architectures.
+
+Each proxy needs one forward/backward pass over a mini-batch:
+
+- ``synflow``: sum of |θ · ∂R/∂θ| where R is the output sum of the network
+  with absolute weights on an all-ones input (data independent).
+- ``grad_norm``: summed L2 norm of the loss gradients of the weights.
+- ``jacob_cov``: how uncorrelated the input Jacobians of the samples are
+  (higher = more expressive), from the eigenvalues of their correlation matrix.
+- ``naswot``: log-determinant of the kernel of binary ReLU codes; networks
+  that map different inputs to different activation patterns score higher.
+
+Proxies run on a deep copy of the model in eval mode, so the candidate's own
+weights, gradients and dropout state are untouched.
+
+``ProxyScreen`` caches the first ``batches`` mini-batches of the training
+loader, scores each candidate and ranks it against the candidates scored so
+far: its quantile is the mean, over proxies, of the fraction of earlier scores
+it beats. After ``min_history`` candidates, ``action="reject"`` rejects
+candidates below ``reject_quantile``. ``action="deprioritize"`` rejects nothing
+while screening; ``keep`` then orders a round's candidates by quantile and
+keeps the best-ranked ``1 - reject_quantile`` share. ``action="record"`` only
+records scores.
+"""
+from __future__ import annotations
+
+import copy
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Batch = Tuple[torch.Tensor, torch.Tensor]
+
+
+def _weights(model: nn.Module) -> List[nn.Parameter]:
+    return [m.weight for m in model.modules() if isinstance(m, (nn.Conv2d, nn.Linear)) and m.weight.requires_grad]
+
+
+def synflow(model: nn.Module, batch: Batch) -> float:
+    x, _ = batch
+    net = copy.deepcopy(model).double().eval()
+    with torch.no_grad():
+        for p in net.state_dict().values():
+            p.abs_()
+    net.zero_grad(set_to_none=True)
+    ones = torch.ones((1,) + tuple(x.shape[1:]), dtype=torch.float64, device=x.device)
+    net(ones).sum().backward()
+    return sum(float((w * w.grad).abs().sum().detach()) for w in _weights(net) if w.grad is not None)
+
+
+def grad_norm(model: nn.Module, batch: Batch) -> float:
+    x, y = batch
+    net = copy.deepcopy(model).eval()
+    net.zero_grad(set_to_none=True)
+    F.cross_entropy(net(x), y).backward()
+    return sum(float(w.grad.norm()) for w in _weights(net) if w.grad is not None)
+
+
+def jacob_cov(model: nn.Module, batch: Batch) -> float:
+    x, _ = batch
+    net = copy.deepcopy(model).eval()
+    x = x.detach().clone().requires_grad_(True)
+    net(x).sum().backward()
+    jacobs = x.grad.reshape(x.shape[0], -1).double().cpu().numpy()
+    corr = np.nan_to_num(np.corrcoef(jacobs), nan=0.0)
+    eig = np.clip(np.linalg.eigvalsh(corr), 0.0, None)
+    k = 1e-5
+    return float(-np.sum(np.log(eig + k) + 1.0 / (eig + k)))
+
+
+def naswot(model: nn.Module, batch: Batch) -> float:
+    x, _ = batch
+    net = copy.deepcopy(model).eval()
+    # ReLU codes: hook ReLU modules, or the pre-activations of every layer but the last
+    # when the network applies ReLU functionally (as SimpleCNN does).
+    layers = [m for m in net.modules() if isinstance(m, nn.ReLU)]
+    if not layers:
+        layers = [m for m in net.modules() if isinstance(m, (nn.Conv2d, nn.Linear))][:-1]
+    n = x.shape[0]
+    kernel = torch.zeros((n, n), dtype=torch.float64, device=x.device)
+
+    def hook(module, inputs, output):
+        codes = (output.detach().reshape(n, -1) > 0).double()
+        kernel.add_(codes @ codes.t() + (1.0 - codes) @ (1.0 - codes).t())
+
+    handles = [m.register_forward_hook(hook) for m in layers]
+    try:
+        with torch.no_grad():
+            net(x)
+    finally:
+        for h in handles:
+            h.remove()
+    return float(torch.slogdet(kernel)[1])
+
+
+PROXIES: Dict[str, Callable[[nn.Module, Batch], float]] = {
+    "synflow": synflow,
+    "grad_norm": grad_norm,
+    "jacob_cov": jacob_cov,
+    "naswot": naswot,
+}
+
+
+def compute_proxies(model: nn.Module, batches: List[Batch], names: Iterable[str]) -> Dict[str, float]:
+    """Mean of each proxy over ``batches``; a proxy that fails or is not finite is left out."""
+    scores: Dict[str, float] = {}
+    for name in names:
+        try:
+            values = [PROXIES[name](model, batch) for batch in batches]
+        except Exception as exc:
+            logger.warning(f"Proxy {name} failed: {exc}")
+            continue
+        value = float(np.mean(values))
+        if math.isfinite(value):
+            scores[name] = value
+    return scores
+
+
+@dataclass
+class ProxyVerdict:
+    scores: Dict[str, float]
+    quantile: Optional[float]  # None while the history is shorter than ``min_history``
+    rejected: bool
+    seconds: float = 0.0
+
+
+@dataclass
+class ProxyScreen:
+    names: List[str] = field(default_factory=lambda: list(PROXIES))
+    reject_quantile: float = 0.5
+    min_history: int = 8
+    action: str = "reject"  # reject | deprioritize | record
+    batches: int = 1
+    history: Dict[str, List[float]] = field(default_factory=dict)
+    _batches: Optional[List[Batch]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any]) -> Optional["ProxyScreen"]:
+        proxy_cfg = cfg.get("proxies") or {}
+        if not proxy_cfg.get("enabled", False):
+            return None
+        return cls(
+            names=[n for n in (proxy_cfg.get("names") or list(PROXIES)) if n in PROXIES],
+            reject_quantile=float(proxy_cfg.get("reject_quantile", 0.5)),
+            min_history=int(proxy_cfg.get("min_history", 8)),
+            action=str(proxy_cfg.get("action", "reject")).lower(),
+            batches=int(proxy_cfg.get("batches", 1)),
+        )
+
+    def load_batches(self, loader, device) -> List[Batch]:
+        """The first ``batches`` mini-batches of ``loader`` on ``device``, read once and reused for every candidate."""
+        if self._batches is None:
+            batches = []
+            for x, y in loader:
+                batches.append((x.to(device), y.to(device)))
+                if len(batches) >= max(1, self.batches):
+                    break
+            self._batches = batches
+        return self._batches
+
+    def quantile(self, scores: Dict[str, float]) -> Optional[float]:
+        ranks = [
+            float(np.mean(np.asarray(self.history[name]) < value))
+            for name, value in scores.items()
+            if len(self.history.get(name, [])) >= self.min_history
+        ]
+        return float(np.mean(ranks)) if ranks else None
+
+    def screen(self, model: nn.Module, loader, device) -> ProxyVerdict:
+        """Scores ``model``, ranks it against earlier candidates and adds it to the history."""
+        start = time.perf_counter()
+        scores = compute_proxies(model.to(device), self.load_batches(loader, device), self.names)
+        quantile = self.quantile(scores)
+        for name, value in scores.items():
+            self.history.setdefault(name, []).append(value)
+        rejected = self.action == "reject" and quantile is not None and quantile < self.reject_quantile
+        return ProxyVerdict(scores=scores, quantile=quantile, rejected=rejected, seconds=time.perf_counter() - start)
+
+    def keep(self, quantiles: Dict[int, Optional[float]], rejected: Iterable[int] = ()) -> List[int]:
+        """
+        Keys of a round's candidates to train, from their quantiles. ``reject`` keeps the
+        candidates not in ``rejected``; ``deprioritize`` keeps the best-ranked
+        ``1 - reject_quantile`` share. Candidates without a quantile yet are always kept,
+        and a round always keeps at least its best-ranked candidate.
+        """
+        unranked = [key for key, q in quantiles.items() if q is None]
+        ranked = sorted((key for key, q in quantiles.items() if q is not None), key=lambda key: quantiles[key], reverse=True)
+        if self.action == "deprioritize":
+            kept = unranked + ranked[: math.ceil((1.0 - self.reject_quantile) * len(ranked))]
+        else:
+            dropped = set(rejected)
+            kept = [key for key in quantiles if key not in dropped]
+        if not kept and ranked:
+            kept = ranked[:1]
+        return kept
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra = np.argsort(np.argsort(a)).astype(np.float64)
+    rb = np.argsort(np.argsort(b)).astype(np.float64)
+    if ra.std() == 0 or rb.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def proxy_correlation(records: Iterable[Dict[str, Any]], min_records: int = 5) -> Dict[str, Dict[str, float]]:
+    """Spearman correlation between each proxy and the final value of completed records, per dataset."""
+    by_dataset: Dict[str, Dict[str, List[Tuple[float, float]]]] = {}
+    for record in records:
+        scores = record.get("proxy_scores") or {}
+        if record.get("status", "completed") != "completed" or not scores or "cached" in (record.get("tags") or []):
+            continue
+        per_proxy = by_dataset.setdefault(str(record.get("dataset", "")).upper(), {})
+        for name, value in scores.items():
+            per_proxy.setdefault(name, []).append((float(value), float(record.get("value") or 0.0)))
+    result: Dict[str, Dict[str, float]] = {}
+    for dataset, per_proxy in by_dataset.items():
+        for name, pairs in per_proxy.items():
+            if len(pairs) >= min_records:
+                arr = np.asarray(pairs)
+                result.setdefault(dataset, {})[name] = round(_spearman(arr[:, 0], arr[:, 1]), 4)
+    return result
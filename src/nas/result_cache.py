@@ -0,0 +1,150 @@
+"""
+Memoized trial results keyed by canonical architecture and training context.
+
+Optuna re-samples identical categorical configurations and the proposal agent
+re-enqueues params from memory, so the same architecture is often trained again
+under the same dataset, batch size and epochs. ``ResultCache`` answers such
+trials from earlier measurements instead.
+
+Params are canonicalized before hashing: keys are sorted and floats rounded to
+``float_digits`` significant digits, so ``lr=0.0123456789`` from a JSONL round
+trip and from the sampler hash alike. The key also covers the training context
+(search space, dataset, input shape, batch size, epochs) and, with
+``match_seed``, the run seed.
+
+Repeat policy: a key is served from the cache once ``repeats`` completed
+measurements exist for it. Until then the trial trains normally, so with
+``repeats=3`` an architecture is trained three times (under different RNG
+states) and later samples get the mean of those runs. Pruned and cached trials
+never count as measurements, and neither do trials that started from
+supernet or parent weights.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_CONTEXT_KEYS = ("in_ch", "size", "batch_size", "epochs")
+# Trials that did not train from scratch: served from the cache, fine-tuned from a supernet, or warm-started.
+_SKIP_TAGS = ("cached", "oneshot", "inherited")
+
+
+def canonical_params(params: Any, digits: int = 4) -> Any:
+    """Sorted, float-rounded copy of ``params`` that is stable across JSON round trips."""
+    if isinstance(params, dict):
+        return {str(k): canonical_params(params[k], digits) for k in sorted(params, key=str)}
+    if isinstance(params, (list, tuple)):
+        return [canonical_params(v, digits) for v in params]
+    if isinstance(params, bool) or params is None or isinstance(params, str):
+        return params
+    if isinstance(params, int):
+        return int(params)
+    if isinstance(params, float):
+        if params.is_integer():
+            return int(params)
+        return float(f"{params:.{max(1, digits) - 1}e}")
+    return str(params)
+
+
+def architecture_hash(params: Dict[str, Any], context: Dict[str, Any], digits: int = 4) -> str:
+    """SHA-256 of the canonical params plus the training context they were measured in."""
+    payload = {"params": canonical_params(params, digits), "context": canonical_params(context, digits)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, repeats: int = 1, match_seed: bool = False, float_digits: int = 4) -> None:
+        self.repeats = max(1, int(repeats))
+        self.match_seed = bool(match_seed)
+        self.float_digits = int(float_digits)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._seen: set = set()  # (run_id, trial_number) already added
+        self._jsonl_path: Optional[Path] = None
+        self._jsonl_offset = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any]) -> Optional["ResultCache"]:
+        cache_cfg = cfg.get("result_cache") or {}
+        if not cache_cfg.get("enabled", False):
+            return None
+        return cls(
+            repeats=int(cache_cfg.get("repeats", 1)),
+            match_seed=bool(cache_cfg.get("match_seed", False)),
+            float_digits=int(cache_cfg.get("float_digits", 4)),
+        )
+
+    def _context_key(self, search_space: str, dataset: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        key = {"search_space": str(search_space), "dataset": str(dataset).upper()}
+        key.update({k: context.get(k) for k in _CONTEXT_KEYS})
+        if self.match_seed:
+            key["seed"] = context.get("seed")
+        return key
+
+    def key(self, params: Dict[str, Any], search_space: str, dataset: str, context: Dict[str, Any]) -> str:
+        return architecture_hash(params, self._context_key(search_space, dataset, context), self.float_digits)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Adds a trial record (a ``TrialRecord`` dump); only completed, trained trials count."""
+        tags = record.get("tags") or []
+        if record.get("status", "completed") != "completed" or any(tag in tags for tag in _SKIP_TAGS):
+            return
+        ident = (record.get("run_id"), record.get("trial_number"))
+        if ident in self._seen:
+            return
+        self._seen.add(ident)
+        key = self.key(record.get("params") or {}, record.get("search_space", ""), record.get("dataset", ""), record.get("context") or {})
+        self._entries.setdefault(key, []).append(record)
+
+    def load_records(self, records) -> int:
+        """Seeds the cache from ``TrialRecord``s, e.g. memory-store history. Returns how many were usable."""
+        before = sum(len(v) for v in self._entries.values())
+        for record in records:
+            self.add(record.model_dump(mode="python") if hasattr(record, "model_dump") else dict(record))
+        return sum(len(v) for v in self._entries.values()) - before
+
+    def follow_jsonl(self, path: Path) -> None:
+        """Tracks ``metrics.jsonl``; lines appended by this or other processes are read on ``refresh``."""
+        self._jsonl_path, self._jsonl_offset = Path(path), 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        path = self._jsonl_path
+        if path is None or not path.exists() or path.stat().st_size <= self._jsonl_offset:
+            return
+        with path.open("rb") as f:
+            f.seek(self._jsonl_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a line another process is still writing
+                self._jsonl_offset += len(line)
+                try:
+                    self.add(json.loads(line))
+                except ValueError:
+                    continue
+
+    def lookup(self, params: Dict[str, Any], search_space: str, dataset: str, context: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], int]]:
+        """
+        ``(record, n)`` when ``params`` has at least ``repeats`` measurements in this context:
+        the latest record with ``value``/``eval_acc`` replaced by the mean over all ``n``.
+        """
+        self.refresh()
+        entries = self._entries.get(self.key(params, search_space, dataset, context), [])
+        if len(entries) < self.repeats:
+            self.misses += 1
+            return None
+        self.hits += 1
+        mean = sum(float(r.get("value") or 0.0) for r in entries) / len(entries)
+        record = dict(entries[-1])
+        record["value"] = record["eval_acc"] = mean
+        return record, len(entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "keys": len(self._entries)}
@@ -0,0 +1,140 @@
+"""
+Process-wide search sessions.
+
+A session keeps the expensive per-run state warm (data loaders and their worker
+processes, the search space and the FAISS memory store) so that consecutive
+search blocks of the same run reuse it instead of rebuilding it every time.
+Sessions are keyed by the config values they depend on and must be invalidated
+explicitly when those resources change on disk. Entry points take their session
+through ``search_session``, which closes it when the run ends unless the caller
+passed in a session of its own.
+"""
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from datasets.loader import DatasetMeta, get_loaders
+from memory import FaissMemoryStore
+from search_spaces import get_search_space
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SessionKey = Tuple[Any, ...]
+
+
+@dataclass
+class SearchSession:
+    key: SessionKey
+    train_loader: Any
+    test_loader: Any
+    dataset_meta: DatasetMeta
+    search_space: Any
+    memory_store: Optional[FaissMemoryStore] = None
+    surrogate: Optional[Any] = None  # nas.surrogate.SurrogateRanker, built on first use
+
+    def close(self) -> None:
+        """Releases loader workers and the memory store."""
+        for loader in (self.train_loader, self.test_loader):
+            # Persistent DataLoader workers shut down once their iterator is dropped.
+            if hasattr(loader, "_iterator"):
+                loader._iterator = None
+        if self.memory_store is not None:
+            self.memory_store.close()
+        self.memory_store = None
+        self.surrogate = None
+
+
+_SESSIONS: Dict[SessionKey, SearchSession] = {}
+
+
+def session_key(cfg: Dict[str, Any]) -> SessionKey:
+    data_cfg = cfg.get("data") or {}
+    memory_cfg = cfg.get("memory") or {}
+    memory_enabled = bool(memory_cfg.get("enabled", False))
+    return (
+        str(cfg.get("dataset", "MNIST")).upper(),
+        int(cfg.get("batch_size", 128)),
+        int(cfg.get("num_workers", 2)),
+        (cfg.get("training") or {}).get("eval_batch_size"),
+        str(data_cfg.get("mode", "torchvision")),
+        data_cfg.get("cache_dir"),
+        bool(data_cfg.get("verify_cache", False)),
+        str((cfg.get("search_space") or {}).get("name", "simple_cnn_default")).strip().lower(),
+        memory_cfg.get("index_path") if memory_enabled else None,
+        memory_cfg.get("records_path") if memory_enabled else None,
+        memory_cfg.get("index_type", "flat") if memory_enabled else None,
+        json.dumps(memory_cfg.get("index_kwargs") or {}, sort_keys=True, default=str) if memory_enabled else None,
+        int(memory_cfg.get("flush_every", 64)) if memory_enabled else None,
+        float(memory_cfg.get("flush_interval_s", 30.0)) if memory_enabled else None,
+    )
+
+
+def _build_session(cfg: Dict[str, Any], key: SessionKey) -> SearchSession:
+    data_cfg = cfg.get("data") or {}
+    train_loader, test_loader, dataset_meta = get_loaders(
+        name=cfg.get("dataset", "MNIST"),
+        batch_size=cfg.get("batch_size", 128),
+        num_workers=cfg.get("num_workers", 2),
+        mode=data_cfg.get("mode", "torchvision"),
+        cache_dir=data_cfg.get("cache_dir"),
+        verify_cache=bool(data_cfg.get("verify_cache", False)),
+        eval_batch_size=(cfg.get("training") or {}).get("eval_batch_size"),
+    )
+    search_space = get_search_space((cfg.get("search_space") or {}).get("name", "simple_cnn_default"))
+
+    memory_cfg = cfg.get("memory") or {}
+    memory_store = None
+    if memory_cfg.get("enabled", False):
+        memory_store = FaissMemoryStore(
+            index_path=memory_cfg["index_path"],
+            records_path=memory_cfg["records_path"],
+            flush_every=int(memory_cfg.get("flush_every", 64)),
+            flush_interval_s=float(memory_cfg.get("flush_interval_s", 30.0)),
+            index_type=memory_cfg.get("index_type", "flat"),
+            index_kwargs=memory_cfg.get("index_kwargs"),
+        )
+
+    return SearchSession(
+        key=key,
+        train_loader=train_loader,
+        test_loader=test_loader,
+        dataset_meta=dataset_meta,
+        search_space=search_space,
+        memory_store=memory_store,
+    )
+
+
+def get_search_session(cfg: Dict[str, Any]) -> SearchSession:
+    """Returns the warm session for ``cfg``, building it on first use."""
+    key = session_key(cfg)
+    session = _SESSIONS.get(key)
+    if session is None:
+        logger.info(f"Building search session for {key[0]} (batch_size={key[1]})")
+        session = _build_session(cfg, key)
+        _SESSIONS[key] = session
+    return session
+
+
+def invalidate_search_sessions(cfg: Optional[Dict[str, Any]] = None) -> None:
+    """Drops the session for ``cfg``, or every session when ``cfg`` is None."""
+    keys = [session_key(cfg)] if cfg is not None else list(_SESSIONS)
+    for key in keys:
+        session = _SESSIONS.pop(key, None)
+        if session is not None:
+            session.close()
+
+
+@contextmanager
+def search_session(cfg: Dict[str, Any], session: Optional[SearchSession] = None) -> Iterator[SearchSession]:
+    """Yields ``session`` if the caller owns one; otherwise the session for ``cfg``, closed on exit."""
+    if session is not None:
+        yield session
+        return
+    try:
+        yield get_search_session(cfg)
+    finally:
+        invalidate_search_sessions(cfg)
@@ -0,0 +1,380 @@
+"""
+Surrogate performance predictor used to pre-rank candidates before training.
+
+``SurrogateModel`` is a bootstrap ensemble of ridge regressors on random
+Fourier features, written in numpy. It is trained on the completed
+``TrialRecord``s of one (dataset, search space) memory partition:
+
+- Features: the numeric params (log10 for params spanning two or more decades,
+  e.g. ``lr``), the training context (epochs, batch size, input shape) and
+  log10 of the model's params/FLOPs.
+- Incremental training: every member keeps ridge sufficient statistics
+  (``PhiᵀWPhi``, ``PhiᵀWy``) with Poisson(1) online-bootstrap weights, so new
+  records cost O(rows) to add. The input scaler is refit, and the statistics
+  recomputed from the stored feature rows, whenever the training set grows by
+  ``refit_growth`` since the last fit (amortized O(1) per record).
+- Uncertainty: ensemble variance plus the fitted noise variance, multiplied by
+  a calibration factor. Before a batch of new records is added it is scored by
+  the current model, and the factor tracks the running RMS of the standardized
+  residuals, so predicted stds stay calibrated online.
+
+Models persist next to the FAISS index as
+``<index>.surrogate/<dataset>__<search_space>.npz``. The file records the format
+``version``, a ``revision`` bumped on every update and the number of store rows
+it has seen, so ``sync`` only reads newer rows. Files from another version are
+discarded and rebuilt from the store.
+
+``SurrogateRanker.untried`` drops candidates whose canonical params (the
+result-cache key) are already in memory or were tried in the current run, so
+the ranking never spends a slot on a configuration that has been measured.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import optuna
+
+from nas.result_cache import canonical_params
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SURROGATE_VERSION = 1
+_CONTEXT_FEATURES = ("epochs", "batch_size", "in_ch", "size")
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)) and math.isfinite(float(value)):
+        return float(value)
+    return None
+
+
+class SurrogateModel:
+    def __init__(
+        self,
+        n_members: int = 8,
+        n_features: int = 128,
+        ridge: float = 1.0,
+        lengthscale: float = 1.0,
+        refit_growth: float = 2.0,
+        seed: int = 0,
+    ) -> None:
+        self.n_members = max(2, int(n_members))
+        self.n_features = max(8, int(n_features))
+        self.ridge = float(ridge)
+        self.lengthscale = float(lengthscale)
+        self.refit_growth = float(refit_growth)
+        self.seed = int(seed)
+
+        self.param_keys: List[str] = []
+        self.log_keys: List[str] = []
+        self.X = np.empty((0, 0), dtype=np.float32)  # raw feature rows
+        self.y = np.empty((0,), dtype=np.float32)
+        self.boot = np.empty((0, self.n_members), dtype=np.uint8)  # bootstrap weight of each row per member
+        self.mean = np.empty((0,), dtype=np.float32)
+        self.std = np.empty((0,), dtype=np.float32)
+        self.fitted_rows = 0
+        self.calib_sq, self.calib_n = 1.0, 1.0  # running sum of squared z-scores (one pseudo-observation at z=1)
+        self.rows_seen = 0  # memory-store rows already consumed by ``sync``
+        self.revision = 0
+
+        self._W = self._b = None
+        self._A = self._c = self._yy = self._wsum = None
+        self._coef = self._noise = None
+
+    # ------------------------------------------------------------------ features
+
+    def _schema(self, records: List[Dict[str, Any]]) -> None:
+        values: Dict[str, List[float]] = {}
+        for record in records:
+            for key, value in (record.get("params") or {}).items():
+                v = _to_float(value)
+                if v is not None:
+                    values.setdefault(str(key), []).append(v)
+        self.param_keys = sorted(values)
+        self.log_keys = [k for k in self.param_keys if min(values[k]) > 0 and max(values[k]) / min(values[k]) >= 100.0]
+
+    def featurize(self, params: Dict[str, Any], context: Dict[str, Any], model_params: Any = None, flops: Any = None) -> np.ndarray:
+        row = []
+        for key in self.param_keys:
+            v = _to_float(params.get(key))
+            v = 0.0 if v is None else v
+            row.append(math.log10(max(v, 1e-12)) if key in self.log_keys else v)
+        for key in _CONTEXT_FEATURES:
+            row.append(_to_float(context.get(key)) or 0.0)
+        for v in (model_params, flops):
+            row.append(math.log10(max(_to_float(v) or 0.0, 1.0)))
+        return np.asarray(row, dtype=np.float32)
+
+    def _record_features(self, record: Dict[str, Any]) -> np.ndarray:
+        return self.featurize(record.get("params") or {}, record.get("context") or {}, record.get("model_params"), record.get("flops"))
+
+    # ------------------------------------------------------------------ training
+
+    @property
+    def n(self) -> int:
+        return int(self.y.shape[0])
+
+    def _init_features(self, dim: int) -> None:
+        rng = np.random.default_rng(self.seed)
+        self._W = (rng.standard_normal((self.n_members, dim, self.n_features)) / self.lengthscale).astype(np.float32)
+        self._b = rng.uniform(0.0, 2.0 * np.pi, (self.n_members, self.n_features)).astype(np.float32)
+
+    def _phi(self, X: np.ndarray) -> np.ndarray:
+        """(members, rows, n_features + 1) random Fourier features plus a bias column."""
+        z = (X - self.mean) / self.std
+        phi = np.sqrt(2.0 / self.n_features) * np.cos(np.einsum("nd,mdf->mnf", z, self._W) + self._b[:, None, :])
+        return np.concatenate([phi, np.ones(phi.shape[:2] + (1,), dtype=phi.dtype)], axis=2).astype(np.float64)
+
+    def _accumulate(self, X: np.ndarray, y: np.ndarray, boot: np.ndarray) -> None:
+        phi = self._phi(X)
+        w = boot.T.astype(np.float64)  # (members, rows)
+        self._A += np.einsum("mnf,mn,mng->mfg", phi, w, phi)
+        self._c += np.einsum("mnf,mn,n->mf", phi, w, y.astype(np.float64))
+        self._yy += (w * y.astype(np.float64) ** 2).sum(axis=1)
+        self._wsum += w.sum(axis=1)
+
+    def _refit(self, rescale: bool = True) -> None:
+        if rescale:
+            self.mean = self.X.mean(axis=0).astype(np.float32)
+            std = self.X.std(axis=0).astype(np.float32)
+            self.std = np.where(std > 1e-6, std, 1.0).astype(np.float32)
+            self.fitted_rows = self.n
+        size = self.n_features + 1
+        self._A = np.zeros((self.n_members, size, size))
+        self._c = np.zeros((self.n_members, size))
+        self._yy = np.zeros(self.n_members)
+        self._wsum = np.zeros(self.n_members)
+        self._accumulate(self.X, self.y, self.boot)
+
+    def _solve(self) -> None:
+        size = self.n_features + 1
+        reg = self._A + self.ridge * np.eye(size)[None]
+        self._coef = np.linalg.solve(reg, self._c[..., None])[..., 0]
+        # Weighted training residual variance: yᵀWy - 2 wᵀc + wᵀAw, averaged over members.
+        rss = self._yy - 2.0 * (self._coef * self._c).sum(axis=1) + np.einsum("mf,mfg,mg->m", self._coef, self._A, self._coef)
+        self._noise = float(np.clip(rss / np.maximum(self._wsum, 1.0), 1e-8, None).mean())
+
+    def update(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Adds completed trial records (``TrialRecord`` dumps). Returns how many were used."""
+        records = [r for r in records if r.get("status", "completed") == "completed" and _to_float(r.get("value")) is not None]
+        if not records:
+            return 0
+        if not self.param_keys:
+            self._schema(records)
+            self._init_features(len(self._record_features(records[0])))
+            self.X = np.empty((0, self._W.shape[1]), dtype=np.float32)
+
+        X = np.vstack([self._record_features(r) for r in records])
+        y = np.asarray([float(r["value"]) for r in records], dtype=np.float32)
+        if self.ready:
+            # Online calibration: score the batch before the model has seen it.
+            mu, sd = self.predict_features(X, calibrated=False)
+            z = (y - mu) / np.maximum(sd, 1e-6)
+            self.calib_sq += float((z ** 2).sum())
+            self.calib_n += float(len(z))
+
+        rng = np.random.default_rng(self.seed + 7919 * (self.n + 1))
+        boot = rng.poisson(1.0, (len(y), self.n_members)).astype(np.uint8)
+        self.X = np.vstack([self.X, X])
+        self.y = np.concatenate([self.y, y])
+        self.boot = np.vstack([self.boot, boot])
+        if self.fitted_rows == 0 or self.n >= self.refit_growth * self.fitted_rows:
+            self._refit()
+        else:
+            self._accumulate(X, y, boot)
+        self._solve()
+        self.revision += 1
+        return len(records)
+
+    # ------------------------------------------------------------------ prediction
+
+    @property
+    def ready(self) -> bool:
+        return self._coef is not None
+
+    @property
+    def calibration(self) -> float:
+        return math.sqrt(self.calib_sq / self.calib_n)
+
+    def predict_features(self, X: np.ndarray, calibrated: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        preds = np.einsum("mnf,mf->mn", self._phi(np.asarray(X, dtype=np.float32)), self._coef)
+        mu = preds.mean(axis=0)
+        sd = np.sqrt(preds.var(axis=0, ddof=1) + self._noise)
+        if calibrated:
+            sd = sd * self.calibration
+        return mu.astype(np.float32), sd.astype(np.float32)
+
+    def predict(self, candidates: List[Dict[str, Any]], context: Dict[str, Any], cost_fn: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Calibrated mean/std of the value of each candidate params dict."""
+        rows = []
+        for params in candidates:
+            cost = cost_fn(params) if cost_fn else None
+            rows.append(self.featurize(params, context, getattr(cost, "params", None), getattr(cost, "flops", None)))
+        return self.predict_features(np.vstack(rows))
+
+    # ------------------------------------------------------------------ persistence
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": SURROGATE_VERSION,
+            "revision": self.revision,
+            "rows_seen": self.rows_seen,
+            "param_keys": self.param_keys,
+            "log_keys": self.log_keys,
+            "hparams": [self.n_members, self.n_features, self.ridge, self.lengthscale, self.refit_growth, self.seed],
+            "calibration": [self.calib_sq, self.calib_n],
+            "fitted_rows": self.fitted_rows,
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                X=self.X,
+                y=self.y,
+                boot=self.boot,
+                mean=self.mean,
+                std=self.std,
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, **hparams: Any) -> Optional["SurrogateModel"]:
+        """The persisted model, or None when missing, unreadable, from another version or other hyperparameters."""
+        try:
+            with np.load(Path(path)) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                X, y, boot, mean, std = data["X"], data["y"], data["boot"], data["mean"], data["std"]
+        except (OSError, ValueError, KeyError):
+            return None
+        model = cls(**hparams)
+        wanted = [model.n_members, model.n_features, model.ridge, model.lengthscale, model.refit_growth, model.seed]
+        if meta.get("version") != SURROGATE_VERSION or meta.get("hparams") != wanted:
+            return None
+        model.param_keys, model.log_keys = list(meta["param_keys"]), list(meta["log_keys"])
+        model.calib_sq, model.calib_n = meta["calibration"]
+        model.rows_seen, model.revision = int(meta["rows_seen"]), int(meta["revision"])
+        model.X, model.y, model.boot = X.astype(np.float32), y.astype(np.float32), boot.astype(np.uint8)
+        if model.n:
+            # Same scaler as when saved, so the reloaded model predicts exactly what the saved one did.
+            model.mean, model.std, model.fitted_rows = mean.astype(np.float32), std.astype(np.float32), int(meta["fitted_rows"])
+            model._init_features(model.X.shape[1])
+            model._refit(rescale=False)
+            model._solve()
+        return model
+
+
+def _model_path(index_path: Path, dataset: str, search_space: str) -> Path:
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{str(dataset).upper()}__{search_space}")
+    return index_path.with_name(index_path.name + ".surrogate") / f"{name}.npz"
+
+
+class SurrogateRanker:
+    """A partition's ``SurrogateModel`` kept in sync with the memory store, plus candidate ranking."""
+
+    def __init__(self, cfg: Dict[str, Any], memory_store, dataset: str, search_space, dataset_meta: Dict[str, Any]) -> None:
+        surrogate_cfg = cfg.get("surrogate") or {}
+        self.memory_store = memory_store
+        self.dataset = str(dataset)
+        self.search_space = search_space
+        self.dataset_meta = dict(dataset_meta)
+        self.min_records = int(surrogate_cfg.get("min_records", 16))
+        self.kappa = float(surrogate_cfg.get("kappa", 1.0))
+        self.direction = str((cfg.get("optuna") or {}).get("direction", "maximize")).lower()
+        self.hparams = {
+            "n_members": int(surrogate_cfg.get("n_members", 8)),
+            "n_features": int(surrogate_cfg.get("n_features", 128)),
+            "ridge": float(surrogate_cfg.get("ridge", 1.0)),
+            "lengthscale": float(surrogate_cfg.get("lengthscale", 1.0)),
+            "refit_growth": float(surrogate_cfg.get("refit_growth", 2.0)),
+            "seed": int(cfg.get("seed", 0)),
+        }
+        self.path = _model_path(Path(memory_store.index_path), self.dataset, search_space.name)
+        self.model = SurrogateModel.load(self.path, **self.hparams) or SurrogateModel(**self.hparams)
+        self._known: Set[str] = set()  # canonical params of the partition's memory records
+        self._known_rows = 0  # store rows already read into _known
+        self.sync()
+
+    @property
+    def ready(self) -> bool:
+        return self.model.ready and self.model.n >= self.min_records
+
+    def sync(self) -> int:
+        """Trains on memory-store rows added since the last sync and persists the model."""
+        store = self.memory_store
+        if len(store) < self.model.rows_seen:
+            # The store was rebuilt from a different JSONL; start over.
+            self.model = SurrogateModel(**self.hparams)
+        rows = store.partition_rows({"dataset": self.dataset, "search_space": self.search_space.name})
+        rows = rows[rows >= self.model.rows_seen]
+        self.model.rows_seen = len(store)
+        if not len(rows):
+            return 0
+        added = self.model.update(r.model_dump(mode="python") for r in store.get_records(rows.tolist()))
+        self.model.save(self.path)
+        logger.info(f"Surrogate {self.path.name}: +{added} records (n={self.model.n}, revision {self.model.revision}, calibration {self.model.calibration:.2f})")
+        return added
+
+    def untried(self, candidates: List[Dict[str, Any]], tried: Iterable[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """``candidates`` minus the configurations in memory or in ``tried`` (e.g. this run's trials)."""
+        store = self.memory_store
+        if len(store) < self._known_rows:
+            self._known, self._known_rows = set(), 0
+        rows = store.partition_rows({"dataset": self.dataset, "search_space": self.search_space.name})
+        rows = rows[rows >= self._known_rows]
+        self._known.update(params_key(r.params) for r in store.get_records(rows.tolist()))
+        self._known_rows = len(store)
+        exclude = self._known | {params_key(p) for p in tried}
+        return [p for p in candidates if params_key(p) not in exclude]
+
+    def rank(self, candidates: List[Dict[str, Any]], context: Dict[str, Any], top_k: int) -> List[Tuple[Dict[str, Any], float, float]]:
+        """The ``top_k`` candidates by optimistic score (mean ± kappa·std), as (params, mean, std)."""
+        if not candidates or top_k <= 0:
+            return []
+        mu, sd = self.model.predict(candidates, context, lambda p: self.search_space.cost_model(p, self.dataset_meta))
+        sign = -1.0 if self.direction == "minimize" else 1.0
+        score = sign * mu + self.kappa * sd
+        order = np.argsort(-score, kind="stable")[:top_k]
+        return [(candidates[i], float(mu[i]), float(sd[i])) for i in order]
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    """Identity of a configuration: its canonical params, as hashed by the result cache."""
+    return json.dumps(canonical_params(params), sort_keys=True)
+
+
+def sample_candidates(search_space, n: int, guidance: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """``n`` distinct random params dicts drawn through the search space's own ``sample``."""
+    study = optuna.create_study(sampler=optuna.samplers.RandomSampler(seed=seed))
+    seen, candidates = set(), []
+    for _ in range(max(0, int(n))):
+        params = search_space.sample(study.ask(), guidance=guidance)
+        key = params_key(params)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def get_surrogate(session, cfg: Dict[str, Any]) -> Optional[SurrogateRanker]:
+    """The session's surrogate for its dataset and search space; None when disabled or without memory."""
+    if not (cfg.get("surrogate") or {}).get("enabled", False):
+        return None
+    if session.memory_store is None:
+        logger.warning("surrogate.enabled needs memory.enabled; skipping candidate pre-ranking")
+        return None
+    if session.surrogate is None:
+        session.surrogate = SurrogateRanker(
+            cfg, session.memory_store, cfg.get("dataset", "MNIST"), session.search_space, session.dataset_meta.to_dict()
+        )
+    return session.surrogate
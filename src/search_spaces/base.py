@@ -1,15 +1,54 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from search_spaces.cost import ArchitectureCost
 
 
 @dataclass
 class SearchSpaceSpec:
     name: str
 
+    # Spaces whose candidates can share the weights of one supernet set this and
+    # implement ``build_supernet`` / ``supernet_key`` (see ``nas.oneshot``).
+    supports_supernet = False
+    # Spaces that can initialise a candidate from a related trained one implement ``morph_weights``.
+    supports_morphism = False
+    # Spaces usable by regularized evolution implement ``encode`` / ``decode`` / ``mutate`` (see ``nas.evolution``).
+    supports_evolution = False
+
     def sample(self, trial: Any, guidance: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         raise NotImplementedError
 
     def build_model(self, params: Dict[str, Any], dataset_meta: Dict[str, Any]) -> Any:
         raise NotImplementedError
+
+    def cost_model(self, params: Dict[str, Any], dataset_meta: Dict[str, Any]) -> ArchitectureCost:
+        """FLOPs, params and activation memory of ``params`` without building the model."""
+        raise NotImplementedError
+
+    def build_supernet(self, dataset_meta: Dict[str, Any], guidance: Optional[Dict[str, Any]] = None) -> Any:
+        """Weight-sharing model holding every candidate; ``activate(params)`` selects one, ``extract(params)`` copies it out."""
+        raise NotImplementedError(f"Search space {self.name} does not support supernet (one-shot) search")
+
+    def supernet_key(self, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        """The params that select a sub-network; candidates with the same key share one supernet evaluation."""
+        raise NotImplementedError(f"Search space {self.name} does not support supernet (one-shot) search")
+
+    def morph_weights(
+        self, parent_state: Dict[str, Any], parent_params: Dict[str, Any], params: Dict[str, Any], dataset_meta: Dict[str, Any], seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """State dict for ``build_model(params)`` derived from a trained parent (Net2Net-style morphism)."""
+        raise NotImplementedError(f"Search space {self.name} does not support weight inheritance")
+
+    def encode(self, params: Dict[str, Any]) -> List[float]:
+        """Fixed-length numeric encoding of ``params``; ``decode`` inverts it."""
+        raise NotImplementedError(f"Search space {self.name} does not support evolution")
+
+    def decode(self, encoding: Any) -> Dict[str, Any]:
+        raise NotImplementedError(f"Search space {self.name} does not support evolution")
+
+    def mutate(self, params: Dict[str, Any], rng: Any, guidance: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """A copy of ``params`` with one gene changed, drawn with the numpy generator ``rng``."""
+        raise NotImplementedError(f"Search space {self.name} does not support evolution")
@@ -0,0 +1,103 @@
+"""
+Closed-form cost model for search-space architectures.
+
+Costs are derived from layer shapes alone, so no model is instantiated and
+no forward pass is run. ``flops`` follows thop's convention, which is what
+``utils.metrics.try_flops`` used to report: one multiply-accumulate per
+conv/linear weight application, with activations, pooling and dropout counted
+as free. Activation sizes are per sample in float32. Multiply them by the
+batch size for a batch. Each layer also carries its op signature (kind and
+shapes), the key of the per-layer latency table in ``nas.latency``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+FLOAT32_BYTES = 4
+
+
+@dataclass(frozen=True)
+class LayerCost:
+    name: str
+    flops: int
+    params: int
+    in_elements: int
+    out_elements: int
+    op: Tuple[Any, ...] = ()  # e.g. ("conv2d", in_ch, out_ch, kernel, stride, padding, h, w)
+
+
+@dataclass(frozen=True)
+class ArchitectureCost:
+    flops: int
+    params: int
+    peak_activation_bytes: int  # largest input + output pair alive at once (inference)
+    activation_bytes: int  # all layer outputs, i.e. what training keeps for backward
+    layers: Tuple[LayerCost, ...] = field(default=(), repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "flops": self.flops,
+            "params": self.params,
+            "peak_activation_bytes": self.peak_activation_bytes,
+            "activation_bytes": self.activation_bytes,
+        }
+
+
+class CostBuilder:
+    """Walks a feed-forward network layer by layer, tracking the activation shape."""
+
+    def __init__(self, channels: int, height: int, width: int) -> None:
+        self.shape: Tuple[int, ...] = (channels, height, width)
+        self.layers: List[LayerCost] = []
+
+    @property
+    def elements(self) -> int:
+        n = 1
+        for d in self.shape:
+            n *= d
+        return n
+
+    def _push(self, name: str, flops: int, params: int, shape: Tuple[int, ...], op: Tuple[Any, ...] = ()) -> "CostBuilder":
+        in_elements = self.elements
+        self.shape = shape
+        self.layers.append(LayerCost(name, int(flops), int(params), in_elements, self.elements, op))
+        return self
+
+    def conv2d(self, name: str, out_ch: int, kernel_size: int, stride: int = 1, padding: int = 0, bias: bool = True) -> "CostBuilder":
+        in_ch, h, w = self.shape
+        oh = (h + 2 * padding - kernel_size) // stride + 1
+        ow = (w + 2 * padding - kernel_size) // stride + 1
+        macs = in_ch * kernel_size * kernel_size * out_ch * oh * ow
+        params = in_ch * kernel_size * kernel_size * out_ch + (out_ch if bias else 0)
+        return self._push(name, macs, params, (out_ch, oh, ow), ("conv2d", in_ch, out_ch, kernel_size, stride, padding, h, w))
+
+    def pool2d(self, name: str, kernel_size: int, stride: int | None = None) -> "CostBuilder":
+        c, h, w = self.shape
+        stride = stride or kernel_size
+        shape = (c, (h - kernel_size) // stride + 1, (w - kernel_size) // stride + 1)
+        return self._push(name, 0, 0, shape, ("max_pool2d", c, kernel_size, stride, h, w))
+
+    def elementwise(self, name: str, kind: str = "relu") -> "CostBuilder":
+        """An op applied per element; ``kind`` is ``relu`` or ``dropout`` (a no-op at inference)."""
+        return self._push(name, 0, 0, self.shape, (kind, self.elements))
+
+    def flatten(self) -> "CostBuilder":
+        # A view: no new activation and no layer entry.
+        self.shape = (self.elements,)
+        return self
+
+    def linear(self, name: str, out_features: int, bias: bool = True) -> "CostBuilder":
+        in_features = self.elements
+        params = in_features * out_features + (out_features if bias else 0)
+        return self._push(name, in_features * out_features, params, (out_features,), ("linear", in_features, out_features))
+
+    def build(self) -> ArchitectureCost:
+        layers = tuple(self.layers)
+        return ArchitectureCost(
+            flops=sum(layer.flops for layer in layers),
+            params=sum(layer.params for layer in layers),
+            peak_activation_bytes=max((l.in_elements + l.out_elements for l in layers), default=0) * FLOAT32_BYTES,
+            activation_bytes=sum(layer.out_elements for layer in layers) * FLOAT32_BYTES,
+            layers=layers,
+        )
@@ -1,9 +1,23 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
+from models.morphism import morph_simple_cnn
 from models.simple_cnn import SimpleCNN
+from models.supernet import SimpleCNNSupernet
 from search_spaces.base import SearchSpaceSpec
+from search_spaces.cost import ArchitectureCost, CostBuilder
+
+CONV_CHOICES = [16, 32, 48, 64]
+KERNEL_CHOICES = [3, 5]
+DROPOUT_RANGE = (0.0, 0.5)
+LR_RANGE = (1e-3, 1e-1)
+GENES = ("conv_channels", "kernel_size", "dropout", "lr")
+# Genes missing from hand-written architectures (e.g. no lr) take SimpleCNN's and the config's defaults.
+GENE_DEFAULTS = {"conv_channels": 32, "kernel_size": 3, "dropout": 0.1, "lr": 0.01}
 
 
 def _pick(guidance: Optional[Dict[str, Any]], key: str, default: Any) -> Any:
@@ -13,19 +27,44 @@ def _pick(guidance: Optional[Dict[str, Any]], key: str, default: Any) -> Any:
     return default if value is None else value
 
 
+@lru_cache(maxsize=65536)
+def _simple_cnn_cost(in_ch: int, size: int, num_classes: int, conv_channels: int, kernel_size: int) -> ArchitectureCost:
+    # Mirrors SimpleCNN.forward layer by layer.
+    pad = kernel_size // 2
+    return (
+        CostBuilder(in_ch, size, size)
+        .conv2d("conv1", conv_channels, kernel_size, padding=pad)
+        .elementwise("relu1")
+        .pool2d("pool1", 2)
+        .conv2d("conv2", conv_channels * 2, kernel_size, padding=pad)
+        .elementwise("relu2")
+        .pool2d("pool2", 2)
+        .flatten()
+        .linear("fc1", 128)
+        .elementwise("relu3")
+        .elementwise("drop", kind="dropout")
+        .linear("fc2", num_classes)
+        .build()
+    )
+
+
 class SimpleCNNSearchSpace(SearchSpaceSpec):
+    supports_supernet = True
+    supports_morphism = True
+    supports_evolution = True
+
     def __init__(self) -> None:
         super().__init__(name="simple_cnn_default")
 
     def sample(self, trial: Any, guidance: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        conv_choices = _pick(guidance, "conv_channels", [16, 32, 48, 64])
-        kernel_choices = _pick(guidance, "kernel_size", [3, 5])
+        conv_choices = _pick(guidance, "conv_channels", CONV_CHOICES)
+        kernel_choices = _pick(guidance, "kernel_size", KERNEL_CHOICES)
 
         return {
             "conv_channels": trial.suggest_categorical("conv_channels", conv_choices),
             "kernel_size": trial.suggest_categorical("kernel_size", kernel_choices),
-            "dropout": trial.suggest_float("dropout", 0.0, 0.5),
-            "lr": trial.suggest_float("lr", 1e-3, 1e-1, log=True),
+            "dropout": trial.suggest_float("dropout", *DROPOUT_RANGE),
+            "lr": trial.suggest_float("lr", *LR_RANGE, log=True),
         }
 
     def build_model(self, params: Dict[str, Any], dataset_meta: Dict[str, Any]) -> Any:
@@ -36,3 +75,61 @@ class SimpleCNNSearchSpace(SearchSpaceSpec):
             kernel_size=int(params["kernel_size"]),
             dropout=float(params["dropout"]),
         )
+
+    def build_supernet(self, dataset_meta: Dict[str, Any], guidance: Optional[Dict[str, Any]] = None) -> Any:
+        return SimpleCNNSupernet(
+            in_ch=int(dataset_meta["in_ch"]),
+            num_classes=int(dataset_meta.get("num_classes", 10)),
+            channel_choices=_pick(guidance, "conv_channels", CONV_CHOICES),
+            kernel_choices=_pick(guidance, "kernel_size", KERNEL_CHOICES),
+        )
+
+    def supernet_key(self, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        # dropout and lr only matter when a sub-network is trained on its own.
+        return (int(params["conv_channels"]), int(params["kernel_size"]))
+
+    def morph_weights(
+        self, parent_state: Dict[str, Any], parent_params: Dict[str, Any], params: Dict[str, Any], dataset_meta: Dict[str, Any], seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # Same fc1 input size rule as SimpleCNN: 28x28 -> 7x7, 32x32 -> 8x8.
+        spatial = 7 if int(dataset_meta["in_ch"]) == 1 else 8
+        return morph_simple_cnn(parent_state, parent_params, params, spatial, seed=seed)
+
+    def encode(self, params: Dict[str, Any]) -> List[float]:
+        return [float(params.get(gene, GENE_DEFAULTS[gene])) for gene in GENES]
+
+    def decode(self, encoding: Any) -> Dict[str, Any]:
+        conv_channels, kernel_size, dropout, lr = (float(x) for x in encoding)
+        return {"conv_channels": int(round(conv_channels)), "kernel_size": int(round(kernel_size)), "dropout": dropout, "lr": lr}
+
+    def mutate(self, params: Dict[str, Any], rng: np.random.Generator, guidance: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        child = self.decode(self.encode(params))
+        choices = {
+            "conv_channels": sorted(_pick(guidance, "conv_channels", CONV_CHOICES)),
+            "kernel_size": sorted(_pick(guidance, "kernel_size", KERNEL_CHOICES)),
+        }
+        # Categorical genes that guidance pins to a single choice cannot mutate.
+        genes = [g for g in GENES if len(choices.get(g, (0.0, 1.0))) > 1]
+        gene = genes[int(rng.integers(len(genes)))]
+        if gene in choices:
+            # Step to a neighbouring choice, so width and kernel change gradually.
+            options = choices[gene]
+            here = int(np.argmin([abs(c - child[gene]) for c in options]))
+            neighbours = [options[i] for i in (here - 1, here + 1) if 0 <= i < len(options)]
+            child[gene] = int(neighbours[int(rng.integers(len(neighbours)))])
+        elif gene == "dropout":
+            child[gene] = float(np.clip(child[gene] + rng.normal(0.0, 0.1), *DROPOUT_RANGE))
+        else:
+            # A quarter of a decade on average, in log space.
+            child[gene] = float(np.clip(child[gene] * 10 ** rng.normal(0.0, 0.25), *LR_RANGE))
+        return child
+
+    def cost_model(self, params: Dict[str, Any], dataset_meta: Dict[str, Any]) -> ArchitectureCost:
+        # Memoized on the shape-relevant keys only; dropout and lr do not change the cost.
+        return _simple_cnn_cost(
+            int(dataset_meta["in_ch"]),
+            int(dataset_meta["size"]),
+            int(dataset_meta.get("num_classes", 10)),
+            int(params.get("conv_channels", 32)),
+            int(params.get("kernel_size", 3)),
+        )
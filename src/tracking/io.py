@@ -7,6 +7,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 
 def compute_config_hash(cfg: Dict[str, Any]) -> str:
     payload = json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")
@@ -33,8 +38,17 @@ def init_run_context(cfg: Dict[str, Any]) -> Dict[str, Any]:
 def append_jsonl(path: str | Path, record: Dict[str, Any]) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, ensure_ascii=True, default=str) + "\n"
     with p.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=True, default=str) + "\n")
+        # Parallel trial workers append to the same file; hold an exclusive lock per line.
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(line)
+            f.flush()
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
 
 def write_json(path: str | Path, payload: Dict[str, Any]) -> None:
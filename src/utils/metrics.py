@@ -1,10 +1,53 @@
 import torch
-from typing import Dict
+from typing import Callable, Dict, Optional, Tuple
 
 def accuracy(outputs: torch.Tensor, targets: torch.Tensor) -> float:
     preds = outputs.argmax(dim=1)
     return (preds == targets).float().mean().item()
 
+class MetricAccumulator:
+    """
+    Running loss / correct-count sums kept on the device.
+
+    ``update`` only queues device ops, so the training loop never blocks on a host
+    sync; values are read back once in ``compute`` (end of epoch) or every
+    ``log_interval`` steps when an ``on_log(step, loss, acc)`` callback is given.
+    """
+
+    def __init__(
+        self,
+        device,
+        log_interval: int = 0,
+        on_log: Optional[Callable[[int, float, float], None]] = None,
+    ) -> None:
+        self.device = device
+        self.log_interval = max(0, int(log_interval or 0))
+        self.on_log = on_log
+        self.reset()
+
+    def reset(self) -> None:
+        self._loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+        self._correct = torch.zeros((), dtype=torch.int64, device=self.device)
+        self.count = 0
+        self.steps = 0
+
+    def update(self, loss: torch.Tensor, outputs: torch.Tensor, targets: torch.Tensor) -> None:
+        n = targets.size(0)
+        self._loss_sum += loss.detach().to(torch.float64) * n
+        self._correct += (outputs.detach().argmax(dim=1) == targets).sum()
+        self.count += n
+        self.steps += 1
+        if self.on_log is not None and self.log_interval and self.steps % self.log_interval == 0:
+            loss_avg, acc = self.compute()
+            self.on_log(self.steps, loss_avg, acc)
+
+    def compute(self) -> Tuple[float, float]:
+        """Mean loss and accuracy so far; a single device-to-host transfer."""
+        if self.count == 0:
+            return 0.0, 0.0
+        loss_sum, correct = torch.stack([self._loss_sum, self._correct.to(torch.float64)]).tolist()
+        return loss_sum / self.count, correct / self.count
+
 def count_params(model) -> int:
     return sum(p.numel() for p in model.parameters())
 